@@ -10,6 +10,7 @@ Funzionalità principali:
 - Registrazione blueprints per routing modulare
 - Setup sessioni sicure con cookies
 - Gestione routing SPA (Single Page Application)
+- Compressione gzip/brotli delle risposte e file statici precompressi
 
 Il pattern factory evita l'uso di variabili globali e permette
 migliore testabilità e isolamento tra diverse istanze dell'app.
@@ -78,12 +79,44 @@ def create_app(config_class=Config):
     # Questo popola app.config con tutti i valori definiti in config_class
     app.config.from_object(config_class)
     
+    # Provider JSON: orjson se installato, Decimal e date serializzati nativamente
+    from .utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # ========== INIZIALIZZAZIONE ESTENSIONI ==========
     
     # Inizializza SQLAlchemy con questa istanza app
     # Questo configura db.session e rende disponibile l'ORM
     db.init_app(app)
     
+    # Configura la cache in memoria dell'ultima posizione dei droni
+    from .services.position_cache import position_cache
+    position_cache.init_app(app)
+    
+    # Configura il buffer write-behind delle tracce GPS (se abilitato)
+    from .services.track_buffer import track_buffer
+    track_buffer.init_app(app)
+    
+    # Versioni delle risorse per gli ETag dei GET condizionali
+    from .utils.conditional import versioni
+    from .models import Prodotto
+    versioni.track(Prodotto, 'prodotti')
+    
+    # Rollup giornalieri delle statistiche aggiornati a ogni scrittura di missioni e ordini
+    from .services.stats_rollup import stats_rollup
+    stats_rollup.init_app(app)
+    
+    # Catalogo prodotti in memoria (ricerca e categorie senza query)
+    from .services.product_catalog import product_catalog
+    product_catalog.init_app(app)
+    
+    # Compressione gzip/brotli delle risposte e copie precompresse dei file statici
+    from .utils.compression import compressor, send_static
+    compressor.init_app(app)
+    
+    # I file statici (/static/...) sono serviti dalle copie precompresse
+    app.view_functions['static'] = lambda filename: send_static(static_folder, filename)
+    
     # ========== CONFIGURAZIONE CORS ==========
     
     # Abilita Cross-Origin Resource Sharing per le API
@@ -159,6 +192,7 @@ def create_app(config_class=Config):
         Questa route cattura tutte le richieste non gestite dalle route precedenti.
         Gestisce due scenari:
         1. Se il path corrisponde a un file statico esistente, lo serve
+           (dalla copia precompressa .br/.gz se il client la accetta)
         2. Altrimenti serve il template HTML appropriato per il routing client-side
         
         Questo permette:
@@ -178,7 +212,7 @@ def create_app(config_class=Config):
         # Se esiste un file statico con questo path, servilo
         # Questo gestisce CSS, JS, immagini, fonts, etc.
         if os.path.exists(static_file_path) and os.path.isfile(static_file_path):
-            return send_from_directory(static_folder, path)
+            return send_static(static_folder, path)
         
         # Se il path inizia con 'cliente', serve il template cliente
         # Gestisce route come /cliente/ordini, /cliente/tracking, etc.
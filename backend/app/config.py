@@ -78,6 +78,95 @@ class Config:
     # Accetta valori: 'true', '1', 'yes' (case-insensitive) per True
     DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() in ('true', '1', 'yes')
     
+    # ========== TRACKING LIVE ==========
+    
+    # Intervallo (secondi) tra i commenti keep-alive inviati sugli stream SSE
+    # Evita che proxy e load balancer chiudano connessioni inattive
+    TRACKING_STREAM_HEARTBEAT = int(os.environ.get('TRACKING_STREAM_HEARTBEAT', 15))
+    
+    # Numero massimo di missioni nella cache in memoria dell'ultima posizione
+    # Oltre questa soglia vengono rimosse le missioni consultate meno di recente
+    TRACKING_CACHE_SIZE = int(os.environ.get('TRACKING_CACHE_SIZE', 1000))
+    
+    # Secondi di validità di una missione nella cache dell'ultima posizione
+    # Limita il ritardo con cui un worker vede i punti scritti dagli altri
+    TRACKING_CACHE_TTL = float(os.environ.get('TRACKING_CACHE_TTL', 5))
+    
+    # Finestra (secondi) riletta prima del cursore ?since= del polling incrementale
+    # Recupera i punti salvati dopo il poll precedente ma con timestamp già
+    # superato dal cursore (flush write-behind di altri worker, timestamp del
+    # client, più punti nello stesso secondo); il client scarta i duplicati.
+    # Deve superare TRACCE_BUFFER_MAX_AGE.
+    TRACKING_CURSORE_FINESTRA = int(os.environ.get('TRACKING_CURSORE_FINESTRA', 30))
+    
+    # Modalità write-behind per i singoli punti GPS (opt-in)
+    # Se attiva, POST /api/tracce e /api/missioni/<id>/tracce rispondono 202
+    # e i punti vengono scritti a blocchi da un thread in background
+    TRACCE_WRITE_BEHIND = os.environ.get('TRACCE_WRITE_BEHIND', 'False').lower() in ('true', '1', 'yes')
+    
+    # Numero di punti in coda che provoca un flush immediato
+    TRACCE_BUFFER_MAX_SIZE = int(os.environ.get('TRACCE_BUFFER_MAX_SIZE', 200))
+    
+    # Età massima (secondi) del punto più vecchio in coda prima del flush
+    TRACCE_BUFFER_MAX_AGE = float(os.environ.get('TRACCE_BUFFER_MAX_AGE', 1.0))
+    
+    # Punti massimi in coda: oltre vengono scartati (database non raggiungibile)
+    TRACCE_BUFFER_MAX_CODA = int(os.environ.get('TRACCE_BUFFER_MAX_CODA', 50000))
+    
+    # Attesa massima (secondi) tra i tentativi dopo un errore di scrittura
+    TRACCE_BUFFER_BACKOFF_MAX = float(os.environ.get('TRACCE_BUFFER_BACKOFF_MAX', 30.0))
+    
+    # Archiviazione compressa automatica del percorso quando una missione
+    # passa a 'completata' (le letture dello storico usano poi l'archivio)
+    # Opt-in: richiede la tabella TracciaArchivio (migrazione 0001)
+    TRACCE_ARCHIVIO_AUTOMATICO = os.environ.get('TRACCE_ARCHIVIO_AUTOMATICO', 'False').lower() in ('true', '1', 'yes')
+    
+    # Elimina le righe Traccia dopo l'archiviazione automatica
+    # Mantiene piccola la tabella Traccia, ma i punti restano solo nel blob
+    TRACCE_ARCHIVIO_PRUNE = os.environ.get('TRACCE_ARCHIVIO_PRUNE', 'False').lower() in ('true', '1', 'yes')
+    
+    # ========== LISTE ==========
+    
+    # Elementi per pagina se ?after= è indicato senza ?limit=
+    LISTE_LIMITE_DEFAULT = int(os.environ.get('LISTE_LIMITE_DEFAULT', 50))
+    
+    # Massimo valore ammesso per ?limit= nelle liste paginate
+    LISTE_LIMITE_MASSIMO = int(os.environ.get('LISTE_LIMITE_MASSIMO', 500))
+    
+    # Durata (secondi) in cache del totale delle liste (?total=true)
+    LISTE_TOTALE_TTL = int(os.environ.get('LISTE_TOTALE_TTL', 30))
+    
+    # ========== STATISTICHE ==========
+    
+    # Durata (secondi) in cache dei KPI di /api/stats/overview
+    # I valori possono essere vecchi al massimo di questo intervallo
+    STATISTICHE_OVERVIEW_TTL = int(os.environ.get('STATISTICHE_OVERVIEW_TTL', 10))
+    
+    # ========== CATALOGO ==========
+    
+    # Validità (secondi) della copia in memoria del catalogo prodotti
+    # Le modifiche fatte dallo stesso processo la aggiornano subito; il TTL
+    # limita il ritardo con cui si vedono quelle fatte da altri worker
+    CATALOGO_TTL = int(os.environ.get('CATALOGO_TTL', 60))
+    
+    # ========== COMPRESSIONE ==========
+    
+    # Compressione gzip/brotli delle risposte (negoziata con Accept-Encoding)
+    COMPRESSIONE_ABILITATA = os.environ.get('COMPRESSIONE_ABILITATA', 'True').lower() in ('true', '1', 'yes')
+    
+    # Dimensione minima (byte) di una risposta da comprimere
+    # Sotto questa soglia il guadagno non ripaga il costo di CPU
+    COMPRESSIONE_SOGLIA = int(os.environ.get('COMPRESSIONE_SOGLIA', 1024))
+    
+    # Livelli di compressione delle risposte dinamiche (gzip 1-9, brotli 0-11)
+    COMPRESSIONE_LIVELLO_GZIP = int(os.environ.get('COMPRESSIONE_LIVELLO_GZIP', 6))
+    COMPRESSIONE_LIVELLO_BROTLI = int(os.environ.get('COMPRESSIONE_LIVELLO_BROTLI', 5))
+    
+    # Genera all'avvio le copie .gz/.br dei file statici (JS/CSS)
+    # Disattivare se la cartella è in sola lettura e le copie sono
+    # generate in fase di build (backend/compress_static.py)
+    COMPRESSIONE_STATICI = os.environ.get('COMPRESSIONE_STATICI', 'True').lower() in ('true', '1', 'yes')
+    
     # ========== JSON ==========
     
     # Non convertire caratteri non-ASCII in escape sequences (\uXXXX)
@@ -15,6 +15,8 @@ Modelli esportati:
 - Ordine: Rappresenta gli ordini effettuati dai clienti
 - Contiene: Tabella associativa che collega Ordine e Prodotto (molti-a-molti)
 - Traccia: Rappresenta i punti GPS del percorso dei droni durante le missioni
+- TracciaArchivio: Percorso compresso delle missioni completate
+- StatisticaGiornaliera: Totali giornalieri (rollup) di missioni e ordini
 
 L'ordine degli import è importante per gestire correttamente le relazioni
 tra i modelli (foreign keys).
@@ -29,6 +31,8 @@ from app.models.missione import Missione  # Modello missione
 from app.models.ordine import Ordine      # Modello ordine
 from app.models.contiene import Contiene  # Tabella associativa ordine-prodotto
 from app.models.traccia import Traccia    # Modello tracciamento GPS
+from app.models.traccia_archivio import TracciaArchivio  # Archivio compresso percorsi
+from app.models.statistica_giornaliera import StatisticaGiornaliera  # Rollup statistiche
 
 # Definizione dei modelli esportati quando si fa "from app.models import *"
 # Questo controlla quali simboli sono pubblici nel package
@@ -40,5 +44,7 @@ __all__ = [
     'Missione',
     'Ordine',
     'Contiene',
-    'Traccia'
+    'Traccia',
+    'TracciaArchivio',
+    'StatisticaGiornaliera'
 ]
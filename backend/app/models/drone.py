@@ -18,6 +18,7 @@ Relazioni:
 
 # Import dell'istanza database
 from app.extensions import db
+from app.utils.serialization import columns_dict
 
 
 class Drone(db.Model):
@@ -43,21 +44,27 @@ class Drone(db.Model):
     # Relazione con le tracce GPS registrate dal drone
     tracce = db.relationship('Traccia', backref='drone', lazy=True)
 
-    def to_dict(self):
+    # Campi JSON -> attributi del modello (parametro ?fields= delle route)
+    CAMPI = {
+        'id': 'ID',
+        'modello': 'Modello',
+        'capacita': 'Capacita',  # Decimal serializzato dal provider JSON
+        'batteria': 'Batteria'
+    }
+
+    def to_dict(self, fields=None):
         """
         Converte il modello in dizionario per JSON response.
         
-        Converte il tipo Decimal in float per compatibilità JSON.
+        Il Decimal di Capacita è serializzato dal provider JSON (come numero).
+        
+        Args:
+            fields (tuple): Campi da includere (default: tutti)
         
         Returns:
             dict: Rappresentazione JSON-serializzabile del drone
         """
-        return {
-            'id': self.ID,
-            'modello': self.Modello,
-            'capacita': float(self.Capacita) if self.Capacita else None,  # Decimal -> float
-            'batteria': self.Batteria
-        }
+        return columns_dict(self, self.CAMPI, fields)
 
     def __repr__(self):
         """
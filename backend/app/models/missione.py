@@ -26,6 +26,7 @@ Relazioni:
 
 # Import dell'istanza database
 from app.extensions import db
+from app.utils.serialization import columns_dict
 
 
 class Missione(db.Model):
@@ -70,40 +71,59 @@ class Missione(db.Model):
     
     # Tracce GPS registrate durante la missione (tracciamento real-time)
     tracce = db.relationship('Traccia', backref='missione', lazy=True)
+    
+    # Relazioni espandibili in to_dict() (parametro ?expand= delle route)
+    RELAZIONI = ('drone', 'pilota')
+
+    # Campi JSON -> attributi del modello (parametro ?fields= delle route)
+    CAMPI = {
+        'id': 'ID',
+        # Date/Time e Decimal serializzati dal provider JSON
+        # (ISO8601 e numero): nessuna conversione campo per campo
+        'data_missione': 'DataMissione',
+        'ora': 'Ora',
+        # Coordinate GPS
+        'lat_prelievo': 'LatPrelievo',
+        'long_prelievo': 'LongPrelievo',
+        'lat_consegna': 'LatConsegna',
+        'long_consegna': 'LongConsegna',
+        # Valutazione e feedback cliente
+        'valutazione': 'Valutazione',
+        'commento': 'Commento',
+        # Foreign keys
+        'drone_id': 'IdDrone',
+        'pilota_id': 'IdPilota',
+        # Stato corrente
+        'stato': 'Stato'
+    }
 
-    def to_dict(self):
+    def to_dict(self, expand=RELAZIONI, fields=None):
         """
         Converte il modello in dizionario per JSON response.
         
         Include dati embedded di drone e pilota per ridurre le query client-side.
-        Converte Decimal e Date/Time in formati JSON-serializzabili.
+        Decimal e Date/Time sono serializzati dal provider JSON
+        dell'applicazione (app.utils.json_provider).
+        
+        Args:
+            expand (tuple): Relazioni da includere (default: drone e pilota).
+                            Le route di lista le precaricano con
+                            app.utils.serialization.eager_options()
+            fields (tuple): Campi di colonna da includere (default: tutti)
         
         Returns:
             dict: Rappresentazione JSON-serializzabile della missione
         """
-        return {
-            'id': self.ID,
-            # Conversione Date/Time in formato ISO8601
-            'data_missione': self.DataMissione.isoformat() if self.DataMissione else None,
-            'ora': self.Ora.isoformat() if self.Ora else None,
-            # Conversione Decimal -> float per coordinate GPS
-            'lat_prelievo': float(self.LatPrelievo) if self.LatPrelievo else None,
-            'long_prelievo': float(self.LongPrelievo) if self.LongPrelievo else None,
-            'lat_consegna': float(self.LatConsegna) if self.LatConsegna else None,
-            'long_consegna': float(self.LongConsegna) if self.LongConsegna else None,
-            # Valutazione e feedback cliente
-            'valutazione': self.Valutazione,
-            'commento': self.Commento,
-            # Foreign keys
-            'drone_id': self.IdDrone,
-            'pilota_id': self.IdPilota,
-            # Stato corrente
-            'stato': self.Stato,
-            # Embedded objects: include dati completi di drone e pilota
-            # Usa i backref 'drone' e 'pilota' creati dalle relazioni inverse
-            'drone': self.drone.to_dict() if self.drone else None,
-            'pilota': self.pilota.to_dict() if self.pilota else None
-        }
+        result = columns_dict(self, self.CAMPI, fields)
+        
+        # Embedded objects: include dati completi di drone e pilota
+        # Usa i backref 'drone' e 'pilota' creati dalle relazioni inverse
+        if 'drone' in expand:
+            result['drone'] = self.drone.to_dict() if self.drone else None
+        if 'pilota' in expand:
+            result['pilota'] = self.pilota.to_dict() if self.pilota else None
+        
+        return result
 
     def __repr__(self):
         """
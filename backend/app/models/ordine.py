@@ -22,6 +22,7 @@ Relazioni:
 
 # Import dell'istanza database
 from app.extensions import db
+from app.utils.serialization import columns_dict
 
 
 class Ordine(db.Model):
@@ -51,27 +52,58 @@ class Ordine(db.Model):
     # backref='ordine' permette di accedere all'ordine da un oggetto Contiene
     prodotti = db.relationship('Contiene', backref='ordine', lazy=True)
 
-    def to_dict(self):
+    # Campi JSON -> colonne del modello (parametro ?fields= delle route);
+    # 'stato' è derivato dalla missione collegata
+    CAMPI = {
+        'id': 'ID',
+        'tipo': 'Tipo',
+        # Decimal e DateTime serializzati dal provider JSON (numero e ISO8601)
+        'peso_totale': 'PesoTotale',
+        'data_ordine': 'Orario',
+        'indirizzo': 'IndirizzoDestinazione',
+        'missione_id': 'ID_Missione',
+        'utente_id': 'ID_Utente'
+    }
+    DERIVATI = ('stato',)
+
+    def to_dict(self, fields=None):
         """
         Converte il modello in dizionario per JSON response.
         
         Include anche lo stato della missione associata se presente.
         Lo stato è derivato dalla missione collegata, altrimenti 'in_attesa'.
         
+        Args:
+            fields (tuple): Campi da includere (default: tutti)
+        
         Returns:
             dict: Rappresentazione JSON-serializzabile dell'ordine con stato missione
         """
-        return {
-            'id': self.ID,
-            'tipo': self.Tipo,
-            'peso_totale': float(self.PesoTotale) if self.PesoTotale else None,  # Decimal -> float
-            'data_ordine': self.Orario.isoformat() if self.Orario else None,     # DateTime -> ISO8601
-            'indirizzo': self.IndirizzoDestinazione,
-            'missione_id': self.ID_Missione,
-            'utente_id': self.ID_Utente,
+        stato = None
+        if fields is None or 'stato' in fields:
             # Accede alla relazione 'missione' (backref da Missione) per ottenere lo stato
-            'stato': self.missione.Stato if self.missione else 'in_attesa'
-        }
+            stato = self.missione.Stato if self.missione else None
+        return _ordine_dict(self, stato, fields)
+
+    @staticmethod
+    def dict_from_row(row, fields=None):
+        """
+        Serializza una riga di query senza istanziare oggetti ORM.
+        
+        Usato dalle liste costruite con una sola query che seleziona le
+        colonne di Ordine più lo stato della missione in LEFT JOIN
+        (etichettato 'StatoMissione'): nessuna query aggiuntiva per riga.
+        
+        Args:
+            row: Riga con attributi omonimi alle colonne di Ordine e StatoMissione
+                 (solo quelle dei campi richiesti se fields è indicato)
+            fields (tuple): Campi da includere (default: tutti)
+            
+        Returns:
+            dict: Stesso formato di to_dict()
+        """
+        stato = row.StatoMissione if fields is None or 'stato' in fields else None
+        return _ordine_dict(row, stato, fields)
 
     def __repr__(self):
         """
@@ -81,3 +113,12 @@ class Ordine(db.Model):
             str: Stringa identificativa dell'ordine
         """
         return f'<Ordine {self.ID} - {self.Tipo}>'
+
+
+def _ordine_dict(ordine, stato_missione, fields=None):
+    """Formato JSON comune a istanze Ordine e righe di query."""
+    result = columns_dict(ordine, Ordine.CAMPI, fields)
+    if fields is None or 'stato' in fields:
+        # Stato della missione collegata, 'in_attesa' se non ancora assegnata
+        result['stato'] = stato_missione if stato_missione else 'in_attesa'
+    return result
@@ -17,6 +17,7 @@ Relazioni:
 
 # Import dell'istanza database
 from app.extensions import db
+from app.utils.serialization import columns_dict
 
 
 class Pilota(db.Model):
@@ -41,20 +42,26 @@ class Pilota(db.Model):
     # Permette di accedere al pilota di una missione tramite missione.pilota
     missioni = db.relationship('Missione', backref='pilota', lazy=True)
 
-    def to_dict(self):
+    # Campi JSON -> attributi del modello (parametro ?fields= delle route)
+    CAMPI = {
+        'id': 'ID',
+        'nome': 'Nome',
+        'cognome': 'Cognome',
+        'turno': 'Turno',
+        'brevetto': 'Brevetto'
+    }
+
+    def to_dict(self, fields=None):
         """
         Converte il modello in dizionario per JSON response.
         
+        Args:
+            fields (tuple): Campi da includere (default: tutti)
+        
         Returns:
             dict: Rappresentazione JSON-serializzabile del pilota
         """
-        return {
-            'id': self.ID,
-            'nome': self.Nome,
-            'cognome': self.Cognome,
-            'turno': self.Turno,
-            'brevetto': self.Brevetto
-        }
+        return columns_dict(self, self.CAMPI, fields)
 
     def __repr__(self):
         """
@@ -17,6 +17,7 @@ Relazioni:
 
 # Import dell'istanza database
 from app.extensions import db
+from app.utils.serialization import columns_dict
 
 
 class Prodotto(db.Model):
@@ -40,21 +41,27 @@ class Prodotto(db.Model):
     # backref='prodotto' crea attributo virtuale 'prodotto' nel modello Contiene
     ordini = db.relationship('Contiene', backref='prodotto', lazy=True)
 
-    def to_dict(self):
+    # Campi JSON -> attributi del modello (parametro ?fields= delle route)
+    CAMPI = {
+        'id': 'ID',
+        'nome': 'nome',
+        'peso': 'peso',  # Decimal serializzato dal provider JSON
+        'categoria': 'categoria'
+    }
+
+    def to_dict(self, fields=None):
         """
         Converte il modello in dizionario per JSON response.
         
-        Converte Decimal in float per compatibilità JSON.
+        Il Decimal di peso è serializzato dal provider JSON (come numero).
+        
+        Args:
+            fields (tuple): Campi da includere (default: tutti)
         
         Returns:
             dict: Rappresentazione JSON-serializzabile del prodotto
         """
-        return {
-            'id': self.ID,
-            'nome': self.nome,
-            'peso': float(self.peso) if self.peso else None,  # Decimal -> float
-            'categoria': self.categoria
-        }
+        return columns_dict(self, self.CAMPI, fields)
 
     def __repr__(self):
         """
@@ -0,0 +1,72 @@
+"""
+Modello SQLAlchemy per la tabella StatisticaGiornaliera.
+
+Contiene i totali giornalieri (rollup) di missioni e ordini, mantenuti
+in modo incrementale a ogni inserimento, modifica o eliminazione
+(vedi app.services.stats_rollup). Le statistiche della dashboard
+leggono poche decine di righe aggregate invece di ricalcolare i
+totali dalle tabelle Missione e Ordine a ogni richiesta.
+
+Chiave primaria:
+- Dimensione: Tipo di raggruppamento
+  'missioni_stato' (Chiave = Stato), 'missioni_drone' (Chiave = IdDrone),
+  'missioni_pilota' (Chiave = IdPilota), 'ordini_tipo' (Chiave = Tipo)
+- Giorno: Data della missione o dell'ordine
+  (1000-01-01 per le righe senza data)
+- Chiave: Valore del raggruppamento come stringa ('' se NULL)
+
+Campi:
+- Conteggio: Numero di missioni o ordini
+- Completate: Missioni in stato 'completata' (0 per gli ordini)
+- SommaValori/NumeroValori: Somma e numero dei valori non NULL
+  (Valutazione per le missioni, PesoTotale per gli ordini)
+"""
+
+# Import dell'istanza database
+from app.extensions import db
+
+
+class StatisticaGiornaliera(db.Model):
+    """
+    Modello per i totali giornalieri di missioni e ordini.
+    """
+
+    # Nome della tabella nel database
+    __tablename__ = 'StatisticaGiornaliera'
+
+    # Chiave primaria composta: dimensione, giorno, valore del raggruppamento
+    Dimensione = db.Column(db.String(20), primary_key=True)
+    Giorno = db.Column(db.Date, primary_key=True)
+    Chiave = db.Column(db.String(50), primary_key=True)
+
+    # Totali del gruppo
+    Conteggio = db.Column(db.Integer, nullable=False, default=0)
+    Completate = db.Column(db.Integer, nullable=False, default=0)
+    SommaValori = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    NumeroValori = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        """
+        Converte il modello in dizionario per JSON response.
+
+        Returns:
+            dict: Rappresentazione JSON-serializzabile della riga di rollup
+        """
+        return {
+            'dimensione': self.Dimensione,
+            'giorno': self.Giorno,
+            'chiave': self.Chiave,
+            'conteggio': self.Conteggio,
+            'completate': self.Completate,
+            'somma_valori': self.SommaValori,
+            'numero_valori': self.NumeroValori
+        }
+
+    def __repr__(self):
+        """
+        Rappresentazione stringa per debug.
+
+        Returns:
+            str: Stringa identificativa della riga
+        """
+        return f'<StatisticaGiornaliera {self.Dimensione} {self.Giorno} {self.Chiave}>'
@@ -24,10 +24,23 @@ Relazioni:
 - missione: Relazione many-to-one con Missione (via backref)
 """
 
+# Import moduli standard per timestamp di default
+from datetime import datetime
 # Import dell'istanza database
 from app.extensions import db
 
 
+def timestamp_corrente():
+    """
+    Timestamp di default per una nuova traccia.
+    
+    Tronca i microsecondi: la colonna DATETIME li scarterebbe comunque
+    (arrotondando), e il valore restituito al client deve coincidere
+    con quello salvato per poter essere usato come cursore.
+    """
+    return datetime.now().replace(microsecond=0)
+
+
 class Traccia(db.Model):
     """
     Modello per il tracciamento GPS dei droni durante le missioni.
@@ -44,7 +57,9 @@ class Traccia(db.Model):
     # Questo permette a un drone di avere più tracce per missione in momenti diversi
     ID_Drone = db.Column(db.Integer, db.ForeignKey('Drone.ID'), primary_key=True)
     ID_Missione = db.Column(db.Integer, db.ForeignKey('Missione.ID'), primary_key=True)
-    TIMESTAMP = db.Column(db.DateTime, primary_key=True)  # Momento della rilevazione
+    # Momento della rilevazione: se non fornito viene valorizzato all'inserimento
+    # (fa parte della PK e fa da cursore per il polling incrementale)
+    TIMESTAMP = db.Column(db.DateTime, primary_key=True, default=timestamp_corrente)
     
     # Coordinate GPS
     # Numeric(10,8) per precisione: latitudine ±90°, 8 decimali (~1mm precisione)
@@ -0,0 +1,87 @@
+"""
+Modello SQLAlchemy per la tabella TracciaArchivio.
+
+Contiene il percorso GPS di una missione completata compresso in un
+unico blob colonnare. Le tracce di una missione completata non cambiano
+più: invece di rileggere e riserializzare migliaia di righe Traccia a
+ogni consultazione dello storico, il percorso viene letto con una
+singola query per chiave primaria e decompresso in memoria.
+
+Il formato del blob è gestito da app.services.track_archive
+(colonne timestamp, drone, latitudine, longitudine delta-codificate
+come interi e compresse con zlib).
+
+Chiave primaria:
+- ID_Missione: FK verso Missione (un archivio per missione)
+
+Campi:
+- NumeroPunti: Numero di punti GPS contenuti nel blob
+- TimestampInizio/TimestampFine: Primo e ultimo istante del percorso
+- Dati: Blob compresso con il percorso completo
+- CreatoIl: Momento dell'archiviazione
+
+Relazioni:
+- missione: Relazione one-to-one con Missione (via backref)
+"""
+
+# Import dell'istanza database
+from app.extensions import db
+# Import tipo MEDIUMBLOB: i percorsi lunghi superano i 64 KB di BLOB
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+
+
+class TracciaArchivio(db.Model):
+    """
+    Modello per l'archivio compresso dei percorsi delle missioni completate.
+    """
+
+    # Nome della tabella nel database
+    __tablename__ = 'TracciaArchivio'
+
+    # Una sola riga di archivio per missione
+    ID_Missione = db.Column(db.Integer, db.ForeignKey('Missione.ID'), primary_key=True)
+
+    # Metadati del percorso (consultabili senza decomprimere il blob)
+    NumeroPunti = db.Column(db.Integer)             # Punti GPS archiviati
+    TimestampInizio = db.Column(db.DateTime)        # Primo punto del percorso
+    TimestampFine = db.Column(db.DateTime)          # Ultimo punto del percorso
+
+    # Percorso compresso (LargeBinary generico, MEDIUMBLOB su MySQL)
+    Dati = db.Column(db.LargeBinary().with_variant(MEDIUMBLOB(), 'mysql'))
+
+    CreatoIl = db.Column(db.DateTime)               # Momento dell'archiviazione
+
+    # Relazione con la missione archiviata
+    # passive_deletes: eliminando una missione l'archivio non viene caricato
+    # (lo elimina la route, e la tabella può mancare senza migrazione 0001)
+    missione = db.relationship(
+        'Missione', backref=db.backref('archivio_tracce', uselist=False, passive_deletes=True)
+    )
+
+    def to_dict(self):
+        """
+        Converte i metadati dell'archivio in dizionario per JSON response.
+
+        Il blob non viene incluso: i punti si ottengono tramite
+        app.services.track_archive.load_archived_points().
+
+        Returns:
+            dict: Rappresentazione JSON-serializzabile dell'archivio
+        """
+        return {
+            'missione_id': self.ID_Missione,
+            'punti': self.NumeroPunti,
+            'timestamp_inizio': self.TimestampInizio.isoformat() if self.TimestampInizio else None,
+            'timestamp_fine': self.TimestampFine.isoformat() if self.TimestampFine else None,
+            'dimensione_byte': len(self.Dati) if self.Dati else 0,
+            'creato_il': self.CreatoIl.isoformat() if self.CreatoIl else None
+        }
+
+    def __repr__(self):
+        """
+        Rappresentazione stringa per debug.
+
+        Returns:
+            str: Stringa identificativa dell'archivio
+        """
+        return f'<TracciaArchivio Missione:{self.ID_Missione} Punti:{self.NumeroPunti}>'
@@ -25,6 +25,10 @@ from app.extensions import db
 from app.models import Drone, Missione
 # Import decoratori autorizzazione
 from app.utils.decorators import login_required, admin_required
+from app.utils.serialization import (
+    eager_options, fields_expand, load_only_options, parse_expand, parse_fields
+)
+from app.utils.pagination import keyset_page
 
 # Crea blueprint per le route droni
 # Il nome 'droni' identifica il blueprint nell'applicazione
@@ -42,23 +46,34 @@ def get_droni():
     
     Autorizzazione: Richiede autenticazione (qualsiasi utente).
     
+    Query params (paginazione keyset opzionale, ordine per ID):
+        limit (int): Droni per pagina
+        after (str): Cursore 'next' della pagina precedente
+        total (bool): Includi il totale (conteggio in cache)
+        fields (str): Campi da includere, es: id,batteria (default: tutti)
+    
     Returns:
         JSON: {
             'items': Array di oggetti drone,
             'total': Numero totale droni
         }
+        Con limit/after: {'items', 'limit', 'next'[, 'total']}
+        400: Se i parametri di paginazione o i campi non sono validi
     """
-    # Query tutti i droni dal database
-    droni = Drone.query.all()
-    
-    # Serializza ogni drone usando il metodo to_dict()
-    items = [d.to_dict() for d in droni]
+    try:
+        fields = parse_fields(request.args, Drone.CAMPI)
+        query = Drone.query.options(*load_only_options(Drone, fields))
+        
+        # Serializza ogni drone usando il metodo to_dict()
+        result = keyset_page(
+            query, 'droni', [(Drone.ID, False)],
+            request.args, lambda d: d.to_dict(fields=fields)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Ritorna response JSON con lista e conteggio
-    return jsonify({
-        'items': items,
-        'total': len(items)
-    })
+    return jsonify(result)
 
 
 @droni_bp.route('/<int:id>', methods=['GET'])
@@ -248,24 +263,33 @@ def get_disponibili():
     
     Autorizzazione: Solo admin.
     
+    Query params:
+        fields (str): Campi da includere per drone (default: tutti)
+    
     Returns:
         JSON: {
             'droni': Array droni disponibili
         }
+        400: Se fields contiene campi non ammessi
     """
+    try:
+        fields = parse_fields(request.args, Drone.CAMPI)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Subquery per trovare ID droni occupati in missioni attive
     droni_occupati = db.session.query(Missione.IdDrone).filter(
         Missione.Stato.in_(['programmata', 'in_corso'])
     ).subquery()
     
     # Query droni escludendo quelli occupati e con batteria bassa
-    droni = Drone.query.filter(
+    droni = Drone.query.options(*load_only_options(Drone, fields)).filter(
         ~Drone.ID.in_(droni_occupati),  # NOT IN droni occupati
         Drone.Batteria >= 20             # Batteria minima 20%
     ).all()
     
     return jsonify({
-        'droni': [d.to_dict() for d in droni]
+        'droni': [d.to_dict(fields=fields) for d in droni]
     })
 
 
@@ -329,6 +353,11 @@ def get_drone_missioni(id):
     Args:
         id (int): ID del drone
         
+    Query params:
+        expand (str): Oggetti annidati per missione, es: drone,pilota
+                      (default: entrambi; vuoto per nessuno)
+        fields (str): Campi da includere per missione (default: tutti)
+        
     Autorizzazione: Solo admin.
     
     Returns:
@@ -336,17 +365,29 @@ def get_drone_missioni(id):
             'drone': Dati drone,
             'missioni': Array missioni ordinate per data desc
         }
+        400: Se expand o fields contengono valori non ammessi
         404: Se drone non trovato
     """
     # Recupera drone
     drone = Drone.query.get_or_404(id)
     
+    try:
+        expand = parse_expand(request.args, Missione.RELAZIONI)
+        fields = parse_fields(request.args, (*Missione.CAMPI, *Missione.RELAZIONI))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    expand = fields_expand(expand, fields)
+    
     # Query missioni del drone ordinate per data decrescente (più recenti prima)
-    missioni = Missione.query.filter_by(IdDrone=id).order_by(
+    # con precaricamento in blocco delle relazioni richieste
+    missioni = Missione.query.options(
+        *eager_options(Missione, expand),
+        *load_only_options(Missione, fields)
+    ).filter_by(IdDrone=id).order_by(
         Missione.DataMissione.desc()
     ).all()
     
     return jsonify({
         'drone': drone.to_dict(),
-        'missioni': [m.to_dict() for m in missioni]
+        'missioni': [m.to_dict(expand=expand, fields=fields) for m in missioni]
     })
@@ -14,6 +14,7 @@ Funzionalità fornite:
 - Gestione valutazioni post-consegna (clienti)
 - Visualizzazione e aggiunta tracce GPS
 - Storico completo percorso missione
+- Archiviazione compressa del percorso delle missioni completate
 
 Stati missione: programmata, in_corso, completata, annullata
 
@@ -23,24 +24,78 @@ Autorizzazioni:
 - Aggiornamento stato: Piloti e admin
 - Valutazione: Clienti (solo missioni completate)
 - Tracce GPS: Piloti per inserimento
+- Archiviazione tracce: Solo admin
 
 Tutti gli endpoint sono sotto il prefix '/api/missioni'.
 """
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, current_app, request, jsonify, session
 from app.extensions import db
-from app.models import Missione, Drone, Pilota, Traccia
+from app.models import Missione, Drone, Pilota, Traccia, TracciaArchivio
 from app.utils.decorators import login_required, admin_required, pilota_required
+from app.utils.conditional import conditional
+from app.utils.serialization import (
+    eager_options, fields_expand, load_only_options, parse_expand, parse_fields
+)
+from app.utils.pagination import keyset_page
+from app.utils.streaming import parse_stream_arg, stream_list
+from app.services.position_cache import position_cache
+from app.services.tracking_service import (
+    format_percorso, get_track_points, mission_version, parse_format_arg,
+    parse_simplify_args, percorso_punti, publish_stato_missione,
+    simplify_punti, track_version
+)
+from app.services.track_ingest import registra_traccia, validate_traccia
+from app.services.track_archive import archive_mission, archivio_disponibile
 
 missioni_bp = Blueprint('missioni', __name__)
 
 
+def _archivia_se_completata(missione):
+    """
+    Archivia il percorso di una missione appena completata.
+    
+    Eseguito dopo il commit del cambio di stato: un errore
+    dell'archiviazione non annulla la transizione, le tracce restano
+    nella tabella Traccia e la missione potrà essere archiviata in seguito.
+    """
+    if missione.Stato != 'completata' or not current_app.config.get('TRACCE_ARCHIVIO_AUTOMATICO'):
+        return
+    if not archivio_disponibile():
+        return
+    try:
+        archive_mission(missione.ID, prune=current_app.config.get('TRACCE_ARCHIVIO_PRUNE', False))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Archiviazione tracce fallita per la missione %s', missione.ID)
+
+
 @missioni_bp.route('', methods=['GET'])
 @login_required
 def get_missioni():
-    """Lista missioni"""
+    """
+    Lista missioni.
+    
+    Supporta ?expand=drone,pilota per scegliere gli oggetti annidati
+    (default: entrambi, vuoto per nessuno), precaricati in blocco.
+    
+    Paginazione keyset opzionale (ordine per data, ora, ID discendenti):
+    ?limit=, ?after= e ?total=true per il totale. Con ?stream=json o
+    ?stream=ndjson la lista completa viene inviata in streaming.
+    
+    Con ?fields=id,stato,drone vengono caricate e serializzate solo le
+    colonne (e le relazioni) richieste.
+    """
     stato = request.args.get('stato')
     data = request.args.get('data')
     
+    try:
+        expand = parse_expand(request.args, Missione.RELAZIONI)
+        fields = parse_fields(request.args, (*Missione.CAMPI, *Missione.RELAZIONI))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    expand = fields_expand(expand, fields)
+    
     query = Missione.query
     
     if stato:
@@ -48,30 +103,61 @@ def get_missioni():
     if data:
         query = query.filter_by(DataMissione=data)
     
-    missioni = query.order_by(Missione.DataMissione.desc(), Missione.Ora.desc()).all()
+    ordinamento = [(Missione.DataMissione, True), (Missione.Ora, True), (Missione.ID, True)]
+    query = query.options(
+        *eager_options(Missione, expand),
+        *load_only_options(Missione, fields, extra=[c for c, _ in ordinamento])
+    )
     
-    items = [m.to_dict() for m in missioni]
-    return jsonify({
-        'items': items,
-        'total': len(items)
-    })
+    def serializza(m):
+        return m.to_dict(expand=expand, fields=fields)
+    
+    try:
+        # Export completo in streaming (?stream=json|ndjson)
+        formato = parse_stream_arg(request.args)
+        if formato:
+            return stream_list(query, ordinamento, serializza, formato)
+        
+        result = keyset_page(
+            query, 'missioni', ordinamento, request.args, serializza,
+            chiave_totale=(stato, data)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result)
 
 
 @missioni_bp.route('/<int:id>', methods=['GET'])
 @login_required
+@conditional(lambda id: mission_version(id))
 def get_missione(id):
-    """Dettaglio missione"""
+    """
+    Dettaglio missione con percorso GPS.
+    
+    Supporta ?tolerance=<metri> e ?max_points=<N> per semplificare
+    il percorso lato server, ?format=polyline per l'output compatto e
+    ?expand=drone,pilota per gli oggetti annidati (default: entrambi).
+    
+    GET condizionale: risponde 304 se l'ETag (If-None-Match) è ancora
+    valido, senza leggere né semplificare il percorso.
+    """
     missione = Missione.query.get_or_404(id)
     
-    result = missione.to_dict()
+    try:
+        tolerance, max_points = parse_simplify_args(request.args)
+        formato = parse_format_arg(request.args)
+        expand = parse_expand(request.args, Missione.RELAZIONI)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Aggiungi tracce
-    tracce = Traccia.query.filter_by(ID_Missione=id).order_by(Traccia.TIMESTAMP.asc()).all()
-    result['tracce'] = [{
-        'lat': float(t.Latitudine),
-        'lng': float(t.Longitudine),
-        'timestamp': t.TIMESTAMP.isoformat() if t.TIMESTAMP else None
-    } for t in tracce]
+    result = missione.to_dict(expand=expand)
+    
+    # Aggiungi tracce (dall'archivio compresso se la missione è archiviata)
+    punti = get_track_points(id, stato=missione.Stato)
+    result['tracce'] = format_percorso(
+        simplify_punti(percorso_punti(punti), tolerance, max_points), formato
+    )
     
     return jsonify(result)
 
@@ -129,11 +215,17 @@ def update_missione(id):
         missione.IdDrone = data['id_drone']
     if data.get('id_pilota'):
         missione.IdPilota = data['id_pilota']
+    stato_modificato = bool(data.get('stato')) and data['stato'] != missione.Stato
     if data.get('stato'):
         missione.Stato = data['stato']
     
     db.session.commit()
     
+    # Notifica gli stream live del nuovo stato
+    if stato_modificato:
+        publish_stato_missione(missione)
+        _archivia_se_completata(missione)
+    
     return jsonify({
         'success': True,
         'missione': missione.to_dict()
@@ -146,12 +238,17 @@ def delete_missione(id):
     """Elimina missione (solo admin)"""
     missione = Missione.query.get_or_404(id)
     
-    # Elimina tracce associate
+    # Elimina tracce associate (righe e archivio compresso)
     Traccia.query.filter_by(ID_Missione=id).delete()
+    if archivio_disponibile():
+        TracciaArchivio.query.filter_by(ID_Missione=id).delete()
     
     db.session.delete(missione)
     db.session.commit()
     
+    # La missione non esiste più: rimuovi l'ultima posizione in cache
+    position_cache.evict(id)
+    
     return jsonify({
         'success': True,
         'message': 'Missione eliminata'
@@ -174,6 +271,10 @@ def update_stato(id):
     missione.Stato = nuovo_stato
     db.session.commit()
     
+    # Notifica gli stream live del nuovo stato
+    publish_stato_missione(missione)
+    _archivia_se_completata(missione)
+    
     return jsonify({
         'success': True,
         'missione': missione.to_dict()
@@ -209,43 +310,86 @@ def add_valutazione(id):
 
 @missioni_bp.route('/<int:id>/tracce', methods=['GET'])
 @login_required
+@conditional(lambda id: track_version(id))
 def get_tracce(id):
-    """Ottieni tutte le tracce GPS di una missione"""
+    """
+    Ottieni le tracce GPS di una missione.
+    
+    Supporta ?tolerance=<metri> e ?max_points=<N> per semplificare
+    il percorso lato server e ?format=polyline per l'output compatto.
+    GET condizionale con ETag (304 se il percorso non è cambiato).
+    """
     missione = Missione.query.get_or_404(id)
     
-    tracce = Traccia.query.filter_by(ID_Missione=id).order_by(Traccia.TIMESTAMP.asc()).all()
+    try:
+        tolerance, max_points = parse_simplify_args(request.args)
+        formato = parse_format_arg(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    punti = get_track_points(id, stato=missione.Stato)
     
     return jsonify({
         'missione_id': id,
-        'tracce': [{
-            'lat': float(t.Latitudine),
-            'lng': float(t.Longitudine),
-            'timestamp': t.TIMESTAMP.isoformat() if t.TIMESTAMP else None
-        } for t in tracce]
+        'tracce': format_percorso(
+            simplify_punti(percorso_punti(punti), tolerance, max_points), formato
+        )
     })
 
 
 @missioni_bp.route('/<int:id>/tracce', methods=['POST'])
 @pilota_required
 def add_traccia(id):
-    """Aggiungi traccia GPS (pilota o sistema)"""
+    """Aggiungi traccia GPS (pilota o sistema), con 'timestamp' opzionale"""
     missione = Missione.query.get_or_404(id)
     data = request.get_json()
     
     if not missione.IdDrone:
         return jsonify({'error': 'Missione senza drone assegnato'}), 400
     
-    traccia = Traccia(
-        ID_Drone=missione.IdDrone,
-        ID_Missione=id,
-        Latitudine=data.get('lat'),
-        Longitudine=data.get('lng')
-    )
+    riga, errore = validate_traccia({
+        **(data or {}), 'missione_id': id, 'drone_id': missione.IdDrone
+    })
+    if errore:
+        return jsonify({'error': errore}), 400
+    
+    punto, esito = registra_traccia(riga, missione.Stato)
+    
+    if esito == 'duplicata':
+        return jsonify({'error': 'Punto già presente (stesso drone, missione e timestamp)'}), 409
+    if esito == 'in_coda':
+        return jsonify({'success': True, 'in_coda': True, 'traccia': punto}), 202
+    return jsonify({'success': True, 'traccia': punto}), 201
+
+
+@missioni_bp.route('/<int:id>/archivio', methods=['POST'])
+@admin_required
+def archivia_tracce(id):
+    """
+    Archivia il percorso di una missione completata (solo admin).
+    
+    Comprime le tracce in un unico blob letto dalle viste storiche.
+    Con ?prune=true elimina poi le righe Traccia della missione.
+    Può essere ripetuto: l'archivio viene ricostruito includendo
+    eventuali punti arrivati dopo la precedente archiviazione.
+    """
+    missione = Missione.query.get_or_404(id)
+    prune = request.args.get('prune', 'false').lower() in ('true', '1', 'yes')
+    
+    if missione.Stato != 'completata':
+        return jsonify({'error': 'Solo le missioni completate possono essere archiviate'}), 400
+    
+    try:
+        archivio = archive_mission(id, prune=prune)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if archivio is None:
+        return jsonify({'error': 'Nessuna traccia da archiviare'}), 404
     
-    db.session.add(traccia)
     db.session.commit()
     
     return jsonify({
         'success': True,
-        'traccia': traccia.to_dict()
-    }), 201
+        'archivio': archivio.to_dict(),
+        'prune': prune
+    })
@@ -19,10 +19,20 @@ Funzionalità chiave:
 
 Tutti gli endpoint sono sotto il prefix '/api/ordini'.
 """
-from flask import Blueprint, request, jsonify, session
+from datetime import timedelta
+from flask import Blueprint, current_app, request, jsonify, session
+from sqlalchemy import insert
 from app.extensions import db
-from app.models import Ordine, Missione, Contiene, Prodotto, Traccia
+from app.models import Ordine, Missione, Contiene, Prodotto
 from app.utils.decorators import login_required, admin_required
+from app.utils.helpers import parse_datetime
+from app.utils.pagination import keyset_page
+from app.utils.serialization import parse_fields
+from app.utils.streaming import parse_stream_arg, stream_list
+from app.services.tracking_service import (
+    format_percorso, get_track_points, parse_format_arg, parse_simplify_args,
+    percorso_punti, simplify_punti
+)
 
 ordini_bp = Blueprint('ordini', __name__)
 
@@ -30,20 +40,67 @@ ordini_bp = Blueprint('ordini', __name__)
 @ordini_bp.route('', methods=['GET'])
 @login_required
 def get_ordini():
-    """Lista ordini - filtrata per utente se cliente"""
+    """
+    Lista ordini - filtrata per utente se cliente.
+    
+    Una sola query: colonne dell'ordine più stato della missione in
+    LEFT JOIN, serializzate direttamente dalle righe (nessun oggetto
+    ORM e nessun lazy load di Ordine.missione per riga).
+    
+    Paginazione keyset opzionale (ordine per orario e ID discendenti):
+    ?limit=, ?after= e ?total=true per il totale. Con ?stream=json o
+    ?stream=ndjson la lista completa viene inviata in streaming.
+    
+    Con ?fields=id,stato la query seleziona solo le colonne richieste
+    (più quelle di ordinamento) e il JOIN con Missione solo se serve 'stato'.
+    """
     ruolo = session.get('ruolo')
     user_id = session.get('user_id')
     
-    if ruolo == 'cliente':
-        ordini = Ordine.query.filter_by(ID_Utente=user_id).order_by(Ordine.Orario.desc()).all()
+    try:
+        fields = parse_fields(request.args, (*Ordine.CAMPI, *Ordine.DERIVATI))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    ordinamento = [(Ordine.Orario, True), (Ordine.ID, True)]
+    
+    if fields is None:
+        colonne = list(Ordine.__table__.columns)
     else:
-        ordini = Ordine.query.order_by(Ordine.Orario.desc()).all()
+        # Colonne richieste più quelle lette dal cursore keyset
+        nomi = [Ordine.CAMPI[c] for c in fields if c in Ordine.CAMPI]
+        nomi += [c.key for c, _ in ordinamento]
+        colonne = [getattr(Ordine, n) for n in dict.fromkeys(nomi)]
     
-    items = [o.to_dict() for o in ordini]
-    return jsonify({
-        'items': items,
-        'total': len(items)
-    })
+    query = db.session.query(*colonne)
+    if fields is None or 'stato' in fields:
+        query = query.add_columns(
+            Missione.Stato.label('StatoMissione')
+        ).outerjoin(Missione, Missione.ID == Ordine.ID_Missione)
+    
+    # Il cliente vede solo i propri ordini (totale in cache per utente)
+    chiave_totale = ()
+    if ruolo == 'cliente':
+        query = query.filter(Ordine.ID_Utente == user_id)
+        chiave_totale = (user_id,)
+    
+    def serializza(riga):
+        return Ordine.dict_from_row(riga, fields)
+    
+    try:
+        # Export completo in streaming (?stream=json|ndjson)
+        formato = parse_stream_arg(request.args)
+        if formato:
+            return stream_list(query, ordinamento, serializza, formato)
+        
+        result = keyset_page(
+            query, 'ordini', ordinamento,
+            request.args, serializza, chiave_totale=chiave_totale
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result)
 
 
 @ordini_bp.route('/<int:id>', methods=['GET'])
@@ -56,16 +113,17 @@ def get_ordine(id):
     if session.get('ruolo') == 'cliente' and ordine.ID_Utente != session.get('user_id'):
         return jsonify({'error': 'Accesso negato'}), 403
     
-    # Recupera prodotti dell'ordine
-    contenuti = Contiene.query.filter_by(ID_Ordine=id).all()
-    prodotti = []
-    for c in contenuti:
-        prodotto = Prodotto.query.get(c.ID_Prodotto)
-        if prodotto:
-            prodotti.append({
-                **prodotto.to_dict(),
-                'quantita': c.Quantità
-            })
+    # Recupera prodotti dell'ordine con le quantità (una sola query JOIN)
+    righe = db.session.query(Prodotto, Contiene.Quantità).join(
+        Contiene, Contiene.ID_Prodotto == Prodotto.ID
+    ).filter(
+        Contiene.ID_Ordine == id
+    ).order_by(Contiene.ID_Prodotto).all()
+    
+    prodotti = [{
+        **prodotto.to_dict(),
+        'quantita': quantita
+    } for prodotto, quantita in righe]
     
     # Recupera missione se esiste
     missione = None
@@ -89,13 +147,33 @@ def create_ordine():
     if not data:
         return jsonify({'error': 'Dati mancanti'}), 400
     
+    # Righe dell'ordine: quantità sommate per prodotto (la PK di Contiene
+    # è ordine + prodotto, un prodotto ripetuto non può avere due righe)
+    quantita = {}
+    try:
+        for p in data.get('prodotti', []):
+            prodotto_id = int(p.get('id'))
+            quantita[prodotto_id] = quantita.get(prodotto_id, 0) + int(p.get('quantita', 1))
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Prodotti non validi: attesi id e quantita numerici'}), 400
+    
+    if any(q <= 0 for q in quantita.values()):
+        return jsonify({'error': 'La quantità deve essere positiva'}), 400
+    
+    # Tutti i prodotti con una sola query IN
+    prodotti = {}
+    if quantita:
+        prodotti = {
+            pid: peso for pid, peso in db.session.query(Prodotto.ID, Prodotto.peso)
+            .filter(Prodotto.ID.in_(quantita)).all()
+        }
+    
+    mancanti = sorted(set(quantita) - set(prodotti))
+    if mancanti:
+        return jsonify({'error': f'Prodotti inesistenti: {mancanti}'}), 400
+    
     # Calcola peso totale dai prodotti
-    prodotti = data.get('prodotti', [])
-    peso_totale = 0
-    for p in prodotti:
-        prodotto = Prodotto.query.get(p.get('id'))
-        if prodotto:
-            peso_totale += float(prodotto.peso) * p.get('quantita', 1)
+    peso_totale = sum(float(prodotti[pid] or 0) * q for pid, q in quantita.items())
     
     ordine = Ordine(
         Tipo=data.get('tipo', 'Standard'),
@@ -107,14 +185,13 @@ def create_ordine():
     db.session.add(ordine)
     db.session.flush()  # Per ottenere ID
     
-    # Aggiungi prodotti
-    for p in prodotti:
-        contenuto = Contiene(
-            ID_Prodotto=p.get('id'),
-            ID_Ordine=ordine.ID,
-            Quantità=p.get('quantita', 1)
-        )
-        db.session.add(contenuto)
+    # Aggiungi prodotti con un'unica INSERT multi-riga
+    if quantita:
+        db.session.execute(insert(Contiene.__table__), [{
+            'ID_Prodotto': pid,
+            'ID_Ordine': ordine.ID,
+            'Quantità': q
+        } for pid, q in quantita.items()])
     
     db.session.commit()
     
@@ -167,13 +244,41 @@ def delete_ordine(id):
 @ordini_bp.route('/<int:id>/tracking', methods=['GET'])
 @login_required
 def get_tracking(id):
-    """Tracking live ordine"""
+    """
+    Tracking live ordine.
+    
+    Senza parametri ritorna lo stato completo (missione, percorso intero).
+    Con ?since=<timestamp ISO8601> lavora in modalità incrementale:
+    ritorna i punti dal cursore in poi, lo stato corrente e il cursore
+    da usare nella richiesta successiva ('cursor'). Vengono riletti anche
+    i punti degli ultimi TRACKING_CURSORE_FINESTRA secondi prima del
+    cursore: i punti salvati in ritardo (buffer write-behind di altri
+    worker, timestamp inviati dal client) arrivano comunque al client,
+    che scarta quelli già ricevuti (stesso timestamp e posizione).
+    
+    Con ?tolerance=<metri> e/o ?max_points=<N> il percorso viene
+    semplificato lato server (Douglas-Peucker); con ?format=polyline
+    viene restituito come Encoded Polyline compatta.
+    """
     ordine = Ordine.query.get_or_404(id)
     
     # Verifica accesso
     if session.get('ruolo') == 'cliente' and ordine.ID_Utente != session.get('user_id'):
         return jsonify({'error': 'Accesso negato'}), 403
     
+    # Cursore per polling incrementale (opzionale)
+    since_param = request.args.get('since')
+    since = parse_datetime(since_param)
+    if since_param and since is None:
+        return jsonify({'error': 'Parametro since non valido (atteso timestamp ISO8601)'}), 400
+    
+    # Semplificazione opzionale del percorso
+    try:
+        tolerance, max_points = parse_simplify_args(request.args)
+        formato = parse_format_arg(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     if not ordine.ID_Missione:
         return jsonify({
             'stato': 'richiesto',
@@ -188,30 +293,33 @@ def get_tracking(id):
             'messaggio': 'Missione non trovata'
         })
     
-    # Recupera tracce GPS
-    tracce = Traccia.query.filter_by(
-        ID_Missione=missione.ID
-    ).order_by(Traccia.TIMESTAMP.asc()).all()
-    
-    # Ultima posizione
-    ultima_posizione = None
-    if tracce:
-        ultima = tracce[-1]
-        ultima_posizione = {
-            'lat': float(ultima.Latitudine),
-            'lng': float(ultima.Longitudine),
-            'timestamp': ultima.TIMESTAMP.isoformat() if ultima.TIMESTAMP else None
-        }
+    # Recupera tracce GPS (dal cursore meno la finestra, se presente)
+    # (dall'archivio compresso se la missione è completata e archiviata)
+    dal = None
+    if since is not None:
+        dal = since - timedelta(seconds=current_app.config.get('TRACKING_CURSORE_FINESTRA', 30))
+    punti = get_track_points(missione.ID, since=dal, stato=missione.Stato)
     
-    return jsonify({
+    percorso = percorso_punti(punti)
+    
+    # Ultima posizione (None in modalità incrementale se non ci sono punti)
+    ultima_posizione = percorso[-1] if percorso else None
+    
+    # L'ultimo punto è sempre mantenuto dalla semplificazione
+    percorso = simplify_punti(percorso, tolerance, max_points)
+    
+    # Cursore successivo: timestamp più recente ricevuto, mai precedente
+    # a quello già in possesso del client (la finestra rilegge punti più vecchi)
+    cursor = since.isoformat() if since else None
+    if punti and punti[-1]['timestamp'] and (cursor is None or punti[-1]['timestamp'] > cursor):
+        cursor = punti[-1]['timestamp']
+    
+    result = {
         'stato': missione.Stato,
-        'missione': missione.to_dict(),
         'posizione_attuale': ultima_posizione,
-        'percorso': [{
-            'lat': float(t.Latitudine),
-            'lng': float(t.Longitudine),
-            'timestamp': t.TIMESTAMP.isoformat() if t.TIMESTAMP else None
-        } for t in tracce],
+        'percorso': format_percorso(percorso, formato),
+        'cursor': cursor,
+        'incrementale': since is not None,
         'pickup': {
             'lat': float(missione.LatPrelievo) if missione.LatPrelievo else None,
             'lng': float(missione.LongPrelievo) if missione.LongPrelievo else None
@@ -220,4 +328,11 @@ def get_tracking(id):
             'lat': float(missione.LatConsegna) if missione.LatConsegna else None,
             'lng': float(missione.LongConsegna) if missione.LongConsegna else None
         }
-    })
+    }
+    
+    # Dati completi della missione (drone, pilota) solo al primo caricamento:
+    # nei poll successivi il client li possiede già
+    if since is None:
+        result['missione'] = missione.to_dict()
+    
+    return jsonify(result)
@@ -23,6 +23,10 @@ from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models import Pilota, Missione
 from app.utils.decorators import login_required, admin_required
+from app.utils.serialization import (
+    eager_options, fields_expand, load_only_options, parse_expand, parse_fields
+)
+from app.utils.pagination import keyset_page
 
 piloti_bp = Blueprint('piloti', __name__)
 
@@ -30,7 +34,12 @@ piloti_bp = Blueprint('piloti', __name__)
 @piloti_bp.route('', methods=['GET'])
 @login_required
 def get_piloti():
-    """Lista tutti i piloti"""
+    """
+    Lista tutti i piloti.
+    
+    Paginazione keyset opzionale (ordine per ID): ?limit=, ?after=
+    e ?total=true per il totale. ?fields=id,nome per i soli campi indicati.
+    """
     turno = request.args.get('turno')
     
     query = Pilota.query
@@ -38,12 +47,16 @@ def get_piloti():
     if turno:
         query = query.filter_by(Turno=turno)
     
-    piloti = query.all()
-    items = [p.to_dict() for p in piloti]
-    return jsonify({
-        'items': items,
-        'total': len(items)
-    })
+    try:
+        fields = parse_fields(request.args, Pilota.CAMPI)
+        result = keyset_page(
+            query.options(*load_only_options(Pilota, fields)), 'piloti', [(Pilota.ID, False)],
+            request.args, lambda p: p.to_dict(fields=fields), chiave_totale=(turno,)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result)
 
 
 @piloti_bp.route('/<int:id>', methods=['GET'])
@@ -130,11 +143,18 @@ def delete_pilota(id):
 @piloti_bp.route('/turno/<turno>', methods=['GET'])
 @login_required
 def get_by_turno(turno):
-    """Lista piloti per turno specifico"""
-    piloti = Pilota.query.filter_by(Turno=turno).all()
+    """Lista piloti per turno specifico (?fields= per i soli campi indicati)"""
+    try:
+        fields = parse_fields(request.args, Pilota.CAMPI)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    piloti = Pilota.query.options(
+        *load_only_options(Pilota, fields)
+    ).filter_by(Turno=turno).all()
     return jsonify({
         'turno': turno,
-        'piloti': [p.to_dict() for p in piloti]
+        'piloti': [p.to_dict(fields=fields) for p in piloti]
     })
 
 
@@ -144,12 +164,19 @@ def get_disponibili():
     """Lista piloti disponibili (non in missione attiva)"""
     turno = request.args.get('turno')
     
+    try:
+        fields = parse_fields(request.args, Pilota.CAMPI)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Piloti non impegnati in missioni in corso
     piloti_occupati = db.session.query(Missione.IdPilota).filter(
         Missione.Stato.in_(['programmata', 'in_corso'])
     ).subquery()
     
-    query = Pilota.query.filter(~Pilota.ID.in_(piloti_occupati))
+    query = Pilota.query.options(
+        *load_only_options(Pilota, fields)
+    ).filter(~Pilota.ID.in_(piloti_occupati))
     
     if turno:
         query = query.filter_by(Turno=turno)
@@ -157,17 +184,34 @@ def get_disponibili():
     piloti = query.all()
     
     return jsonify({
-        'piloti': [p.to_dict() for p in piloti]
+        'piloti': [p.to_dict(fields=fields) for p in piloti]
     })
 
 
 @piloti_bp.route('/<int:id>/missioni', methods=['GET'])
 @admin_required
 def get_pilota_missioni(id):
-    """Storico missioni di un pilota"""
+    """
+    Storico missioni di un pilota.
+    
+    Supporta ?expand=drone,pilota per scegliere gli oggetti annidati
+    di ogni missione (default: entrambi), precaricati in blocco, e
+    ?fields= per i soli campi indicati di ogni missione.
+    """
     pilota = Pilota.query.get_or_404(id)
     
-    missioni = Missione.query.filter_by(IdPilota=id).order_by(
+    try:
+        expand = parse_expand(request.args, Missione.RELAZIONI)
+        fields = parse_fields(request.args, (*Missione.CAMPI, *Missione.RELAZIONI))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    expand = fields_expand(expand, fields)
+    
+    # Stato e Valutazione servono alle statistiche anche se non richiesti
+    missioni = Missione.query.options(
+        *eager_options(Missione, expand),
+        *load_only_options(Missione, fields, extra=[Missione.Stato, Missione.Valutazione])
+    ).filter_by(IdPilota=id).order_by(
         Missione.DataMissione.desc()
     ).all()
     
@@ -184,5 +228,5 @@ def get_pilota_missioni(id):
             'completate': completate,
             'media_valutazione': round(media_valutazione, 1) if media_valutazione else None
         },
-        'missioni': [m.to_dict() for m in missioni]
+        'missioni': [m.to_dict(expand=expand, fields=fields) for m in missioni]
     })
@@ -4,7 +4,7 @@ Blueprint per la gestione del catalogo prodotti.
 Questo modulo fornisce tutti gli endpoint API per la gestione dei prodotti
 disponibili per l'ordinazione. Include funzionalità per:
 - Lista prodotti con paginazione e filtri per categoria
-- Ricerca prodotti per nome (LIKE query)
+- Ricerca prodotti per nome (indice a trigrammi in memoria)
 - Dettaglio singolo prodotto
 - CRUD prodotti (solo admin)
 - Lista categorie disponibili
@@ -13,45 +13,72 @@ Caratteristiche:
 - Endpoint pubblici per consultazione catalogo (GET list/detail)
 - Endpoint protetti per gestione (POST/PUT/DELETE richiedono admin)
 - Supporto paginazione nativa per grandi cataloghi
-- Ricerca full-text per nome prodotto
+- Consultazione servita dal catalogo in memoria (app.services.product_catalog):
+  ricerca per sottostringa e fuzzy su indice a trigrammi, categorie precalcolate
+- GET condizionali (ETag, 304) sugli endpoint di consultazione del catalogo
 
 Tutti gli endpoint sono sotto il prefix '/api/prodotti'.
 """
-from flask import Blueprint, request, jsonify
+import math
+from flask import Blueprint, abort, request, jsonify
 from app.extensions import db
 from app.models import Prodotto
 from app.utils.decorators import login_required, admin_required
+from app.utils.serialization import parse_fields
+from app.utils.conditional import conditional
+from app.services.product_catalog import product_catalog
 
 prodotti_bp = Blueprint('prodotti', __name__)
 
 
+def versione_catalogo(**_):
+    """
+    Versione del catalogo per gli ETag: hash del contenuto dello snapshot.
+    
+    Cambia a ogni ricostruzione con dati diversi (anche dopo CATALOGO_TTL
+    per le scritture di altri worker) ed è uguale tra i processi.
+    """
+    snapshot = product_catalog.snapshot()
+    return ('catalogo', snapshot.hash), snapshot.modificato
+
+
 @prodotti_bp.route('', methods=['GET'])
+@conditional(versione_catalogo, privata=False)
 def get_prodotti():
-    """Lista prodotti (pubblica, paginata)"""
+    """Lista prodotti (pubblica, paginata, ?fields= per i soli campi indicati)"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     categoria = request.args.get('categoria')
     
-    query = Prodotto.query
+    try:
+        fields = parse_fields(request.args, Prodotto.CAMPI)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    if categoria:
-        query = query.filter_by(categoria=categoria)
+    # Servita dal catalogo in memoria (stessa paginazione di paginate())
+    catalogo = product_catalog.snapshot()
+    ids = catalogo.per_categoria.get(categoria, ()) if categoria else catalogo.ids
     
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    pagina = page if page and page > 0 else 1
+    per_pagina = per_page if per_page and per_page > 0 else 20
+    inizio = (pagina - 1) * per_pagina
     
     return jsonify({
-        'items': [p.to_dict() for p in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'items': catalogo.serializza(ids[inizio:inizio + per_pagina], fields),
+        'total': len(ids),
+        'pages': math.ceil(len(ids) / per_pagina),
         'page': page
     })
 
 
 @prodotti_bp.route('/<int:id>', methods=['GET'])
+@conditional(versione_catalogo, privata=False)
 def get_prodotto(id):
-    """Dettaglio singolo prodotto (pubblico)"""
-    prodotto = Prodotto.query.get_or_404(id)
-    return jsonify(prodotto.to_dict())
+    """Dettaglio singolo prodotto (pubblico, dal catalogo in memoria)"""
+    prodotto = product_catalog.snapshot().prodotti.get(id)
+    if prodotto is None:
+        abort(404)
+    return jsonify(prodotto)
 
 
 @prodotti_bp.route('', methods=['POST'])
@@ -116,37 +143,59 @@ def delete_prodotto(id):
 
 
 @prodotti_bp.route('/categoria/<categoria>', methods=['GET'])
+@conditional(versione_catalogo, privata=False)
 def get_by_categoria(categoria):
-    """Lista prodotti per categoria"""
-    prodotti = Prodotto.query.filter_by(categoria=categoria).all()
+    """Lista prodotti per categoria (?fields= per i soli campi indicati)"""
+    try:
+        fields = parse_fields(request.args, Prodotto.CAMPI)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    catalogo = product_catalog.snapshot()
     return jsonify({
         'categoria': categoria,
-        'prodotti': [p.to_dict() for p in prodotti]
+        'prodotti': catalogo.serializza(catalogo.per_categoria.get(categoria, ()), fields)
     })
 
 
 @prodotti_bp.route('/categorie', methods=['GET'])
+@conditional(versione_catalogo, privata=False)
 def get_categorie():
-    """Lista tutte le categorie disponibili"""
-    categorie = db.session.query(Prodotto.categoria).distinct().all()
+    """Lista tutte le categorie disponibili (precalcolata nel catalogo in memoria)"""
     return jsonify({
-        'categorie': [c[0] for c in categorie if c[0]]
+        'categorie': product_catalog.snapshot().categorie
     })
 
 
 @prodotti_bp.route('/search', methods=['GET'])
+@conditional(versione_catalogo, privata=False)
 def search_prodotti():
-    """Ricerca prodotti per nome"""
+    """
+    Ricerca prodotti per nome (sottostringa, senza distinzione di
+    maiuscole e accenti) sull'indice a trigrammi del catalogo in memoria.
+    
+    Query params:
+        q (str): Testo da cercare (min 2 caratteri)
+        categoria (str): Limita la ricerca a una categoria
+        fuzzy (bool): Aggiunge i nomi simili (errori di battitura)
+        fields (str): Campi da includere (default: tutti)
+    """
     q = request.args.get('q', '')
+    categoria = request.args.get('categoria') or None
+    fuzzy = request.args.get('fuzzy', 'false').lower() in ('true', '1', 'yes')
     
     if len(q) < 2:
         return jsonify({'error': 'Query troppo corta (min 2 caratteri)'}), 400
     
-    prodotti = Prodotto.query.filter(
-        Prodotto.nome.ilike(f'%{q}%')
-    ).limit(20).all()
+    try:
+        fields = parse_fields(request.args, Prodotto.CAMPI)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    catalogo = product_catalog.snapshot()
+    ids = catalogo.cerca(q, categoria=categoria, limit=20, fuzzy=fuzzy)
     
     return jsonify({
         'query': q,
-        'prodotti': [p.to_dict() for p in prodotti]
+        'prodotti': catalogo.serializza(ids, fields)
     })
@@ -25,7 +25,7 @@ Statistiche Piloti:
 
 Statistiche Valutazioni:
 - Distribuzione voti (1-10)
-- Media generale
+- Media, mediana e percentili, filtrabili per drone, pilota e date
 - Trend nel tempo
 
 Statistiche Ordini:
@@ -33,174 +33,357 @@ Statistiche Ordini:
 - Peso medio ordini
 - Volume temporale
 
+Serie Temporali:
+- Missioni, ordini o valutazioni per giorno, settimana o mese
+  in un intervallo di date qualsiasi
+
 Autorizzazioni: Tutti gli endpoint richiedono ruolo admin.
 
+I totali di missioni e ordini sono letti dai rollup giornalieri
+(tabella StatisticaGiornaliera, vedi app.services.stats_rollup): il
+costo delle query non dipende dal numero di missioni e ordini. Senza la
+migrazione 0003 gli stessi totali sono calcolati da Missione e Ordine.
+
 Tutti gli endpoint sono sotto il prefix '/api/stats'.
 """
-from flask import Blueprint, jsonify
-from sqlalchemy import func
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import String, and_, case, cast, func, select
 from app.extensions import db
-from app.models import Ordine, Missione, Drone, Pilota, Utente
+from app.models import Missione, Drone, Pilota, Utente
+from app.services.stats_rollup import (giorno_da_db, parse_timeseries_args, sorgente_rollup,
+                                       timeseries)
+from app.utils.cache import TTLCache
 from app.utils.decorators import admin_required
+from app.utils.helpers import parse_datetime
 
 statistiche_bp = Blueprint('statistiche', __name__)
 
+# Percentili delle valutazioni calcolati da /valutazioni
+PERCENTILI = (10, 25, 50, 75, 90)
 
-@statistiche_bp.route('/overview', methods=['GET'])
-@admin_required
-def get_overview():
-    """KPI principali per dashboard"""
-    totale_ordini = Ordine.query.count()
-    totale_missioni = Missione.query.count()
-    totale_droni = Drone.query.count()
-    totale_piloti = Pilota.query.count()
-    totale_clienti = Utente.query.filter_by(Ruolo='cliente').count()
-    
-    missioni_completate = Missione.query.filter_by(Stato='completata').count()
-    missioni_in_corso = Missione.query.filter_by(Stato='in_corso').count()
-    
-    # Media valutazioni
-    media_val = db.session.query(func.avg(Missione.Valutazione)).filter(
-        Missione.Valutazione.isnot(None)
-    ).scalar()
-    
-    # Droni disponibili (batteria > 20% e non in missione)
-    droni_occupati = db.session.query(Missione.IdDrone).filter(
-        Missione.Stato.in_(['programmata', 'in_corso'])
+# KPI della dashboard: calcolati al più una volta per TTL e condivisi
+# da tutti gli admin (le richieste concorrenti attendono un solo calcolo)
+overview_cache = TTLCache(ttl=10, max_size=1)
+
+
+def _media(somma, numero):
+    """Media da somma e numero dei valori di un rollup (None se nessun valore)."""
+    return func.sum(somma) / func.nullif(func.sum(numero), 0)
+
+
+def _calcola_overview():
+    """
+    Calcola i KPI della dashboard con una sola query.
+    
+    Le metriche di missioni e ordini sono un'aggregazione condizionale
+    sui rollup per stato e per tipo; i conteggi delle altre tabelle
+    sono subquery scalari della stessa SELECT.
+    
+    Returns:
+        dict: KPI nel formato della risposta di /overview
+    """
+    rollup = sorgente_rollup('missioni_stato', 'ordini_tipo')
+    per_stato = rollup.Dimensione == 'missioni_stato'
+    
+    def somma_se(colonna, *condizioni):
+        return func.sum(case((and_(*condizioni), colonna), else_=0))
+    
+    totali = db.session.query(
+        somma_se(rollup.Conteggio, rollup.Dimensione == 'ordini_tipo').label('ordini'),
+        somma_se(rollup.Conteggio, per_stato).label('totale'),
+        somma_se(rollup.Conteggio, per_stato, rollup.Chiave == 'completata').label('completate'),
+        somma_se(rollup.Conteggio, per_stato, rollup.Chiave == 'in_corso').label('in_corso'),
+        # Media delle sole missioni valutate
+        _media(case((per_stato, rollup.SommaValori)),
+               case((per_stato, rollup.NumeroValori))).label('media')
+    ).filter(
+        rollup.Dimensione.in_(['missioni_stato', 'ordini_tipo'])
     ).subquery()
     
-    droni_disponibili = Drone.query.filter(
-        ~Drone.ID.in_(droni_occupati),
-        Drone.Batteria >= 20
-    ).count()
+    # Droni disponibili (batteria >= 20% e non in missione attiva);
+    # le missioni senza drone sono escluse: un NULL in NOT IN azzererebbe il conteggio
+    droni_occupati = select(Missione.IdDrone).where(
+        Missione.Stato.in_(['programmata', 'in_corso']),
+        Missione.IdDrone.isnot(None)
+    )
     
-    return jsonify({
+    def conteggio(model, *condizioni):
+        return select(func.count()).select_from(model).where(*condizioni).scalar_subquery()
+    
+    riga = db.session.query(
+        totali.c.ordini, totali.c.totale, totali.c.completate, totali.c.in_corso, totali.c.media,
+        conteggio(Drone).label('droni'),
+        conteggio(Drone, ~Drone.ID.in_(droni_occupati), Drone.Batteria >= 20).label('droni_disponibili'),
+        conteggio(Pilota).label('piloti'),
+        conteggio(Utente, Utente.Ruolo == 'cliente').label('clienti')
+    ).select_from(totali).one()
+    
+    return {
         'ordini': {
-            'totale': totale_ordini
+            'totale': int(riga.ordini or 0)
         },
         'missioni': {
-            'totale': totale_missioni,
-            'completate': missioni_completate,
-            'in_corso': missioni_in_corso
+            'totale': int(riga.totale or 0),
+            'completate': int(riga.completate or 0),
+            'in_corso': int(riga.in_corso or 0)
         },
         'droni': {
-            'totale': totale_droni,
-            'disponibili': droni_disponibili
+            'totale': riga.droni,
+            'disponibili': riga.droni_disponibili
         },
         'piloti': {
-            'totale': totale_piloti
+            'totale': riga.piloti
         },
         'clienti': {
-            'totale': totale_clienti
+            'totale': riga.clienti
         },
         'valutazioni': {
-            'media': round(float(media_val), 1) if media_val else None
+            'media': round(float(riga.media), 1) if riga.media else None
         }
-    })
+    }
+
+
+@statistiche_bp.route('/overview', methods=['GET'])
+@admin_required
+def get_overview():
+    """
+    KPI principali per dashboard.
+    
+    Una sola query, in cache per STATISTICHE_OVERVIEW_TTL secondi:
+    più admin con la dashboard aperta condividono lo stesso calcolo.
+    """
+    overview = overview_cache.get_or_load(
+        'overview', _calcola_overview,
+        ttl=current_app.config.get('STATISTICHE_OVERVIEW_TTL')
+    )
+    return jsonify(overview)
 
 
 @statistiche_bp.route('/missioni', methods=['GET'])
 @admin_required
 def get_missioni_stats():
-    """Statistiche dettagliate missioni"""
+    """Statistiche dettagliate missioni (dai rollup per stato)"""
+    rollup = sorgente_rollup('missioni_stato')
+    
     # Conteggio per stato
     stati = db.session.query(
-        Missione.Stato,
-        func.count(Missione.ID)
-    ).group_by(Missione.Stato).all()
+        rollup.Chiave,
+        func.sum(rollup.Conteggio)
+    ).filter(
+        rollup.Dimensione == 'missioni_stato'
+    ).group_by(rollup.Chiave).all()
     
-    per_stato = {stato: count for stato, count in stati}
+    per_stato = {stato or None: int(count) for stato, count in stati}
     
     # Missioni per data (ultimi 30 giorni)
     per_data = db.session.query(
-        Missione.DataMissione,
-        func.count(Missione.ID)
-    ).group_by(Missione.DataMissione).order_by(
-        Missione.DataMissione.desc()
+        rollup.Giorno,
+        func.sum(rollup.Conteggio)
+    ).filter(
+        rollup.Dimensione == 'missioni_stato'
+    ).group_by(rollup.Giorno).order_by(
+        rollup.Giorno.desc()
     ).limit(30).all()
     
+    # Le missioni senza data hanno un giorno convenzionale: tornano None
+    per_data = [(giorno_da_db(giorno), count) for giorno, count in per_data]
+    
     return jsonify({
         'per_stato': per_stato,
         'per_data': [{
             'data': str(data) if data else None,
-            'count': count
+            'count': int(count)
         } for data, count in per_data]
     })
 
 
+def _aggregati_missioni(dimensione):
+    """
+    Subquery con i totali delle missioni per drone o per pilota.
+    
+    Somma i rollup giornalieri della dimensione: una riga per drone o
+    pilota e giorno con missioni, invece di una per missione.
+    
+    Args:
+        dimensione (str): 'missioni_drone' o 'missioni_pilota'
+        
+    Returns:
+        Subquery con colonne chiave (ID come stringa), totali, completate e media
+    """
+    rollup = sorgente_rollup(dimensione)
+    return db.session.query(
+        rollup.Chiave.label('chiave'),
+        func.sum(rollup.Conteggio).label('totali'),
+        func.sum(rollup.Completate).label('completate'),
+        # Media delle sole missioni valutate
+        _media(rollup.SommaValori, rollup.NumeroValori).label('media')
+    ).filter(
+        rollup.Dimensione == dimensione
+    ).group_by(rollup.Chiave).subquery()
+
+
 @statistiche_bp.route('/droni', methods=['GET'])
 @admin_required
 def get_droni_stats():
-    """Statistiche performance droni"""
-    droni = Drone.query.all()
-    
-    stats = []
-    for drone in droni:
-        missioni = Missione.query.filter_by(IdDrone=drone.ID).all()
-        completate = sum(1 for m in missioni if m.Stato == 'completata')
-        valutazioni = [m.Valutazione for m in missioni if m.Valutazione]
-        media_val = sum(valutazioni) / len(valutazioni) if valutazioni else None
-        
-        stats.append({
-            'id': drone.ID,
-            'modello': drone.Modello,
-            'batteria': drone.Batteria,
-            'capacita': float(drone.Capacita) if drone.Capacita else None,
-            'missioni_totali': len(missioni),
-            'missioni_completate': completate,
-            'media_valutazione': round(media_val, 1) if media_val else None
-        })
-    
-    # Ordinati per numero missioni
-    stats.sort(key=lambda x: x['missioni_totali'], reverse=True)
+    """Statistiche performance droni (una query, ordinate per numero missioni)"""
+    aggregati = _aggregati_missioni('missioni_drone')
+    totali = func.coalesce(aggregati.c.totali, 0)
+    
+    # LEFT JOIN: anche i droni senza missioni compaiono con totali a zero
+    righe = db.session.query(
+        Drone.ID, Drone.Modello, Drone.Batteria, Drone.Capacita,
+        totali.label('totali'),
+        func.coalesce(aggregati.c.completate, 0).label('completate'),
+        aggregati.c.media
+    ).outerjoin(
+        aggregati, aggregati.c.chiave == cast(Drone.ID, String)
+    ).order_by(totali.desc(), Drone.ID).all()
     
     return jsonify({
-        'droni': stats
+        'droni': [{
+            'id': r.ID,
+            'modello': r.Modello,
+            'batteria': r.Batteria,
+            'capacita': float(r.Capacita) if r.Capacita else None,
+            'missioni_totali': int(r.totali),
+            'missioni_completate': int(r.completate),
+            'media_valutazione': round(float(r.media), 1) if r.media else None
+        } for r in righe]
     })
 
 
 @statistiche_bp.route('/piloti', methods=['GET'])
 @admin_required
 def get_piloti_stats():
-    """Statistiche performance piloti"""
-    piloti = Pilota.query.all()
-    
-    stats = []
-    for pilota in piloti:
-        missioni = Missione.query.filter_by(IdPilota=pilota.ID).all()
-        completate = sum(1 for m in missioni if m.Stato == 'completata')
-        valutazioni = [m.Valutazione for m in missioni if m.Valutazione]
-        media_val = sum(valutazioni) / len(valutazioni) if valutazioni else None
-        
-        stats.append({
-            'id': pilota.ID,
-            'nome': f"{pilota.Nome} {pilota.Cognome}",
-            'turno': pilota.Turno,
-            'brevetto': pilota.Brevetto,
-            'missioni_totali': len(missioni),
-            'missioni_completate': completate,
-            'media_valutazione': round(media_val, 1) if media_val else None
-        })
-    
-    # Ordinati per valutazione media
-    stats.sort(key=lambda x: x['media_valutazione'] or 0, reverse=True)
+    """Statistiche performance piloti (una query, ordinate per valutazione media)"""
+    aggregati = _aggregati_missioni('missioni_pilota')
+    
+    righe = db.session.query(
+        Pilota.ID, Pilota.Nome, Pilota.Cognome, Pilota.Turno, Pilota.Brevetto,
+        func.coalesce(aggregati.c.totali, 0).label('totali'),
+        func.coalesce(aggregati.c.completate, 0).label('completate'),
+        aggregati.c.media
+    ).outerjoin(
+        aggregati, aggregati.c.chiave == cast(Pilota.ID, String)
+    ).order_by(
+        # Piloti senza valutazioni in fondo (media considerata 0)
+        func.coalesce(aggregati.c.media, 0).desc(), Pilota.ID
+    ).all()
     
     return jsonify({
-        'piloti': stats
+        'piloti': [{
+            'id': r.ID,
+            'nome': f"{r.Nome} {r.Cognome}",
+            'turno': r.Turno,
+            'brevetto': r.Brevetto,
+            'missioni_totali': int(r.totali),
+            'missioni_completate': int(r.completate),
+            'media_valutazione': round(float(r.media), 1) if r.media else None
+        } for r in righe]
     })
 
 
+def _filtri_valutazioni(args):
+    """
+    Condizioni su Missione dai filtri della query string di /valutazioni.
+    
+    - drone / pilota: ID del drone o del pilota
+    - from / to: date ISO8601 della missione, incluse
+    
+    Args:
+        args: request.args
+        
+    Returns:
+        list: Condizioni SQLAlchemy da applicare alla query
+        
+    Raises:
+        ValueError: Se un filtro non è valido
+    """
+    condizioni = []
+    
+    for nome, colonna in (('drone', Missione.IdDrone), ('pilota', Missione.IdPilota)):
+        valore = args.get(nome)
+        if valore:
+            if not valore.isdigit():
+                raise ValueError(f'Parametro {nome} non valido (atteso ID numerico)')
+            condizioni.append(colonna == int(valore))
+    
+    def data(nome):
+        valore = args.get(nome)
+        if not valore:
+            return None
+        istante = parse_datetime(valore)
+        if istante is None:
+            raise ValueError(f'Parametro {nome} non valido (attesa data ISO8601)')
+        return istante.date()
+    
+    inizio, fine = data('from'), data('to')
+    if inizio:
+        condizioni.append(Missione.DataMissione >= inizio)
+    if fine:
+        condizioni.append(Missione.DataMissione <= fine)
+    
+    return condizioni
+
+
+def _percentile(distribuzione, totale, quota):
+    """
+    Percentile di una distribuzione di voti (interpolazione lineare).
+    
+    Equivale al percentile calcolato sull'elenco ordinato dei voti
+    (metodo di default di numpy), senza costruirlo: la posizione
+    richiesta viene cercata nei conteggi cumulati dei voti.
+    
+    Args:
+        distribuzione (list): Coppie (voto, conteggio) ordinate per voto
+        totale (int): Somma dei conteggi (maggiore di zero)
+        quota (float): Percentile tra 0 e 1 (0.5 = mediana)
+        
+    Returns:
+        float: Valore del percentile
+    """
+    posizione = (totale - 1) * quota
+    indice = int(posizione)
+    
+    def voto_in(k):
+        # Voto in posizione k (da 0) dell'elenco ordinato
+        cumulato = 0
+        for voto, count in distribuzione:
+            cumulato += count
+            if k < cumulato:
+                return voto
+        return distribuzione[-1][0]
+    
+    inferiore = voto_in(indice)
+    if posizione == indice:
+        return float(inferiore)
+    return inferiore + (voto_in(indice + 1) - inferiore) * (posizione - indice)
+
+
 @statistiche_bp.route('/valutazioni', methods=['GET'])
 @admin_required
 def get_valutazioni_stats():
-    """Distribuzione valutazioni"""
+    """
+    Distribuzione valutazioni con media, mediana e percentili.
+    
+    Filtri opzionali: ?drone=, ?pilota=, ?from=, ?to= (date della
+    missione). Una sola query GROUP BY per voto: totale, media e
+    percentili sono ricavati dai conteggi dei voti, senza caricare
+    le missioni.
+    """
+    try:
+        condizioni = _filtri_valutazioni(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Conteggio per voto (1-10)
     distribuzione = db.session.query(
         Missione.Valutazione,
         func.count(Missione.ID)
     ).filter(
-        Missione.Valutazione.isnot(None)
-    ).group_by(Missione.Valutazione).all()
+        Missione.Valutazione.isnot(None),
+        *condizioni
+    ).group_by(Missione.Valutazione).order_by(Missione.Valutazione).all()
     
     # Crea array con tutti i voti 1-10
     dist_completa = {i: 0 for i in range(1, 11)}
@@ -208,33 +391,72 @@ def get_valutazioni_stats():
         if voto:
             dist_completa[voto] = count
     
-    # Media e totale
-    valutazioni = Missione.query.filter(Missione.Valutazione.isnot(None)).all()
-    totale = len(valutazioni)
-    media = sum(m.Valutazione for m in valutazioni) / totale if totale else None
+    # Totale e media dai conteggi
+    totale = sum(count for _, count in distribuzione)
+    media = sum(voto * count for voto, count in distribuzione) / totale if totale else None
+    
+    percentili = {
+        f'p{p}': round(_percentile(distribuzione, totale, p / 100), 2) if totale else None
+        for p in PERCENTILI
+    }
     
     return jsonify({
         'distribuzione': dist_completa,
         'totale': totale,
-        'media': round(media, 2) if media else None
+        'media': round(media, 2) if media else None,
+        'mediana': percentili['p50'],
+        'percentili': percentili
     })
 
 
 @statistiche_bp.route('/ordini', methods=['GET'])
 @admin_required
 def get_ordini_stats():
-    """Statistiche ordini"""
-    # Per tipo
+    """Statistiche ordini (dai rollup per tipo)"""
+    rollup = sorgente_rollup('ordini_tipo')
+    
+    # Per tipo, con somma e numero dei pesi per il peso medio
     per_tipo = db.session.query(
-        Ordine.Tipo,
-        func.count(Ordine.ID)
-    ).group_by(Ordine.Tipo).all()
+        rollup.Chiave,
+        func.sum(rollup.Conteggio),
+        func.sum(rollup.SommaValori),
+        func.sum(rollup.NumeroValori)
+    ).filter(
+        rollup.Dimensione == 'ordini_tipo'
+    ).group_by(rollup.Chiave).all()
     
-    # Peso medio
-    peso_medio = db.session.query(func.avg(Ordine.PesoTotale)).scalar()
+    # Peso medio degli ordini con peso (AVG ignora i NULL)
+    somma_pesi = sum(somma for _, _, somma, _ in per_tipo)
+    numero_pesi = sum(numero for _, _, _, numero in per_tipo)
+    peso_medio = somma_pesi / numero_pesi if numero_pesi else None
     
     return jsonify({
-        'per_tipo': {tipo: count for tipo, count in per_tipo},
+        'per_tipo': {tipo or None: int(count) for tipo, count, _, _ in per_tipo},
         'peso_medio': round(float(peso_medio), 2) if peso_medio else None,
-        'totale': Ordine.query.count()
+        'totale': sum(int(count) for _, count, _, _ in per_tipo)
+    })
+
+
+@statistiche_bp.route('/timeseries', methods=['GET'])
+@admin_required
+def get_timeseries():
+    """
+    Serie temporale per i grafici della dashboard.
+    
+    Query string: metric (missioni, ordini, valutazioni), from e to
+    (date ISO8601, incluse), bucket (day, week, month). Letta dai
+    rollup giornalieri: un grafico mensile di due anni costa quanto
+    uno giornaliero di una settimana. I periodi senza dati valgono zero.
+    """
+    try:
+        metrica, inizio, fine, periodo = parse_timeseries_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'metric': metrica,
+        'bucket': periodo,
+        'from': inizio.isoformat(),
+        'to': fine.isoformat(),
+        'serie': timeseries(metrica, inizio, fine, periodo)
     })
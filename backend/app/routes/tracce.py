@@ -8,9 +8,11 @@ del drone con coordinate geografiche e timestamp.
 Funzionalità:
 - Recupero tracce per missione (percorso completo)
 - Ultima posizione drone per una missione (posizione corrente)
-- Tracce storiche per drone specifico
+- Tracce storiche per drone specifico (aggregabili per intervalli di tempo)
 - Inserimento nuove tracce GPS (piloti/sistema)
 - Inserimento batch di multiple tracce (ottimizzazione)
+- Stream live Server-Sent Events delle nuove posizioni per missione
+- Modalità write-behind opzionale per i singoli punti (scrittura a blocchi)
 
 Le tracce permettono:
 - Visualizzazione percorso su mappa interattiva
@@ -24,42 +26,76 @@ Autorizzazioni:
 
 Tutti gli endpoint sono sotto il prefix '/api/tracce'.
 """
-from flask import Blueprint, request, jsonify
+import queue
+from flask import Blueprint, Response, current_app, request, jsonify
 from app.extensions import db
-from app.models import Traccia, Missione
-from app.utils.decorators import login_required, pilota_required
+from app.models import Drone, Traccia, Missione
+from app.utils.decorators import login_required, admin_required, pilota_required
+from app.utils.conditional import conditional
+from app.services.tracking_hub import tracking_hub
+from app.services.position_cache import position_cache
+from app.services.tracking_service import (
+    MAX_PUNTI_DRONE, STATI_FINALI, format_percorso, get_drone_buckets, get_drone_points,
+    get_latest_point, get_track_points, parse_bucket_args,
+    parse_format_arg, parse_simplify_args, publish_tracce, simplify_punti,
+    track_version
+)
+from app.services.track_ingest import (
+    ingest_tracce, registra_traccia, riga_to_dict, validate_traccia
+)
+from app.services.track_buffer import track_buffer
 
 tracce_bp = Blueprint('tracce', __name__)
 
 
 @tracce_bp.route('/missione/<int:missione_id>', methods=['GET'])
 @login_required
+@conditional(lambda missione_id: track_version(missione_id))
 def get_tracce_missione(missione_id):
-    """Ottieni tutte le tracce di una missione"""
+    """
+    Ottieni tutte le tracce di una missione.
+    
+    Supporta ?tolerance=<metri> e ?max_points=<N> per semplificare
+    il percorso lato server e ?format=polyline per l'output compatto.
+    GET condizionale con ETag: per una missione completata il percorso
+    non cambia più e il polling riceve 304.
+    """
     missione = Missione.query.get_or_404(missione_id)
     
-    tracce = Traccia.query.filter_by(
-        ID_Missione=missione_id
-    ).order_by(Traccia.TIMESTAMP.asc()).all()
+    try:
+        tolerance, max_points = parse_simplify_args(request.args)
+        formato = parse_format_arg(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Dall'archivio compresso se la missione è completata e archiviata
+    punti = get_track_points(missione_id, stato=missione.Stato)
     
     return jsonify({
         'missione_id': missione_id,
         'drone_id': missione.IdDrone,
-        'tracce': [t.to_dict() for t in tracce]
+        'tracce': format_percorso(
+            simplify_punti(punti, tolerance, max_points), formato
+        )
     })
 
 
 @tracce_bp.route('/missione/<int:missione_id>/latest', methods=['GET'])
 @login_required
 def get_latest_traccia(missione_id):
-    """Ottieni ultima posizione drone per una missione"""
-    missione = Missione.query.get_or_404(missione_id)
+    """
+    Ottieni ultima posizione drone per una missione.
     
-    traccia = Traccia.query.filter_by(
-        ID_Missione=missione_id
-    ).order_by(Traccia.TIMESTAMP.desc()).first()
+    Servita dalla cache in memoria quando disponibile (nessuna query);
+    in caso di miss verifica la missione e legge l'ultima traccia dal DB.
+    """
+    punto = position_cache.get(missione_id)
     
-    if not traccia:
+    if punto is None:
+        missione = Missione.query.get_or_404(missione_id)
+        punto = get_latest_point(missione_id, missione.Stato)
+    
+    if not punto:
         return jsonify({
             'missione_id': missione_id,
             'posizione': None,
@@ -68,14 +104,109 @@ def get_latest_traccia(missione_id):
     
     return jsonify({
         'missione_id': missione_id,
-        'posizione': traccia.to_dict()
+        'posizione': punto
+    })
+
+
+@tracce_bp.route('/missione/<int:missione_id>/stream', methods=['GET'])
+@login_required
+def stream_tracce_missione(missione_id):
+    """
+    Stream live (Server-Sent Events) delle posizioni di una missione.
+    
+    Alla connessione invia l'ultima posizione nota, poi un evento
+    'posizione' per ogni nuova traccia registrata e un evento 'stato'
+    a ogni cambio di stato. Lo stream si chiude quando la missione
+    diventa completata o annullata.
+    """
+    missione = Missione.query.get_or_404(missione_id)
+    stato = missione.Stato
+    
+    # Iscrizione prima di leggere l'ultima posizione: nessun punto perso
+    coda = tracking_hub.subscribe(missione_id)
+    iniziale = get_latest_point(missione_id, stato)
+    
+    heartbeat = current_app.config['TRACKING_STREAM_HEARTBEAT']
+    dumps = current_app.json.dumps
+    
+    # Rilascia subito la connessione al DB: lo stream può durare minuti
+    # e non deve occupare uno slot del pool
+    db.session.close()
+    
+    def evento_sse(evento, dati):
+        return f'event: {evento}\ndata: {dumps(dati)}\n\n'
+    
+    def genera():
+        try:
+            # Suggerisce al browser il ritardo di riconnessione (ms)
+            yield 'retry: 3000\n\n'
+            if iniziale:
+                yield evento_sse('posizione', iniziale)
+            if stato in STATI_FINALI:
+                yield evento_sse('stato', {'missione_id': missione_id, 'stato': stato})
+                return
+            
+            while True:
+                try:
+                    evento, dati = coda.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Commento SSE: mantiene viva la connessione
+                    yield ': keep-alive\n\n'
+                    continue
+                
+                yield evento_sse(evento, dati)
+                
+                if evento == 'stato' and dati.get('stato') in STATI_FINALI:
+                    return
+        finally:
+            # Eseguito anche alla disconnessione del client
+            tracking_hub.unsubscribe(missione_id, coda)
+    
+    return Response(genera(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Disabilita il buffering di nginx per inoltrare subito gli eventi
+        'X-Accel-Buffering': 'no'
     })
 
 
 @tracce_bp.route('/drone/<int:drone_id>', methods=['GET'])
 @login_required
 def get_tracce_drone(drone_id):
-    """Ottieni tutte le tracce di un drone"""
+    """
+    Ottieni le tracce di un drone.
+    
+    Senza parametri ritorna le ultime 100 tracce. Con ?from= e/o ?to=
+    (ISO8601) ritorna i punti dell'intervallo; con ?bucket=30s (s, m, h)
+    li aggrega per intervalli di tempo, restituendo per ognuno primo,
+    ultimo punto e centroide (default intervallo: ultime 24 ore).
+    
+    I punti grezzi sono al massimo MAX_PUNTI_DRONE, i primi in ordine di
+    tempo: se l'intervallo ne contiene di più la risposta ha
+    'troncato': true e la lettura prosegue con ?from= uguale al
+    timestamp dell'ultimo punto ricevuto (o usando ?bucket=).
+    """
+    if any(request.args.get(p) for p in ('from', 'to', 'bucket')):
+        try:
+            inizio, fine, ampiezza = parse_bucket_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result = {
+            'drone_id': drone_id,
+            'from': inizio.isoformat(),
+            'to': fine.isoformat()
+        }
+        if ampiezza:
+            result['bucket_s'] = ampiezza
+            result['buckets'] = get_drone_buckets(drone_id, inizio, fine, ampiezza)
+        else:
+            # Un punto in più indica che l'intervallo è stato troncato
+            punti = get_drone_points(drone_id, inizio, fine, limite=MAX_PUNTI_DRONE + 1)
+            result['troncato'] = len(punti) > MAX_PUNTI_DRONE
+            result['max_punti'] = MAX_PUNTI_DRONE
+            result['tracce'] = punti[:MAX_PUNTI_DRONE]
+        return jsonify(result)
+    
     tracce = Traccia.query.filter_by(
         ID_Drone=drone_id
     ).order_by(Traccia.TIMESTAMP.desc()).limit(100).all()
@@ -89,83 +220,87 @@ def get_tracce_drone(drone_id):
 @tracce_bp.route('', methods=['POST'])
 @pilota_required
 def add_traccia():
-    """Aggiungi nuova traccia GPS"""
+    """
+    Aggiungi nuova traccia GPS.
+    
+    Il punto può indicare 'timestamp' (ISO8601) di rilevazione e
+    'drone_id' (default: drone della missione). Missione e drone sono
+    verificati anche in modalità write-behind, così un punto accettato
+    con 202 non viene poi rifiutato dal database.
+    """
     data = request.get_json()
     
     if not data:
         return jsonify({'error': 'Dati mancanti'}), 400
     
-    missione_id = data.get('missione_id')
-    drone_id = data.get('drone_id')
-    lat = data.get('lat')
-    lng = data.get('lng')
+    riga, errore = validate_traccia(data)
+    if errore:
+        return jsonify({'error': errore}), 400
     
-    if not all([missione_id, lat, lng]):
-        return jsonify({'error': 'missione_id, lat e lng richiesti'}), 400
+    missione = Missione.query.get_or_404(riga['ID_Missione'])
     
     # Se drone_id non specificato, usa quello della missione
-    if not drone_id:
-        missione = Missione.query.get(missione_id)
-        if missione:
-            drone_id = missione.IdDrone
+    if riga['ID_Drone'] is None:
+        riga['ID_Drone'] = missione.IdDrone
+    elif riga['ID_Drone'] != missione.IdDrone and db.session.get(Drone, riga['ID_Drone']) is None:
+        return jsonify({'error': 'Drone non trovato'}), 400
     
-    if not drone_id:
+    if not riga['ID_Drone']:
         return jsonify({'error': 'drone_id richiesto'}), 400
     
-    traccia = Traccia(
-        ID_Drone=drone_id,
-        ID_Missione=missione_id,
-        Latitudine=lat,
-        Longitudine=lng
-    )
-    
-    db.session.add(traccia)
-    db.session.commit()
+    punto, esito = registra_traccia(riga, missione.Stato)
     
-    return jsonify({
-        'success': True,
-        'traccia': traccia.to_dict()
-    }), 201
+    if esito == 'duplicata':
+        return jsonify({'error': 'Punto già presente (stesso drone, missione e timestamp)'}), 409
+    if esito == 'in_coda':
+        return jsonify({'success': True, 'in_coda': True, 'traccia': punto}), 202
+    return jsonify({'success': True, 'traccia': punto}), 201
 
 
 @tracce_bp.route('/bulk', methods=['POST'])
 @pilota_required
 def add_tracce_bulk():
-    """Aggiungi multiple tracce GPS in batch"""
+    """
+    Aggiungi multiple tracce GPS in batch.
+    
+    Risolve tutte le missioni distinte con una sola query IN e inserisce
+    le righe valide con un'unica INSERT multi-riga. Ogni punto può
+    indicare il proprio 'timestamp' (ISO8601) di rilevazione.
+    
+    Le righe rifiutate sono riportate in 'scartate' con indice e motivo.
+    """
     data = request.get_json()
     
     if not data or not data.get('tracce'):
         return jsonify({'error': 'Array tracce richiesto'}), 400
     
-    tracce_inserite = []
+    if not isinstance(data['tracce'], list):
+        return jsonify({'error': 'tracce deve essere un array'}), 400
     
-    for t in data['tracce']:
-        missione_id = t.get('missione_id')
-        drone_id = t.get('drone_id')
-        lat = t.get('lat')
-        lng = t.get('lng')
-        
-        if not all([missione_id, lat, lng]):
-            continue
-        
-        if not drone_id:
-            missione = Missione.query.get(missione_id)
-            if missione:
-                drone_id = missione.IdDrone
-        
-        if drone_id:
-            traccia = Traccia(
-                ID_Drone=drone_id,
-                ID_Missione=missione_id,
-                Latitudine=lat,
-                Longitudine=lng
-            )
-            db.session.add(traccia)
-            tracce_inserite.append(traccia)
+    scritte, scartate = ingest_tracce(data['tracce'])
+    
+    if not scritte:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Nessuna traccia valida',
+            'inserite': 0,
+            'scartate': scartate
+        }), 400
     
     db.session.commit()
     
+    # Notifica gli stream live solo dei punti effettivamente salvati
+    publish_tracce([riga_to_dict(r) for r in scritte])
+    
     return jsonify({
         'success': True,
-        'inserite': len(tracce_inserite)
+        'inserite': len(scritte),
+        'scartate': scartate
     }), 201
+
+
+@tracce_bp.route('/buffer', methods=['GET'])
+@admin_required
+def get_buffer_metrics():
+    """Metriche del buffer write-behind (profondità coda, latenza flush)"""
+    return jsonify(track_buffer.metrics())
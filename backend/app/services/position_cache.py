@@ -0,0 +1,140 @@
+"""
+Cache in memoria dell'ultima posizione nota per missione.
+
+L'endpoint GET /api/tracce/missione/<id>/latest viene interrogato di
+continuo dai client di tracking. Senza cache ogni chiamata esegue
+ORDER BY TIMESTAMP DESC LIMIT 1 sulla tabella Traccia; con la cache
+la posizione viene servita senza toccare MySQL.
+
+Funzionamento:
+- Aggiornata dalle route di scrittura tracce (tramite publish_tracce)
+- Popolata dal database al primo accesso (cache miss)
+- Dimensione massima configurabile (TRACKING_CACHE_SIZE) con
+  eviction LRU delle missioni meno consultate
+- Le missioni completate/annullate vengono rimosse: non ricevono più
+  tracce e non hanno bisogno di una posizione "live"
+
+La cache è process-local: con più worker ognuno mantiene la propria
+copia, aggiornata solo dalle scritture gestite dallo stesso processo.
+Per questo ogni missione resta in cache al più TRACKING_CACHE_TTL
+secondi dal primo inserimento (gli aggiornamenti successivi non
+prolungano la scadenza): poi viene riletta dal database, che contiene
+anche i punti scritti dagli altri worker.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LatestPositionCache:
+    """
+    Cache LRU thread-safe missione_id -> ultimo punto GPS (dict).
+
+    I punti sono nel formato di Traccia.to_dict(). Un punto viene
+    sostituito solo da uno con timestamp più recente, così l'ordine
+    di arrivo delle scritture concorrenti non conta.
+    """
+
+    def __init__(self, max_size=1000, ttl=5):
+        """
+        Args:
+            max_size (int): Numero massimo di missioni in cache
+            ttl (float): Secondi di validità di una missione in cache
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._punti = OrderedDict()   # missione_id -> (punto, scadenza)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configura la cache dai parametri dell'applicazione.
+
+        Args:
+            app (Flask): Istanza dell'applicazione
+        """
+        self.max_size = app.config.get('TRACKING_CACHE_SIZE', self.max_size)
+        self.ttl = app.config.get('TRACKING_CACHE_TTL', self.ttl)
+
+    def get(self, missione_id):
+        """
+        Ritorna l'ultima posizione in cache di una missione.
+
+        Args:
+            missione_id (int): ID della missione
+
+        Returns:
+            dict: Ultimo punto GPS, o None se non in cache o scaduto
+        """
+        with self._lock:
+            voce = self._punti.get(missione_id)
+            if voce is None:
+                return None
+            punto, scadenza = voce
+            if time.monotonic() >= scadenza:
+                # Scaduta: la prossima lettura passa dal database
+                del self._punti[missione_id]
+                return None
+            # Segna come usato di recente (LRU)
+            self._punti.move_to_end(missione_id)
+            return punto
+
+    def update(self, punto):
+        """
+        Inserisce o aggiorna la posizione di una missione.
+
+        Ignora il punto se in cache ce n'è già uno più recente. La
+        scadenza è quella del primo inserimento della missione.
+
+        Args:
+            punto (dict): Punto GPS con chiavi missione_id e timestamp
+        """
+        missione_id = punto['missione_id']
+        adesso = time.monotonic()
+        with self._lock:
+            voce = self._punti.get(missione_id)
+            if voce is not None and adesso >= voce[1]:
+                voce = None
+            if voce is not None and _piu_recente(voce[0], punto):
+                return
+            scadenza = voce[1] if voce is not None else adesso + self.ttl
+            self._punti[missione_id] = (punto, scadenza)
+            self._punti.move_to_end(missione_id)
+            # Eviction LRU oltre la dimensione massima
+            while len(self._punti) > self.max_size:
+                self._punti.popitem(last=False)
+
+    def evict(self, missione_id):
+        """
+        Rimuove una missione dalla cache (es: completata o eliminata).
+
+        Args:
+            missione_id (int): ID della missione
+        """
+        with self._lock:
+            self._punti.pop(missione_id, None)
+
+    def clear(self):
+        """Svuota completamente la cache."""
+        with self._lock:
+            self._punti.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._punti)
+
+
+def _piu_recente(attuale, nuovo):
+    """
+    Verifica se il punto in cache è più recente di quello nuovo.
+
+    I timestamp sono stringhe ISO8601 nello stesso formato, quindi
+    il confronto lessicografico equivale a quello cronologico.
+    """
+    if not attuale.get('timestamp') or not nuovo.get('timestamp'):
+        return False
+    return attuale['timestamp'] > nuovo['timestamp']
+
+
+# Istanza condivisa dal processo
+position_cache = LatestPositionCache()
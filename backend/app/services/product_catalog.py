@@ -0,0 +1,283 @@
+"""
+Catalogo prodotti in memoria con indice a trigrammi.
+
+Le route di consultazione del catalogo interrogavano MySQL a ogni
+richiesta: la ricerca con nome ILIKE '%q%' (che non può usare indici,
+scansione completa) e l'elenco categorie con SELECT DISTINCT.
+Il catalogo è piccolo e cambia di rado: ne viene mantenuta una copia
+in memoria (snapshot immutabile) con strutture precalcolate:
+- prodotti per ID nel formato di Prodotto.to_dict(), in ordine di ID
+- elenco ordinato delle categorie e ID dei prodotti per categoria
+- indice invertito trigramma -> ID per la ricerca per sottostringa
+  (intersezione delle liste dei trigrammi della query) e fuzzy
+  (quota dei trigrammi della query presenti nel nome, tollerante agli
+  errori di battitura)
+
+Il testo è normalizzato (minuscole, senza accenti) come il confronto
+case e accent insensitive della collation MySQL usato da ILIKE.
+
+Aggiornamento: lo snapshot è ricostruito alla prima lettura dopo un
+commit che modifica Prodotto (versione 'prodotti' del registro in
+app.utils.conditional) oppure dopo CATALOGO_TTL secondi, che limita
+il ritardo con cui un processo vede le scritture di altri worker.
+
+Ogni snapshot ha un hash del contenuto (CatalogSnapshot.hash), usato
+come versione per gli ETag: cambia a ogni ricostruzione che trova dati
+diversi, anche per scritture di altri worker, ed è uguale in tutti i
+processi che hanno caricato gli stessi prodotti. CatalogSnapshot.modificato
+è il momento in cui il processo ha visto cambiare l'hash (Last-Modified).
+"""
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from datetime import datetime, timezone
+
+from app.models import Prodotto
+from app.utils.conditional import versioni
+
+# Quota minima (0-1) dei trigrammi della query presenti nel nome
+# perché un prodotto sia un risultato della ricerca fuzzy
+SOGLIA_FUZZY = 0.5
+
+# Secondi di validità dello snapshot (default se non configurato)
+TTL_DEFAULT = 60
+
+
+def normalizza(testo):
+    """
+    Normalizza un testo per la ricerca: minuscole e senza accenti.
+
+    Args:
+        testo (str): Testo originale (None ammesso)
+
+    Returns:
+        str: Testo normalizzato
+    """
+    scomposto = unicodedata.normalize('NFKD', testo or '').casefold()
+    return ''.join(c for c in scomposto if not unicodedata.combining(c))
+
+
+def trigrammi(testo):
+    """
+    Trigrammi di un testo normalizzato, con bordi (come pg_trgm).
+
+    I due spazi iniziali e quello finale fanno pesare di più l'inizio
+    e la fine della parola nella similarità.
+
+    Args:
+        testo (str): Testo già normalizzato
+
+    Returns:
+        set: Trigrammi del testo
+    """
+    esteso = f'  {testo} '
+    return {esteso[i:i + 3] for i in range(len(esteso) - 2)}
+
+
+class CatalogSnapshot:
+    """
+    Copia immutabile del catalogo con gli indici di ricerca.
+    """
+
+    def __init__(self, prodotti, versione):
+        """
+        Args:
+            prodotti (list): Istanze Prodotto
+            versione: Versione del registro al momento del caricamento
+        """
+        self.versione = versione
+        self.creato = time.monotonic()
+        self.modificato = None   # Impostato da ProductCatalog
+
+        self.prodotti = {}   # ID -> dict (formato to_dict)
+        self.ids = []        # Tutti gli ID in ordine crescente
+        self.nomi = {}       # ID -> nome normalizzato
+        self.trigrammi = {}  # ID -> numero di trigrammi del nome
+        self.indice = {}     # trigramma -> lista ordinata di ID
+        per_categoria = {}
+
+        for prodotto in sorted(prodotti, key=lambda p: p.ID):
+            self.prodotti[prodotto.ID] = prodotto.to_dict()
+            self.ids.append(prodotto.ID)
+
+            nome = normalizza(prodotto.nome)
+            self.nomi[prodotto.ID] = nome
+            tri = trigrammi(nome)
+            self.trigrammi[prodotto.ID] = len(tri)
+            for t in tri:
+                # ID inseriti in ordine crescente: liste già ordinate
+                self.indice.setdefault(t, []).append(prodotto.ID)
+
+            if prodotto.categoria:
+                per_categoria.setdefault(prodotto.categoria, []).append(prodotto.ID)
+
+        self.categorie = sorted(per_categoria)
+        self.per_categoria = {c: tuple(ids) for c, ids in per_categoria.items()}
+
+        # Versione del contenuto: prodotti serializzati in ordine di ID
+        contenuto = json.dumps([self.prodotti[i] for i in self.ids],
+                               sort_keys=True, default=str, separators=(',', ':'))
+        self.hash = hashlib.sha256(contenuto.encode('utf-8')).hexdigest()[:16]
+
+    def serializza(self, ids, fields=None):
+        """
+        Prodotti nel formato di Prodotto.to_dict(), nell'ordine di ids.
+
+        Args:
+            ids (iterable): ID dei prodotti
+            fields (tuple): Campi da includere (default: tutti)
+
+        Returns:
+            list: Dizionari dei prodotti
+        """
+        if fields is None:
+            return [self.prodotti[i] for i in ids]
+        return [{c: self.prodotti[i][c] for c in fields} for i in ids]
+
+    def cerca(self, q, categoria=None, limit=20, fuzzy=False):
+        """
+        Cerca i prodotti il cui nome contiene q.
+
+        Args:
+            q (str): Testo da cercare
+            categoria (str): Limita la ricerca a una categoria
+            limit (int): Numero massimo di risultati
+            fuzzy (bool): Se i risultati per sottostringa sono meno di
+                          limit, aggiunge i nomi più simili (quota dei
+                          trigrammi della query >= SOGLIA_FUZZY)
+
+        Returns:
+            list: ID dei prodotti, prima le sottostringhe (per ID) poi i
+                  risultati fuzzy (per similarità decrescente)
+        """
+        testo = normalizza(q)
+        ammessi = set(self.per_categoria.get(categoria, ())) if categoria else None
+
+        risultati = []
+        for id_prodotto in self._candidati_sottostringa(testo):
+            if ammessi is not None and id_prodotto not in ammessi:
+                continue
+            if testo in self.nomi[id_prodotto]:
+                risultati.append(id_prodotto)
+                if len(risultati) >= limit:
+                    return risultati
+
+        if fuzzy:
+            trovati = set(risultati)
+            for id_prodotto in self._simili(testo):
+                if id_prodotto in trovati or (ammessi is not None and id_prodotto not in ammessi):
+                    continue
+                risultati.append(id_prodotto)
+                if len(risultati) >= limit:
+                    break
+
+        return risultati
+
+    def _candidati_sottostringa(self, testo):
+        """ID che contengono tutti i trigrammi interni di testo, in ordine."""
+        if len(testo) < 3:
+            # Nessun trigramma interno: verifica su tutti i nomi
+            return self.ids
+
+        interni = {testo[i:i + 3] for i in range(len(testo) - 2)}
+        liste = sorted((self.indice.get(t, []) for t in interni), key=len)
+        if not liste[0]:
+            return []
+
+        # Intersezione partendo dalla lista più corta
+        candidati = set(liste[0])
+        for lista in liste[1:]:
+            candidati.intersection_update(lista)
+            if not candidati:
+                return []
+        return sorted(candidati)
+
+    def _simili(self, testo):
+        """
+        ID ordinati per similarità di trigrammi con testo (sopra soglia).
+
+        La similarità è la quota dei trigrammi della query presenti nel
+        nome (come word_similarity di pg_trgm): un nome lungo non viene
+        penalizzato. A parità vince il nome più corto (indice di Jaccard).
+        """
+        tri = trigrammi(testo)
+        comuni = {}
+        for t in tri:
+            for id_prodotto in self.indice.get(t, ()):
+                comuni[id_prodotto] = comuni.get(id_prodotto, 0) + 1
+
+        punteggi = []
+        for id_prodotto, n in comuni.items():
+            similarita = n / len(tri)
+            if similarita >= SOGLIA_FUZZY:
+                jaccard = n / (len(tri) + self.trigrammi[id_prodotto] - n)
+                punteggi.append((-similarita, -jaccard, id_prodotto))
+
+        return [id_prodotto for _, _, id_prodotto in sorted(punteggi)]
+
+
+class ProductCatalog:
+    """
+    Gestore dello snapshot del catalogo, ricostruito quando scaduto.
+    """
+
+    def __init__(self, ttl=TTL_DEFAULT):
+        """
+        Args:
+            ttl (float): Secondi di validità dello snapshot
+        """
+        self.ttl = ttl
+        self._snapshot = None
+        self._ultimo_hash = None     # (hash, modificato) dell'ultimo snapshot
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configura il catalogo dai parametri dell'applicazione.
+
+        Args:
+            app (Flask): Istanza dell'applicazione
+        """
+        self.ttl = app.config.get('CATALOGO_TTL', self.ttl)
+
+    def snapshot(self):
+        """
+        Ritorna lo snapshot corrente, ricostruendolo se non aggiornato.
+
+        Una sola richiesta ricostruisce lo snapshot; le altre
+        concorrenti attendono il lock e usano il risultato.
+
+        Returns:
+            CatalogSnapshot: Catalogo in memoria
+        """
+        snapshot = self._snapshot
+        if self._valido(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if not self._valido(snapshot):
+                versione = versioni.get('prodotti')[0]
+                snapshot = CatalogSnapshot(Prodotto.query.all(), versione)
+                # Last-Modified ha risoluzione al secondo
+                if self._ultimo_hash is None or self._ultimo_hash[0] != snapshot.hash:
+                    self._ultimo_hash = (snapshot.hash, datetime.now(timezone.utc).replace(microsecond=0))
+                snapshot.modificato = self._ultimo_hash[1]
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        """Scarta lo snapshot: la prossima lettura lo ricostruisce."""
+        self._snapshot = None
+
+    def _valido(self, snapshot):
+        """True se lo snapshot esiste, non è scaduto e la versione è invariata."""
+        return (snapshot is not None
+                and time.monotonic() - snapshot.creato < self.ttl
+                and snapshot.versione == versioni.get('prodotti')[0])
+
+
+# Istanza condivisa dal processo
+product_catalog = ProductCatalog()
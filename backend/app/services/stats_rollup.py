@@ -0,0 +1,555 @@
+"""
+Rollup giornalieri delle statistiche, mantenuti in modo incrementale.
+
+Le statistiche della dashboard ricalcolavano a ogni richiesta i totali
+da tutte le righe di Missione e Ordine. La tabella StatisticaGiornaliera
+contiene invece i totali per giorno e per:
+- 'missioni_stato': stato della missione
+- 'missioni_drone': drone assegnato
+- 'missioni_pilota': pilota assegnato
+- 'ordini_tipo': tipo di ordine (giorno = data di Orario)
+
+con numero di righe, missioni completate e somma/numero dei valori
+(Valutazione per le missioni, PesoTotale per gli ordini): le medie si
+ottengono da somma e numero senza rileggere le righe originali.
+
+Aggiornamento incrementale: gli eventi del mapper (after_insert,
+after_update, before_delete) calcolano la differenza portata da ogni
+riga e la applicano con un upsert sulla stessa connessione del flush,
+quindi nella stessa transazione: un rollback annulla anche i rollup.
+La cancellazione usa before_delete perché i valori della riga devono
+poter essere caricati finché la riga esiste.
+
+Le scritture che non passano dalla sessione ORM (query.update(),
+query.delete(), insert() Core o SQL manuale) non aggiornano i rollup:
+in quei casi si ricostruiscono con rebuild() o backend/rebuild_stats.py.
+
+Senza la migrazione 0003 la tabella non esiste: gli eventi non scrivono
+nulla e sorgente_rollup() calcola gli stessi totali con GROUP BY sulle
+tabelle Missione e Ordine (corretto, ma con costo proporzionale alle righe).
+
+Serie temporali: timeseries() legge i totali giornalieri di un
+intervallo e li raggruppa per giorno, settimana o mese, con zero nei
+periodi senza dati. Il costo dipende dai giorni dell'intervallo, non
+dal numero di missioni e ordini.
+"""
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import (String, case, cast, delete, event, func, inspect, literal, select,
+                        union_all, update)
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from sqlalchemy.orm import aliased
+
+from app.extensions import db
+from app.models import Missione, Ordine, StatisticaGiornaliera
+from app.utils.helpers import parse_datetime
+
+# Giorno usato per le righe senza data (DATE non può far parte della PK se NULL)
+GIORNO_SCONOSCIUTO = date(1000, 1, 1)
+
+# Dimensioni delle missioni: nome -> attributo di raggruppamento
+DIMENSIONI_MISSIONE = {
+    'missioni_stato': 'Stato',
+    'missioni_drone': 'IdDrone',
+    'missioni_pilota': 'IdPilota'
+}
+
+# Attributi che determinano il contributo ai rollup
+ATTRIBUTI = {
+    Missione: ('DataMissione', 'Stato', 'IdDrone', 'IdPilota', 'Valutazione'),
+    Ordine: ('Orario', 'Tipo', 'PesoTotale')
+}
+
+# Metriche delle serie temporali -> dimensione dei rollup letta
+METRICHE = {
+    'missioni': 'missioni_stato',
+    'ordini': 'ordini_tipo',
+    'valutazioni': 'missioni_stato'
+}
+
+# Ampiezze dei periodi delle serie temporali
+PERIODI = ('day', 'week', 'month')
+
+# Intervallo di default delle serie temporali (fino a oggi)
+FINESTRA_SERIE = timedelta(days=30)
+
+# Numero massimo di periodi in una serie
+MAX_PERIODI = 1000
+
+
+# Presenza della tabella dei rollup per database (vedi rollup_disponibile)
+_tabella_presente = {}
+
+COLONNE = ('Dimensione', 'Giorno', 'Chiave', 'Conteggio', 'Completate',
+           'SommaValori', 'NumeroValori')
+
+
+def rollup_disponibile():
+    """
+    Verifica se la tabella StatisticaGiornaliera esiste (migrazione 0003).
+
+    Il controllo viene eseguito una volta per processo: dopo aver
+    applicato la migrazione va eseguito backend/rebuild_stats.py
+    (se la migrazione non l'ha già popolata) e riavviata l'applicazione.
+
+    Returns:
+        bool: True se i rollup vanno mantenuti e letti dalla tabella
+    """
+    url = str(db.engine.url)
+    if url not in _tabella_presente:
+        _tabella_presente[url] = inspect(db.engine).has_table(StatisticaGiornaliera.__tablename__)
+    return _tabella_presente[url]
+
+
+def _seleziona(*colonne):
+    """SELECT delle colonne, etichettate con i nomi di COLONNE."""
+    return select(*(colonna.label(nome) for colonna, nome in zip(colonne, COLONNE)))
+
+
+def _selezioni_rollup(dimensioni):
+    """
+    SELECT che calcolano i rollup dalle tabelle Missione e Ordine.
+
+    Args:
+        dimensioni: Dimensioni richieste (vedi DIMENSIONI_MISSIONE e 'ordini_tipo')
+
+    Returns:
+        list: Una SELECT per dimensione, con le colonne di COLONNE
+    """
+    selezioni = []
+    giorno_missione = func.coalesce(Missione.DataMissione, GIORNO_SCONOSCIUTO)
+    completate = func.coalesce(func.sum(case((Missione.Stato == 'completata', 1), else_=0)), 0)
+    for dimensione, attributo in DIMENSIONI_MISSIONE.items():
+        if dimensione not in dimensioni:
+            continue
+        chiave = func.coalesce(cast(getattr(Missione, attributo), String), '')
+        selezioni.append(_seleziona(
+            literal(dimensione), giorno_missione, chiave,
+            func.count(), completate,
+            func.coalesce(func.sum(Missione.Valutazione), 0), func.count(Missione.Valutazione)
+        ).group_by(giorno_missione, chiave))
+
+    if 'ordini_tipo' in dimensioni:
+        giorno_ordine = func.coalesce(func.date(Ordine.Orario), GIORNO_SCONOSCIUTO)
+        tipo = func.coalesce(Ordine.Tipo, '')
+        selezioni.append(_seleziona(
+            literal('ordini_tipo'), giorno_ordine, tipo,
+            func.count(), literal(0),
+            func.coalesce(func.sum(Ordine.PesoTotale), 0), func.count(Ordine.PesoTotale)
+        ).group_by(giorno_ordine, tipo))
+
+    return selezioni
+
+
+def sorgente_rollup(*dimensioni):
+    """
+    Entità da cui leggere i rollup delle dimensioni richieste.
+
+    Con la tabella presente è StatisticaGiornaliera; altrimenti un alias
+    con le stesse colonne su una subquery che calcola i totali dalle
+    tabelle Missione e Ordine, così le query delle statistiche restano
+    identiche.
+
+    Args:
+        *dimensioni: Dimensioni lette dalla query
+
+    Returns:
+        StatisticaGiornaliera o un suo alias
+    """
+    if rollup_disponibile():
+        return StatisticaGiornaliera
+    selezioni = _selezioni_rollup(dimensioni)
+    subquery = (selezioni[0] if len(selezioni) == 1 else union_all(*selezioni)).subquery('rollup')
+    return aliased(StatisticaGiornaliera, subquery, adapt_on_names=True)
+
+
+def giorno_da_db(giorno):
+    """
+    Converte il Giorno di un rollup nel valore esposto dalle API.
+
+    Args:
+        giorno (date): Giorno della riga di rollup
+
+    Returns:
+        date: Il giorno, None per GIORNO_SCONOSCIUTO
+    """
+    if isinstance(giorno, str):
+        giorno = date.fromisoformat(giorno)
+    return None if giorno == GIORNO_SCONOSCIUTO else giorno
+
+
+def _giorno(valore):
+    """Giorno di rollup di una data o di un datetime (None -> sconosciuto)."""
+    if isinstance(valore, str):
+        # Valori ancora in formato JSON (es: '2024-05-01' dalle route)
+        try:
+            valore = date.fromisoformat(valore[:10])
+        except ValueError:
+            valore = None
+    if valore is None:
+        return GIORNO_SCONOSCIUTO
+    if isinstance(valore, datetime):
+        return valore.date()
+    return valore
+
+
+def _chiave(valore):
+    """Chiave di rollup di un valore di raggruppamento (None -> '')."""
+    return '' if valore is None else str(valore)
+
+
+def _contributi(model, valori):
+    """
+    Righe di rollup a cui contribuisce una missione o un ordine.
+
+    Args:
+        model: Missione o Ordine
+        valori (dict): Attributo -> valore (vedi ATTRIBUTI)
+
+    Returns:
+        list: (dimensione, giorno, chiave, completate, somma, numero)
+    """
+    if model is Ordine:
+        peso = valori['PesoTotale']
+        return [('ordini_tipo', _giorno(valori['Orario']), _chiave(valori['Tipo']),
+                 0, Decimal(peso) if peso is not None else Decimal(0), int(peso is not None))]
+
+    giorno = _giorno(valori['DataMissione'])
+    completata = int(valori['Stato'] == 'completata')
+    voto = valori['Valutazione']
+    somma = Decimal(voto) if voto is not None else Decimal(0)
+    return [(dimensione, giorno, _chiave(valori[attributo]), completata, somma, int(voto is not None))
+            for dimensione, attributo in DIMENSIONI_MISSIONE.items()]
+
+
+def _differenze(rimossi, aggiunti):
+    """
+    Variazioni nette dei rollup tra i contributi rimossi e quelli aggiunti.
+
+    Args:
+        rimossi (list): Contributi da togliere (riga eliminata o valori precedenti)
+        aggiunti (list): Contributi da sommare (riga inserita o valori attuali)
+
+    Returns:
+        dict: (dimensione, giorno, chiave) -> {colonna: variazione},
+              solo per le righe che cambiano
+    """
+    differenze = {}
+    for segno, contributi in ((-1, rimossi), (1, aggiunti)):
+        for dimensione, giorno, chiave, completate, somma, numero in contributi:
+            delta = differenze.setdefault((dimensione, giorno, chiave), {
+                'Conteggio': 0, 'Completate': 0, 'SommaValori': Decimal(0), 'NumeroValori': 0
+            })
+            delta['Conteggio'] += segno
+            delta['Completate'] += segno * completate
+            delta['SommaValori'] += segno * somma
+            delta['NumeroValori'] += segno * numero
+    return {pk: delta for pk, delta in differenze.items() if any(delta.values())}
+
+
+def _valori_correnti(target, attributi):
+    """Valori attuali degli attributi dell'istanza."""
+    return {nome: getattr(target, nome) for nome in attributi}
+
+
+def _valori_precedenti(target, attributi):
+    """
+    Valori degli attributi prima delle modifiche del flush in corso.
+
+    Va chiamata in after_update: la history è azzerata solo a fine flush.
+    """
+    stato = inspect(target)
+    valori = {}
+    for nome in attributi:
+        storia = stato.attrs[nome].history
+        if storia.deleted:
+            valori[nome] = storia.deleted[0]
+        elif storia.unchanged:
+            valori[nome] = storia.unchanged[0]
+        else:
+            # Valore assente prima del flush (es: attributo appena assegnato)
+            valori[nome] = None
+    return valori
+
+
+class StatsRollup:
+    """
+    Manutenzione e ricostruzione della tabella StatisticaGiornaliera.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._eventi_registrati = False
+
+    def init_app(self, app):
+        """
+        Registra gli eventi del mapper su Missione e Ordine (una sola volta
+        per processo: gli eventi sono globali, non legati all'app).
+
+        Gli eventi non scrivono nulla se la tabella dei rollup non esiste
+        (vedi rollup_disponibile): le scritture di missioni e ordini non
+        dipendono dalla migrazione 0003.
+
+        Args:
+            app (Flask): Istanza dell'applicazione
+        """
+        with self._lock:
+            if self._eventi_registrati:
+                return
+            self._eventi_registrati = True
+
+        for model, attributi in ATTRIBUTI.items():
+            event.listen(model, 'after_insert', self._dopo_insert)
+            event.listen(model, 'after_update', self._dopo_update)
+            event.listen(model, 'before_delete', self._prima_delete)
+            for nome in attributi:
+                # active_history: il valore precedente viene caricato anche
+                # se l'attributo era scaduto (es: modifica dopo un commit)
+                event.listen(getattr(model, nome), 'set', _ignora_set, active_history=True)
+
+    def _dopo_insert(self, mapper, connection, target):
+        """La nuova riga aggiunge il proprio contributo."""
+        model = mapper.class_
+        valori = _valori_correnti(target, ATTRIBUTI[model])
+        self.applica(connection, _differenze([], _contributi(model, valori)))
+
+    def _dopo_update(self, mapper, connection, target):
+        """Sposta il contributo della riga se cambia un attributo rilevante."""
+        model = mapper.class_
+        attributi = ATTRIBUTI[model]
+        if not any(inspect(target).attrs[nome].history.has_changes() for nome in attributi):
+            return
+
+        self.applica(connection, _differenze(
+            _contributi(model, _valori_precedenti(target, attributi)),
+            _contributi(model, _valori_correnti(target, attributi))
+        ))
+
+    def _prima_delete(self, mapper, connection, target):
+        """La riga eliminata toglie il proprio contributo."""
+        model = mapper.class_
+        valori = _valori_correnti(target, ATTRIBUTI[model])
+        self.applica(connection, _differenze(_contributi(model, valori), []))
+
+    def applica(self, connection, differenze):
+        """
+        Applica le variazioni ai rollup.
+
+        Su MySQL un solo INSERT ... ON DUPLICATE KEY UPDATE per riga;
+        sugli altri database UPDATE e, se la riga non esiste, INSERT.
+        Le righe che scendono a zero missioni/ordini vengono eliminate.
+        Senza la tabella dei rollup non fa nulla.
+
+        Args:
+            connection: Connessione della transazione corrente
+            differenze (dict): Variazioni calcolate da _differenze()
+        """
+        if not differenze or not rollup_disponibile():
+            return
+
+        tabella = StatisticaGiornaliera.__table__
+        mysql = connection.dialect.name == 'mysql'
+
+        for (dimensione, giorno, chiave), delta in differenze.items():
+            pk = (tabella.c.Dimensione == dimensione, tabella.c.Giorno == giorno,
+                  tabella.c.Chiave == chiave)
+
+            if mysql:
+                stmt = mysql_insert(tabella).values(
+                    Dimensione=dimensione, Giorno=giorno, Chiave=chiave, **delta
+                )
+                connection.execute(stmt.on_duplicate_key_update(
+                    {c: tabella.c[c] + stmt.inserted[c] for c in delta}
+                ))
+            else:
+                aggiornate = connection.execute(
+                    update(tabella).where(*pk).values({c: tabella.c[c] + v for c, v in delta.items()})
+                ).rowcount
+                if not aggiornate:
+                    connection.execute(tabella.insert().values(
+                        Dimensione=dimensione, Giorno=giorno, Chiave=chiave, **delta
+                    ))
+
+            if delta['Conteggio'] < 0:
+                connection.execute(delete(tabella).where(*pk, tabella.c.Conteggio <= 0))
+
+    def rebuild(self):
+        """
+        Ricostruisce tutti i rollup dalle tabelle Missione e Ordine.
+
+        Eseguito in una sola transazione (DELETE e INSERT ... SELECT con
+        GROUP BY per ogni dimensione). Le scritture concorrenti di altre
+        transazioni durante la ricostruzione possono non essere contate:
+        va eseguito a applicazione ferma o in un momento di quiete.
+
+        Returns:
+            int: Numero di righe di rollup create
+        """
+        tabella = StatisticaGiornaliera.__table__
+
+        db.session.execute(delete(tabella))
+        for selezione in _selezioni_rollup([*DIMENSIONI_MISSIONE, 'ordini_tipo']):
+            db.session.execute(tabella.insert().from_select(list(COLONNE), selezione))
+
+        db.session.commit()
+        return db.session.query(func.count()).select_from(tabella).scalar()
+
+
+def parse_timeseries_args(args):
+    """
+    Legge metrica, intervallo e periodo di una serie dalla query string.
+
+    - metric: missioni, ordini o valutazioni (default: missioni)
+    - from / to: date ISO8601, incluse (default: ultimi 30 giorni fino a oggi)
+    - bucket: day, week o month (default: day)
+
+    Args:
+        args: request.args
+
+    Returns:
+        tuple: (metrica, inizio, fine, periodo) con inizio e fine date
+
+    Raises:
+        ValueError: Se i parametri non sono validi
+    """
+    metrica = args.get('metric', 'missioni')
+    if metrica not in METRICHE:
+        raise ValueError(f"Parametro metric non valido (ammessi: {', '.join(METRICHE)})")
+
+    periodo = args.get('bucket', 'day')
+    if periodo not in PERIODI:
+        raise ValueError(f"Parametro bucket non valido (ammessi: {', '.join(PERIODI)})")
+
+    fine = parse_datetime(args.get('to')) if args.get('to') else datetime.now()
+    if fine is None:
+        raise ValueError('Parametro to non valido (attesa data ISO8601)')
+    fine = fine.date()
+
+    inizio = parse_datetime(args.get('from')) if args.get('from') else None
+    if args.get('from') and inizio is None:
+        raise ValueError('Parametro from non valido (attesa data ISO8601)')
+    inizio = inizio.date() if inizio else fine - FINESTRA_SERIE + timedelta(days=1)
+
+    if inizio > fine:
+        raise ValueError('from non può seguire to')
+    if inizio <= GIORNO_SCONOSCIUTO:
+        raise ValueError(f'from deve essere successivo a {GIORNO_SCONOSCIUTO.isoformat()}')
+    # Il primo controllo evita di generare i periodi di intervalli enormi
+    if (fine - inizio).days > MAX_PERIODI * 31 or len(periodi(inizio, fine, periodo)) > MAX_PERIODI:
+        raise ValueError(f'Troppi periodi richiesti (massimo {MAX_PERIODI}): aumentare bucket')
+
+    return metrica, inizio, fine, periodo
+
+
+def inizio_periodo(giorno, periodo):
+    """
+    Primo giorno del periodo che contiene giorno.
+
+    Args:
+        giorno (date): Giorno qualsiasi
+        periodo (str): 'day', 'week' (settimane da lunedì) o 'month'
+
+    Returns:
+        date: Inizio del periodo
+    """
+    if periodo == 'week':
+        return giorno - timedelta(days=giorno.weekday())
+    if periodo == 'month':
+        return giorno.replace(day=1)
+    return giorno
+
+
+def periodi(inizio, fine, periodo):
+    """
+    Inizi dei periodi che coprono l'intervallo [inizio, fine].
+
+    Il primo periodo può iniziare prima di inizio (settimana o mese
+    in corso): conta comunque solo i giorni dell'intervallo.
+
+    Args:
+        inizio (date): Primo giorno dell'intervallo
+        fine (date): Ultimo giorno dell'intervallo
+        periodo (str): 'day', 'week' o 'month'
+
+    Returns:
+        list: Date di inizio dei periodi, in ordine
+    """
+    risultato = []
+    corrente = inizio_periodo(inizio, periodo)
+    while corrente <= fine:
+        risultato.append(corrente)
+        if periodo == 'month':
+            anno, mese = divmod(corrente.month, 12)
+            corrente = corrente.replace(year=corrente.year + anno, month=mese + 1)
+        else:
+            corrente += timedelta(days=7 if periodo == 'week' else 1)
+    return risultato
+
+
+def timeseries(metrica, inizio, fine, periodo):
+    """
+    Serie temporale di una metrica dai rollup giornalieri.
+
+    Una query raggruppata per giorno sulla chiave primaria
+    (Dimensione, Giorno) dell'intervallo; i giorni sono poi sommati
+    nei periodi, con valori a zero nei periodi senza dati.
+
+    Args:
+        metrica (str): 'missioni', 'ordini' o 'valutazioni'
+        inizio (date): Primo giorno incluso
+        fine (date): Ultimo giorno incluso
+        periodo (str): 'day', 'week' o 'month'
+
+    Returns:
+        list: Un dizionario per periodo, con chiave 'periodo' (data di
+              inizio ISO8601) e i valori della metrica:
+              - missioni: totale, completate
+              - ordini: totale, peso_totale
+              - valutazioni: totale (missioni valutate), media
+    """
+    rollup = sorgente_rollup(METRICHE[metrica])
+    righe = db.session.query(
+        rollup.Giorno,
+        func.sum(rollup.Conteggio),
+        func.sum(rollup.Completate),
+        func.sum(rollup.SommaValori),
+        func.sum(rollup.NumeroValori)
+    ).filter(
+        rollup.Dimensione == METRICHE[metrica],
+        rollup.Giorno >= inizio,
+        rollup.Giorno <= fine
+    ).group_by(rollup.Giorno).all()
+
+    totali = {p: [0, 0, Decimal(0), 0] for p in periodi(inizio, fine, periodo)}
+    for giorno, conteggio, completate, somma, numero in righe:
+        if isinstance(giorno, str):
+            giorno = date.fromisoformat(giorno)
+        valori = totali[inizio_periodo(giorno, periodo)]
+        valori[0] += int(conteggio)
+        valori[1] += int(completate)
+        valori[2] += Decimal(somma)
+        valori[3] += int(numero)
+
+    serie = []
+    for inizio_p, (conteggio, completate, somma, numero) in totali.items():
+        punto = {'periodo': inizio_p.isoformat()}
+        if metrica == 'missioni':
+            punto.update(totale=conteggio, completate=completate)
+        elif metrica == 'ordini':
+            punto.update(totale=conteggio, peso_totale=float(somma))
+        else:
+            punto.update(totale=numero, media=round(float(somma / numero), 2) if numero else None)
+        serie.append(punto)
+    return serie
+
+
+def _ignora_set(target, value, oldvalue, initiator):
+    """Listener vuoto: serve solo ad attivare active_history."""
+    return value
+
+
+# Istanza globale configurata da create_app()
+stats_rollup = StatsRollup()
@@ -0,0 +1,290 @@
+"""
+Servizio di archiviazione compressa dei percorsi delle missioni completate.
+
+Quando una missione passa a 'completata' le sue righe Traccia non
+cambiano più. L'archiviatore le impacchetta in un unico blob colonnare
+nella tabella TracciaArchivio:
+
+- 4 colonne: secondi dal primo punto, ID drone, latitudine e longitudine
+  (queste ultime come interi in unità di 1e-8 gradi, la precisione
+  esatta di DECIMAL(10,8)/DECIMAL(11,8): nessuna perdita di dati)
+- ogni colonna è delta-codificata (differenza dal valore precedente),
+  così i valori diventano piccoli e ripetitivi
+- il tutto è compresso con zlib
+
+Le letture dello storico vengono poi servite dal blob con una singola
+query per chiave primaria, più le eventuali righe Traccia successive
+all'archiviazione. Opzionalmente (prune=True) le righe Traccia della
+missione vengono eliminate, mantenendo piccola la tabella "calda".
+
+La tabella TracciaArchivio è creata dalla migrazione 0001: finché non è
+applicata archivio_disponibile() è False e le letture usano solo Traccia.
+
+Funzioni:
+- archivio_disponibile(): True se la tabella TracciaArchivio esiste
+- pack_tracce(righe) / unpack_tracce(blob): codifica e decodifica del blob
+- archive_mission(missione_id, prune): crea o aggiorna l'archivio
+- load_archived_points(missione_id): punti archiviati (o None)
+- load_archived_drone_points(drone_id, inizio, fine): punti archiviati
+  di un drone in un intervallo di tempo
+"""
+import struct
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Import NumPy per la codifica delta colonnare
+import numpy as np
+from sqlalchemy import inspect
+
+from app.extensions import db
+from app.models import Missione, Traccia, TracciaArchivio
+
+# Intestazione del blob: identificativo formato + numero punti + epoch base
+MAGIC = b'TRA1'
+HEADER = struct.Struct('<4sIq')
+
+# Fattore di scala delle coordinate (8 decimali come nelle colonne DECIMAL)
+SCALA = 10 ** 8
+
+# Riferimento per i timestamp naive (nessuna conversione di fuso orario)
+EPOCH = datetime(1970, 1, 1)
+
+# Presenza della tabella TracciaArchivio per database (URL del motore)
+_tabella_presente = {}
+
+
+def archivio_disponibile():
+    """
+    Verifica se la tabella TracciaArchivio esiste (migrazione 0001).
+
+    Il controllo viene eseguito una volta per processo: dopo aver
+    applicato la migrazione l'applicazione va riavviata.
+
+    Returns:
+        bool: True se l'archivio compresso è utilizzabile
+    """
+    url = str(db.engine.url)
+    if url not in _tabella_presente:
+        _tabella_presente[url] = inspect(db.engine).has_table(TracciaArchivio.__tablename__)
+    return _tabella_presente[url]
+
+
+def _secondi(istante):
+    """Converte un datetime naive in secondi da EPOCH."""
+    return int((istante - EPOCH).total_seconds())
+
+
+def _coordinata_intera(valore):
+    """Converte una coordinata (Decimal o float) in intero 1e-8 gradi."""
+    if isinstance(valore, Decimal):
+        return int(valore.scaleb(8).to_integral_value())
+    return int(round(float(valore) * SCALA))
+
+
+def pack_tracce(righe):
+    """
+    Codifica un percorso in un blob colonnare compresso.
+
+    Args:
+        righe: Sequenza ordinata di tuple (timestamp, drone_id, lat, lng)
+
+    Returns:
+        bytes: Blob compresso
+    """
+    n = len(righe)
+    base = _secondi(righe[0][0]) if n else 0
+
+    colonne = np.empty((4, n), dtype=np.int64)
+    for i, (timestamp, drone_id, lat, lng) in enumerate(righe):
+        colonne[0, i] = _secondi(timestamp) - base
+        colonne[1, i] = drone_id or 0
+        colonne[2, i] = _coordinata_intera(lat)
+        colonne[3, i] = _coordinata_intera(lng)
+
+    # Delta encoding per colonna (il primo valore resta assoluto)
+    delta = np.diff(colonne, axis=1, prepend=0)
+
+    corpo = zlib.compress(delta.astype('<i8').tobytes(), 9)
+    return HEADER.pack(MAGIC, n, base) + corpo
+
+
+def unpack_tracce(blob):
+    """
+    Decodifica un blob prodotto da pack_tracce().
+
+    Args:
+        blob (bytes): Blob compresso
+
+    Returns:
+        tuple: (timestamp, drone, lat, lng) come array NumPy;
+               timestamp in secondi da EPOCH, lat/lng in gradi (float)
+
+    Raises:
+        ValueError: Se il blob non è in un formato riconosciuto
+    """
+    magic, n, base = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError('Formato archivio tracce non riconosciuto')
+
+    delta = np.frombuffer(zlib.decompress(blob[HEADER.size:]), dtype='<i8').reshape(4, n)
+    colonne = np.cumsum(delta, axis=1)
+
+    return (
+        colonne[0] + base,
+        colonne[1],
+        colonne[2] / SCALA,
+        colonne[3] / SCALA
+    )
+
+
+def archive_mission(missione_id, prune=False):
+    """
+    Archivia il percorso di una missione completata.
+
+    Se l'archivio esiste già viene ricostruito includendo eventuali
+    punti arrivati in ritardo. Non esegue il commit.
+
+    Args:
+        missione_id (int): ID della missione
+        prune (bool): Se True elimina le righe Traccia archiviate
+
+    Returns:
+        TracciaArchivio: Archivio creato/aggiornato, None se non ci sono punti
+
+    Raises:
+        ValueError: Se la missione non esiste o non è completata, o se
+                    la tabella TracciaArchivio non esiste
+    """
+    if not archivio_disponibile():
+        raise ValueError('Archivio tracce non disponibile: applicare la migrazione 0001')
+
+    missione = Missione.query.get(missione_id)
+    if missione is None:
+        raise ValueError('Missione non trovata')
+    if missione.Stato != 'completata':
+        raise ValueError('Solo le missioni completate possono essere archiviate')
+
+    archivio = TracciaArchivio.query.get(missione_id)
+
+    righe = db.session.query(
+        Traccia.TIMESTAMP, Traccia.ID_Drone, Traccia.Latitudine, Traccia.Longitudine
+    ).filter(
+        Traccia.ID_Missione == missione_id
+    ).order_by(Traccia.TIMESTAMP.asc()).all()
+
+    # Punti già archiviati in precedenza (se le righe erano state eliminate)
+    if archivio is not None and archivio.Dati:
+        esistenti = {r[0] for r in righe}
+        for punto in _punti_da_blob(archivio.Dati, missione_id):
+            istante = datetime.fromisoformat(punto['timestamp'])
+            if istante not in esistenti:
+                righe.append((istante, punto['drone_id'], punto['lat'], punto['lng']))
+        righe.sort(key=lambda r: r[0])
+
+    if not righe:
+        return None
+
+    if archivio is None:
+        archivio = TracciaArchivio(ID_Missione=missione_id)
+        db.session.add(archivio)
+
+    archivio.NumeroPunti = len(righe)
+    archivio.TimestampInizio = righe[0][0]
+    archivio.TimestampFine = righe[-1][0]
+    archivio.Dati = pack_tracce(righe)
+    archivio.CreatoIl = datetime.now()
+
+    if prune:
+        Traccia.query.filter_by(ID_Missione=missione_id).delete(synchronize_session=False)
+
+    return archivio
+
+
+def load_archived_points(missione_id):
+    """
+    Ritorna i punti archiviati di una missione nel formato Traccia.to_dict().
+
+    Aggiunge le righe Traccia con timestamp successivo all'ultimo punto
+    archiviato: punti arrivati dopo l'archiviazione (es: flush ritardato
+    del buffer write-behind) che l'archivio non contiene ancora.
+
+    Args:
+        missione_id (int): ID della missione
+
+    Returns:
+        list: Punti ordinati per timestamp, o None se la missione
+              non è archiviata (o l'archivio non è disponibile)
+    """
+    if not archivio_disponibile():
+        return None
+
+    archivio = db.session.query(TracciaArchivio.Dati, TracciaArchivio.TimestampFine).filter(
+        TracciaArchivio.ID_Missione == missione_id
+    ).first()
+    if archivio is None or archivio.Dati is None:
+        return None
+
+    punti = _punti_da_blob(archivio.Dati, missione_id)
+
+    successive = Traccia.query.filter(
+        Traccia.ID_Missione == missione_id,
+        Traccia.TIMESTAMP > archivio.TimestampFine
+    ).order_by(Traccia.TIMESTAMP.asc()).all()
+    punti.extend(t.to_dict() for t in successive)
+    return punti
+
+
+def load_archived_drone_points(drone_id, inizio, fine, escludi=()):
+    """
+    Ritorna i punti archiviati di un drone in un intervallo di tempo.
+
+    Serve per le missioni le cui righe Traccia sono state eliminate
+    dopo l'archiviazione. Vengono lette solo le missioni del drone il
+    cui percorso si sovrappone all'intervallo.
+
+    Args:
+        drone_id (int): ID del drone
+        inizio (datetime): Inizio dell'intervallo (incluso)
+        fine (datetime): Fine dell'intervallo (incluso)
+        escludi: ID delle missioni da ignorare (es: già lette da Traccia)
+
+    Returns:
+        list: Punti (formato Traccia.to_dict()) del drone nell'intervallo
+    """
+    if not archivio_disponibile():
+        return []
+
+    query = db.session.query(TracciaArchivio.ID_Missione, TracciaArchivio.Dati).join(
+        Missione, Missione.ID == TracciaArchivio.ID_Missione
+    ).filter(
+        Missione.IdDrone == drone_id,
+        TracciaArchivio.TimestampInizio <= fine,
+        TracciaArchivio.TimestampFine >= inizio
+    )
+    if escludi:
+        query = query.filter(TracciaArchivio.ID_Missione.notin_(escludi))
+
+    soglia_inizio = inizio.isoformat()
+    soglia_fine = fine.isoformat()
+    punti = []
+    for missione_id, dati in query.all():
+        punti.extend(
+            p for p in _punti_da_blob(dati, missione_id)
+            if p['drone_id'] == drone_id and soglia_inizio <= p['timestamp'] <= soglia_fine
+        )
+    return punti
+
+
+def _punti_da_blob(blob, missione_id):
+    """Decodifica un blob in una lista di dizionari punto."""
+    istanti, droni, lat, lng = unpack_tracce(blob)
+    return [{
+        'drone_id': drone_id,
+        'missione_id': missione_id,
+        'lat': la,
+        'lng': ln,
+        'timestamp': (EPOCH + timedelta(seconds=istante)).isoformat()
+    } for istante, drone_id, la, ln in zip(
+        istanti.tolist(), droni.tolist(), lat.tolist(), lng.tolist()
+    )]
@@ -0,0 +1,321 @@
+"""
+Buffer write-behind per i singoli punti GPS.
+
+Con decine di droni che inviano una posizione al secondo, le route
+POST /api/tracce e POST /api/missioni/<id>/tracce eseguirebbero un
+commit (checkout dal pool + fsync) per ogni richiesta HTTP.
+
+In modalità write-behind (opt-in, TRACCE_WRITE_BEHIND=true):
+- la route valida il punto, lo accoda e risponde subito 202 Accepted
+- un thread in background scrive i punti accodati con un'unica
+  INSERT multi-riga quando si raggiunge TRACCE_BUFFER_MAX_SIZE punti
+  oppure quando il punto più vecchio supera TRACCE_BUFFER_MAX_AGE secondi
+- alla chiusura del processo il buffer viene svuotato (atexit)
+- gli stream live e la cache delle posizioni vengono notificati solo
+  dopo il commit, quindi vedono esclusivamente punti salvati
+
+Gestione degli errori di scrittura:
+- errori sui dati (vincoli, valori non accettati): il batch viene diviso
+  a metà ricorsivamente, così viene scartato solo il punto che fallisce
+  e non l'intero batch con i punti degli altri droni
+- altri errori (database non raggiungibile, timeout): il batch torna in
+  testa alla coda e viene ritentato con attesa esponenziale (max_age,
+  2*max_age, ... fino a TRACCE_BUFFER_BACKOFF_MAX secondi), anche se la
+  coda supera la soglia di dimensione
+- la coda ha una lunghezza massima (TRACCE_BUFFER_MAX_CODA): durante un
+  disservizio prolungato i punti oltre il limite vengono scartati e
+  contati in 'righe_perse'
+
+Metriche esposte da metrics(): profondità coda, numero e latenza dei
+flush, righe scritte, duplicate, scartate e perse, errori (GET
+/api/tracce/buffer per gli admin).
+
+Il buffer è process-local: i punti accodati e non ancora scritti
+vanno persi solo in caso di terminazione forzata del processo.
+"""
+import atexit
+import threading
+import time
+from datetime import datetime
+
+
+class TrackWriteBuffer:
+    """
+    Coda in memoria di righe Traccia con flusher in background.
+
+    Le righe sono dizionari nel formato prodotto da
+    app.services.track_ingest.validate_traccia() con ID_Drone risolto.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.abilitato = False
+        self.max_size = 200
+        self.max_age = 1.0
+        self.max_coda = 50000
+        self.backoff_max = 30.0
+
+        self._righe = []
+        self._primo_accodamento = None
+        self._riprova_dopo = None   # Istante (monotonic) del prossimo tentativo
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = False
+
+        # Metriche (aggiornate e lette con lock)
+        self._flush_totali = 0
+        self._righe_scritte = 0
+        self._righe_duplicate = 0
+        self._righe_scartate = 0
+        self._righe_perse = 0
+        self._errori = 0
+        self._tentativi = 0
+        self._ultimo_flush_ms = None
+        self._max_flush_ms = 0.0
+        self._somma_flush_ms = 0.0
+        self._ultimo_flush = None
+
+    def init_app(self, app):
+        """
+        Configura il buffer dai parametri dell'applicazione.
+
+        Il thread di flush viene avviato solo al primo punto accodato,
+        così processi che non ricevono tracce non lo creano.
+
+        Args:
+            app (Flask): Istanza dell'applicazione
+        """
+        self.app = app
+        self.abilitato = app.config.get('TRACCE_WRITE_BEHIND', False)
+        self.max_size = app.config.get('TRACCE_BUFFER_MAX_SIZE', self.max_size)
+        self.max_age = app.config.get('TRACCE_BUFFER_MAX_AGE', self.max_age)
+        self.max_coda = app.config.get('TRACCE_BUFFER_MAX_CODA', self.max_coda)
+        self.backoff_max = app.config.get('TRACCE_BUFFER_BACKOFF_MAX', self.backoff_max)
+
+    def enqueue(self, riga):
+        """
+        Accoda un punto GPS già validato.
+
+        Args:
+            riga (dict): Colonne di Traccia (ID_Drone, ID_Missione,
+                         Latitudine, Longitudine, TIMESTAMP)
+        """
+        with self._cond:
+            self._avvia_thread()
+            if len(self._righe) >= self.max_coda:
+                # Coda piena (database non raggiungibile da tempo)
+                self._righe_perse += 1
+                return
+            primo = not self._righe
+            if primo:
+                self._primo_accodamento = time.monotonic()
+            self._righe.append(riga)
+            # Sveglia il flusher: al primo punto per avviare il timer
+            # dell'età, alla soglia di dimensione per scrivere subito
+            if primo or len(self._righe) >= self.max_size:
+                self._cond.notify()
+
+    def flush(self):
+        """
+        Scrive subito tutte le righe in coda (usato anche allo shutdown).
+
+        Returns:
+            int: Numero di righe scritte
+        """
+        with self._cond:
+            batch = self._preleva()
+        return self._scrivi(batch)
+
+    def shutdown(self):
+        """
+        Ferma il thread di flush e scrive le righe rimaste in coda.
+        """
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+    def metrics(self):
+        """
+        Ritorna le metriche correnti del buffer.
+
+        Returns:
+            dict: Profondità coda e statistiche dei flush
+        """
+        with self._cond:
+            media = self._somma_flush_ms / self._flush_totali if self._flush_totali else None
+            return {
+                'abilitato': self.abilitato,
+                'in_coda': len(self._righe),
+                'eta_coda_s': (
+                    round(time.monotonic() - self._primo_accodamento, 3)
+                    if self._righe else None
+                ),
+                'max_size': self.max_size,
+                'max_age_s': self.max_age,
+                'flush_totali': self._flush_totali,
+                'righe_scritte': self._righe_scritte,
+                'righe_duplicate': self._righe_duplicate,
+                'righe_scartate': self._righe_scartate,
+                'righe_perse': self._righe_perse,
+                'max_coda': self.max_coda,
+                'errori': self._errori,
+                'tentativi_consecutivi': self._tentativi,
+                'ultimo_flush_ms': self._ultimo_flush_ms,
+                'media_flush_ms': round(media, 2) if media is not None else None,
+                'max_flush_ms': round(self._max_flush_ms, 2),
+                'ultimo_flush': self._ultimo_flush.isoformat() if self._ultimo_flush else None
+            }
+
+    # ========== METODI INTERNI ==========
+
+    def _avvia_thread(self):
+        """
+        Avvia il thread di flush se non è attivo (chiamare con lock).
+
+        Un thread terminato per un errore imprevisto viene sostituito.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        primo_avvio = self._thread is None
+        self._stop = False
+        self._thread = threading.Thread(
+            target=self._loop, name='tracce-write-behind', daemon=True
+        )
+        self._thread.start()
+        if primo_avvio:
+            atexit.register(self.shutdown)
+
+    def _preleva(self):
+        """Estrae tutte le righe in coda (chiamare con lock)."""
+        batch = self._righe
+        self._righe = []
+        self._primo_accodamento = None
+        return batch
+
+    def _loop(self):
+        """Ciclo del thread: attende soglia di dimensione o di età."""
+        while True:
+            with self._cond:
+                while not self._stop:
+                    # Attesa dopo un errore: prevale sulle soglie
+                    if self._riprova_dopo is not None:
+                        attesa = self._riprova_dopo - time.monotonic()
+                        if attesa > 0:
+                            self._cond.wait(timeout=attesa)
+                            continue
+                    if len(self._righe) >= self.max_size:
+                        break
+                    if self._righe:
+                        attesa = self.max_age - (time.monotonic() - self._primo_accodamento)
+                        if attesa <= 0:
+                            break
+                    else:
+                        attesa = None
+                    self._cond.wait(timeout=attesa)
+                if self._stop:
+                    return
+                batch = self._preleva()
+            self._scrivi(batch)
+
+    def _scrivi(self, batch):
+        """
+        Scrive un batch con una INSERT multi-riga e notifica i client live.
+
+        Conta e pubblica solo le righe effettivamente inserite (i punti
+        già presenti nel database sono esclusi da insert_tracce()).
+
+        Returns:
+            int: Numero di righe scritte
+        """
+        if not batch:
+            return 0
+
+        # Import ritardati per evitare import circolari con i modelli
+        from sqlalchemy.exc import DataError, IntegrityError
+        from app.extensions import db
+        from app.services.track_ingest import insert_tracce, riga_to_dict
+        from app.services.tracking_service import publish_tracce
+
+        inizio = time.perf_counter()
+        with self.app.app_context():
+            try:
+                scritte, duplicate = insert_tracce(batch)
+                db.session.commit()
+                errore = None
+            except Exception as e:
+                db.session.rollback()
+                errore = e
+            else:
+                # Punti già salvati: un errore della notifica non va ritentato
+                try:
+                    publish_tracce([riga_to_dict(r) for r in scritte])
+                except Exception:
+                    self.app.logger.exception('Write-behind tracce: notifica dei punti scritti fallita')
+
+        if errore is not None:
+            with self._cond:
+                self._errori += 1
+            if isinstance(errore, (DataError, IntegrityError)):
+                return self._dividi(batch, errore)
+            self._rimetti_in_coda(batch, errore)
+            return 0
+
+        durata_ms = (time.perf_counter() - inizio) * 1000
+        with self._cond:
+            self._tentativi = 0
+            self._riprova_dopo = None
+            self._flush_totali += 1
+            self._righe_scritte += len(scritte)
+            self._righe_duplicate += len(duplicate)
+            self._ultimo_flush_ms = round(durata_ms, 2)
+            self._somma_flush_ms += durata_ms
+            self._max_flush_ms = max(self._max_flush_ms, durata_ms)
+            self._ultimo_flush = datetime.now()
+        return len(scritte)
+
+    def _dividi(self, batch, errore):
+        """
+        Isola le righe rifiutate dal database dividendo il batch a metà.
+
+        Le altre righe vengono scritte normalmente; una riga singola che
+        fallisce viene scartata e registrata nel log.
+        """
+        if len(batch) == 1:
+            self.app.logger.error('Write-behind tracce: punto scartato %s', batch[0], exc_info=errore)
+            with self._cond:
+                self._righe_scartate += 1
+            return 0
+
+        meta = len(batch) // 2
+        return self._scrivi(batch[:meta]) + self._scrivi(batch[meta:])
+
+    def _rimetti_in_coda(self, batch, errore):
+        """
+        Rimette in testa alla coda un batch fallito per un errore transitorio.
+
+        Il tentativo successivo avviene dopo un'attesa esponenziale; il
+        traceback è registrato solo al primo errore della serie.
+        """
+        with self._cond:
+            self._tentativi += 1
+            attesa = min(self.max_age * 2 ** (self._tentativi - 1), self.backoff_max)
+            self._riprova_dopo = time.monotonic() + attesa
+            self.app.logger.error(
+                'Write-behind tracce: flush fallito (%d punti, tentativo %d), nuovo tentativo tra %.1f s',
+                len(batch), self._tentativi, attesa,
+                exc_info=errore if self._tentativi == 1 else None
+            )
+            self._righe = batch + self._righe
+            if len(self._righe) > self.max_coda:
+                # Scarta i punti più recenti oltre la lunghezza massima
+                self._righe_perse += len(self._righe) - self.max_coda
+                del self._righe[self.max_coda:]
+            self._primo_accodamento = time.monotonic()
+
+
+# Istanza condivisa dal processo
+track_buffer = TrackWriteBuffer()
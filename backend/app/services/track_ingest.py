@@ -0,0 +1,327 @@
+"""
+Servizio per l'inserimento set-based delle tracce GPS.
+
+Le stazioni di terra dei piloti caricano batch di migliaia di punti
+dopo un periodo senza connettività. Inserirli uno alla volta, con una
+query per risolvere il drone di ogni punto, tiene occupata una
+connessione al DB per secondi.
+
+Questo servizio elabora il batch in tre passi:
+1. validate_traccia(): controllo formale di ogni riga, senza query
+2. prepare_tracce(): risoluzione missione -> drone con una sola query IN
+   per tutte le missioni distinte (più una per verificare i droni)
+3. insert_tracce(): esclude i punti già presenti nel database (una query
+   sull'indice ID_Missione, TIMESTAMP) e inserisce gli altri con una
+   INSERT multi-riga (executemany)
+
+ingest_tracce() esegue i tre passi per un batch; registra_traccia() salva
+un singolo punto già validato, direttamente o tramite il buffer
+write-behind. Le righe non valide non vengono
+scartate in silenzio: ogni scarto, compresi i punti già presenti, viene
+riportato con l'indice della riga e il motivo.
+
+Uso tipico:
+    scritte, scartate = ingest_tracce(data['tracce'])
+    db.session.commit()
+    publish_tracce([riga_to_dict(r) for r in scritte])
+"""
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import Traccia, Missione, Drone
+from app.models.traccia import timestamp_corrente
+from app.services.track_buffer import track_buffer
+from app.services.tracking_service import publish_tracce
+from app.utils.helpers import parse_datetime
+
+
+def validate_traccia(dati):
+    """
+    Valida formalmente un punto GPS ricevuto dal client.
+
+    Non esegue query: la risoluzione del drone dalla missione è
+    demandata a prepare_tracce() per poterla fare in blocco.
+
+    Args:
+        dati (dict): Punto con missione_id, lat, lng e opzionali
+                     drone_id e timestamp (ISO8601)
+
+    Returns:
+        tuple: (riga, errore) dove riga è un dict con le colonne di
+               Traccia (ID_Drone può essere None) ed errore è None
+               se il punto è valido, altrimenti un messaggio
+    """
+    if not isinstance(dati, dict):
+        return None, 'Formato non valido'
+
+    missione_id = dati.get('missione_id')
+    lat = dati.get('lat')
+    lng = dati.get('lng')
+
+    if missione_id is None or lat is None or lng is None:
+        return None, 'missione_id, lat e lng richiesti'
+
+    try:
+        missione_id = int(missione_id)
+        drone_id = int(dati['drone_id']) if dati.get('drone_id') else None
+        lat = float(lat)
+        lng = float(lng)
+    except (TypeError, ValueError):
+        return None, 'Valori numerici non validi'
+
+    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+        return None, 'Coordinate fuori range'
+
+    # Stessa precisione delle colonne DECIMAL: i punti pubblicati
+    # coincidono con quelli salvati
+    lat = round(lat, 8)
+    lng = round(lng, 8)
+
+    # Timestamp del rilevamento: fondamentale per i batch caricati in
+    # differita, altrimenti tutti i punti avrebbero l'ora di arrivo
+    timestamp = None
+    if dati.get('timestamp'):
+        timestamp = parse_datetime(dati['timestamp'])
+        if timestamp is None:
+            return None, 'timestamp non valido (atteso ISO8601)'
+        # Stessa precisione della colonna DATETIME
+        timestamp = timestamp.replace(microsecond=0)
+
+    return {
+        'ID_Drone': drone_id,
+        'ID_Missione': missione_id,
+        'Latitudine': lat,
+        'Longitudine': lng,
+        'TIMESTAMP': timestamp or timestamp_corrente()
+    }, None
+
+
+def prepare_tracce(items):
+    """
+    Valida un batch di punti e risolve i droni mancanti in blocco.
+
+    Esegue al massimo due query indipendentemente dalla dimensione
+    del batch: una IN sulle missioni distinte e una IN sui droni
+    indicati esplicitamente.
+
+    Args:
+        items (list): Punti GPS ricevuti dal client
+
+    Returns:
+        tuple: (righe, scartate)
+            - righe: Lista di (indice, riga) con riga pronta per insert_tracce()
+            - scartate: Lista di {'indice', 'errore'} per le righe rifiutate
+    """
+    candidate = []
+    scartate = []
+
+    # 1. Validazione formale riga per riga (nessuna query)
+    for indice, dati in enumerate(items):
+        riga, errore = validate_traccia(dati)
+        if errore:
+            scartate.append({'indice': indice, 'errore': errore})
+        else:
+            candidate.append((indice, riga))
+
+    if not candidate:
+        return [], scartate
+
+    # 2. Risoluzione missione -> drone con una sola query IN
+    missioni_ids = {riga['ID_Missione'] for _, riga in candidate}
+    droni_missione = dict(
+        db.session.query(Missione.ID, Missione.IdDrone)
+        .filter(Missione.ID.in_(missioni_ids))
+        .all()
+    )
+
+    # Verifica esistenza dei droni indicati esplicitamente (evita che
+    # una FK non valida faccia fallire l'intero batch)
+    droni_espliciti = {riga['ID_Drone'] for _, riga in candidate if riga['ID_Drone']}
+    droni_esistenti = set()
+    if droni_espliciti:
+        droni_esistenti = {
+            drone_id for (drone_id,) in
+            db.session.query(Drone.ID).filter(Drone.ID.in_(droni_espliciti)).all()
+        }
+
+    righe = []
+    chiavi = set()
+    for indice, riga in candidate:
+        if riga['ID_Missione'] not in droni_missione:
+            scartate.append({'indice': indice, 'errore': 'Missione inesistente'})
+            continue
+
+        if riga['ID_Drone'] is None:
+            riga['ID_Drone'] = droni_missione[riga['ID_Missione']]
+            if riga['ID_Drone'] is None:
+                scartate.append({'indice': indice, 'errore': 'drone_id richiesto (missione senza drone)'})
+                continue
+        elif riga['ID_Drone'] not in droni_esistenti:
+            scartate.append({'indice': indice, 'errore': 'Drone inesistente'})
+            continue
+
+        # La PK (drone, missione, timestamp) deve essere unica nel batch
+        chiave = (riga['ID_Drone'], riga['ID_Missione'], riga['TIMESTAMP'])
+        if chiave in chiavi:
+            scartate.append({'indice': indice, 'errore': 'Punto duplicato (stesso drone, missione e timestamp)'})
+            continue
+        chiavi.add(chiave)
+
+        righe.append((indice, riga))
+
+    scartate.sort(key=lambda s: s['indice'])
+    return righe, scartate
+
+
+def ingest_tracce(items):
+    """
+    Valida, risolve e inserisce un batch di punti GPS.
+
+    Non esegue il commit: resta a carico del chiamante.
+
+    Args:
+        items (list): Punti GPS ricevuti dal client
+
+    Returns:
+        tuple: (scritte, scartate)
+            - scritte: Righe effettivamente inserite (da pubblicare dopo il commit)
+            - scartate: Lista di {'indice', 'errore'}, ordinata per indice
+    """
+    candidate, scartate = prepare_tracce(items)
+    indici = {id(riga): indice for indice, riga in candidate}
+
+    scritte, duplicate = insert_tracce([riga for _, riga in candidate])
+
+    if duplicate:
+        scartate.extend(
+            {'indice': indici[id(riga)], 'errore': 'Punto già presente (stesso drone, missione e timestamp)'}
+            for riga in duplicate
+        )
+        scartate.sort(key=lambda s: s['indice'])
+    return scritte, scartate
+
+
+def _chiave(riga):
+    """Chiave primaria di una riga Traccia."""
+    return (riga['ID_Drone'], riga['ID_Missione'], riga['TIMESTAMP'])
+
+
+def _chiavi_presenti(righe):
+    """
+    Chiavi primarie delle righe già presenti nel database.
+
+    Una sola query sull'indice (ID_Missione, TIMESTAMP): missioni del
+    batch nell'intervallo di timestamp del batch.
+    """
+    timestamp = [riga['TIMESTAMP'] for riga in righe]
+    return set(
+        db.session.query(Traccia.ID_Drone, Traccia.ID_Missione, Traccia.TIMESTAMP)
+        .filter(
+            Traccia.ID_Missione.in_({riga['ID_Missione'] for riga in righe}),
+            Traccia.TIMESTAMP >= min(timestamp),
+            Traccia.TIMESTAMP <= max(timestamp)
+        )
+        .all()
+    )
+
+
+def insert_tracce(righe):
+    """
+    Inserisce un insieme di tracce con un'unica INSERT multi-riga.
+
+    Usa executemany tramite la Core API di SQLAlchemy (nessun oggetto
+    ORM). I punti già presenti nel database (stessa PK, es: batch
+    ricaricato dopo un timeout) o ripetuti nel batch vengono esclusi
+    prima dell'inserimento e restituiti come duplicati.
+
+    Se un'altra transazione inserisce gli stessi punti nel frattempo
+    l'INSERT fallisce per la PK: la sessione viene annullata (rollback),
+    i punti presenti ricalcolati e l'inserimento ritentato una volta.
+    Va quindi chiamata in una transazione che contiene solo le tracce.
+
+    Non esegue il commit: resta a carico del chiamante.
+
+    Args:
+        righe (list): Dict con le colonne di Traccia (ID_Drone risolto)
+
+    Returns:
+        tuple: (scritte, duplicate) liste delle righe inserite e di
+               quelle escluse perché già presenti
+    """
+    if not righe:
+        return [], []
+
+    for tentativo in range(2):
+        presenti = _chiavi_presenti(righe)
+        scritte, duplicate = [], []
+        for riga in righe:
+            chiave = _chiave(riga)
+            if chiave in presenti:
+                duplicate.append(riga)
+            else:
+                presenti.add(chiave)
+                scritte.append(riga)
+
+        if not scritte:
+            return scritte, duplicate
+
+        try:
+            db.session.execute(insert(Traccia.__table__), scritte)
+            return scritte, duplicate
+        except IntegrityError:
+            db.session.rollback()
+            if tentativo:
+                raise
+
+
+def registra_traccia(riga, stato_missione):
+    """
+    Salva un singolo punto già validato e notifica gli stream live.
+
+    Usato da POST /api/tracce e POST /api/missioni/<id>/tracce: in
+    scrittura diretta e in write-behind il punto ha lo stesso timestamp
+    (quello del client, se indicato) e la stessa gestione dei duplicati.
+
+    Esegue il commit in scrittura diretta.
+
+    Args:
+        riga (dict): Colonne di Traccia (da validate_traccia(), ID_Drone risolto)
+        stato_missione (str): Stato corrente della missione del punto
+
+    Returns:
+        tuple: (punto, esito) con esito 'scritta', 'in_coda' o 'duplicata'
+    """
+    punto = riga_to_dict(riga)
+
+    # Modalità write-behind: accoda e conferma subito
+    if track_buffer.abilitato:
+        track_buffer.enqueue(riga)
+        return punto, 'in_coda'
+
+    scritte, _ = insert_tracce([riga])
+    if not scritte:
+        db.session.rollback()
+        return punto, 'duplicata'
+    db.session.commit()
+
+    publish_tracce([punto], {riga['ID_Missione']: stato_missione})
+    return punto, 'scritta'
+
+
+def riga_to_dict(riga):
+    """
+    Converte una riga di inserimento nel formato di Traccia.to_dict().
+
+    Args:
+        riga (dict): Colonne di Traccia
+
+    Returns:
+        dict: Punto JSON-serializzabile
+    """
+    return {
+        'drone_id': riga['ID_Drone'],
+        'missione_id': riga['ID_Missione'],
+        'lat': float(riga['Latitudine']),
+        'lng': float(riga['Longitudine']),
+        'timestamp': riga['TIMESTAMP'].isoformat()
+    }
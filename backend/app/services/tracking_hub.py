@@ -0,0 +1,128 @@
+"""
+Hub publish/subscribe in-process per le posizioni live dei droni.
+
+Collega le route che registrano nuove tracce GPS (POST /api/tracce,
+/api/tracce/bulk, /api/missioni/<id>/tracce) agli stream Server-Sent
+Events aperti dai client (GET /api/tracce/missione/<id>/stream).
+
+Invece di far interrogare il database a ogni client ogni 3 secondi,
+ogni nuovo punto viene pubblicato una sola volta sull'hub e inoltrato
+a tutti gli iscritti della missione: il costo lato DB diventa una
+query per punto, indipendente dal numero di client collegati.
+
+Caratteristiche:
+- Una coda per ogni iscritto, con dimensione massima: un client lento
+  perde i punti più vecchi invece di far crescere la memoria
+- Thread-safe: publish e subscribe possono avvenire da thread diversi
+  (il server di sviluppo Flask gestisce ogni richiesta in un thread)
+- Process-local: con più processi worker ogni processo ha il suo hub,
+  quindi gli stream ricevono solo i punti scritti dallo stesso processo
+
+Uso tipico:
+    from app.services.tracking_hub import tracking_hub
+
+    coda = tracking_hub.subscribe(missione_id)
+    try:
+        evento = coda.get(timeout=15)
+    finally:
+        tracking_hub.unsubscribe(missione_id, coda)
+"""
+import queue
+import threading
+
+
+class TrackingHub:
+    """
+    Registro degli iscritti agli aggiornamenti live per missione.
+
+    Ogni iscritto riceve una queue.Queue su cui vengono inserite
+    tuple (evento, dati), dove evento è 'posizione' per un nuovo punto
+    GPS o 'stato' per un cambio di stato della missione.
+    """
+
+    def __init__(self, max_coda=100):
+        """
+        Args:
+            max_coda (int): Numero massimo di eventi in attesa per iscritto
+        """
+        self.max_coda = max_coda
+        # missione_id -> set di code degli iscritti
+        self._iscritti = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, missione_id):
+        """
+        Registra un nuovo iscritto agli eventi di una missione.
+
+        Args:
+            missione_id (int): ID della missione da seguire
+
+        Returns:
+            queue.Queue: Coda su cui arriveranno gli eventi
+        """
+        coda = queue.Queue(maxsize=self.max_coda)
+        with self._lock:
+            self._iscritti.setdefault(missione_id, set()).add(coda)
+        return coda
+
+    def unsubscribe(self, missione_id, coda):
+        """
+        Rimuove un iscritto (chiamato alla chiusura dello stream).
+
+        Args:
+            missione_id (int): ID della missione
+            coda (queue.Queue): Coda ritornata da subscribe()
+        """
+        with self._lock:
+            code = self._iscritti.get(missione_id)
+            if code is None:
+                return
+            code.discard(coda)
+            if not code:
+                del self._iscritti[missione_id]
+
+    def publish(self, missione_id, evento, dati):
+        """
+        Inoltra un evento a tutti gli iscritti di una missione.
+
+        Non blocca mai: se la coda di un iscritto è piena viene
+        scartato l'evento più vecchio per fare spazio al nuovo.
+
+        Args:
+            missione_id (int): ID della missione
+            evento (str): Tipo evento ('posizione' o 'stato')
+            dati (dict): Payload JSON-serializzabile dell'evento
+        """
+        with self._lock:
+            code = list(self._iscritti.get(missione_id, ()))
+
+        for coda in code:
+            try:
+                coda.put_nowait((evento, dati))
+            except queue.Full:
+                # Client troppo lento: scarta l'evento più vecchio
+                try:
+                    coda.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    coda.put_nowait((evento, dati))
+                except queue.Full:
+                    pass
+
+    def subscriber_count(self, missione_id):
+        """
+        Ritorna il numero di iscritti attivi per una missione.
+
+        Args:
+            missione_id (int): ID della missione
+
+        Returns:
+            int: Numero di stream aperti
+        """
+        with self._lock:
+            return len(self._iscritti.get(missione_id, ()))
+
+
+# Istanza condivisa dal processo, usata da route e servizi
+tracking_hub = TrackingHub()
@@ -5,12 +5,47 @@ Fornisce funzioni riutilizzabili per il recupero e gestione
 delle tracce GPS dei droni durante le missioni.
 
 Funzioni:
-- get_mission_tracking(missione_id): Ritorna tutte le tracce di una
-  missione ordinate cronologicamente per ricostruire il percorso
+- get_mission_tracking(missione_id, since=None): Ritorna le tracce di una
+  missione ordinate cronologicamente per ricostruire il percorso.
+  Con since ritorna solo i punti da quell'istante in poi (polling incrementale)
   
 - get_latest_position(missione_id): Ritorna l'ultima posizione nota
   del drone per una missione, utile per tracking real-time
 
+- get_latest_point(missione_id, stato): Ultima posizione come dizionario,
+  servita dalla cache in memoria quando possibile
+
+- get_track_points(missione_id, since=None, stato=None): Punti del
+  percorso come dizionari; per le missioni completate e archiviate
+  vengono letti dall'archivio compresso invece che dalle righe Traccia
+
+- mission_version(missione_id): Versione economica del dettaglio di una
+  missione (con drone e pilota), per gli ETag dei GET condizionali
+
+- track_version(missione_id): Versione del solo percorso, per gli ETag
+  degli endpoint delle tracce (non cambia con batteria o turno)
+
+- percorso_punti(punti): Riduce i punti al formato compatto
+  {lat, lng, timestamp} usato dalle polilinee del frontend
+
+- parse_simplify_args(args) / simplify_punti(punti, ...): Semplificazione
+  opzionale lato server (?tolerance=metri, ?max_points=N)
+
+- parse_format_arg(args) / format_percorso(punti, formato): Output
+  compatto opzionale (?format=polyline) come Encoded Polyline più
+  array di timestamp delta-codificati
+
+- parse_bucket_args(args) / get_drone_buckets(drone_id, ...): Storico di
+  un drone in un intervallo (?from=&to=) aggregato per intervalli di
+  tempo (?bucket=30s): primo, ultimo punto e centroide per intervallo
+
+- publish_tracce(punti, stati=None): Notifica i nuovi punti GPS (già
+  salvati) agli stream live aperti sulle missioni interessate e aggiorna
+  la cache delle missioni non concluse
+
+- publish_stato_missione(missione): Notifica un cambio di stato della
+  missione agli stream live (gli stati finali chiudono lo stream)
+
 Queste funzioni centralizzano la logica di query del tracking,
 rendendola riutilizzabile sia dalle route API che da eventuali
 task di background o report.
@@ -23,22 +58,64 @@ Uso tipico:
         lat, lng = ultima_pos.Latitudine, ultima_pos.Longitudine
         # Aggiorna UI con posizione corrente
 """
-from app.models import Traccia, Missione
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app.models import Drone, Missione, Pilota, Traccia, TracciaArchivio
 from app.extensions import db
+from app.services.tracking_hub import tracking_hub
+from app.services.position_cache import position_cache
+from app.services.track_archive import (
+    EPOCH, archivio_disponibile, load_archived_drone_points, load_archived_points
+)
+from app.utils.geo import encode_polyline, simplify_mask, time_buckets
+from app.utils.helpers import parse_datetime
+
+# Formati di output ammessi per gli array di punti (?format=)
+FORMATI_PERCORSO = ('json', 'polyline')
 
-def get_mission_tracking(missione_id):
+# Stati dopo i quali una missione non riceve più tracce
+STATI_FINALI = ('completata', 'annullata')
+
+# Unità ammesse per ?bucket= (es: 30s, 5m, 1h)
+UNITA_BUCKET = {'s': 1, 'm': 60, 'h': 3600}
+
+# Numero massimo di intervalli per richiesta (limita la dimensione della risposta)
+MAX_BUCKET = 10000
+
+# Finestra di default dello storico drone se ?from= non è indicato
+FINESTRA_STORICO = timedelta(hours=24)
+
+# Numero massimo di punti grezzi per richiesta dello storico drone
+# (intervalli più ampi: ?bucket= oppure pagine successive con ?from=)
+MAX_PUNTI_DRONE = 5000
+
+def get_mission_tracking(missione_id, since=None):
     """
-    Ritorna tutte le tracce di una missione ordinate per timestamp.
+    Ritorna le tracce di una missione ordinate per timestamp.
+    
+    Se viene passato un cursore since, ritorna solo i punti con timestamp
+    da quell'istante in poi: la dimensione del risultato dipende quindi
+    dai nuovi dati e non dalla durata complessiva della missione.
+    
+    Il cursore è inclusivo: i punti con lo stesso timestamp (risoluzione
+    al secondo) salvati dopo la lettura precedente non vanno persi; il
+    chiamante scarta quelli già ricevuti.
     
     Args:
         missione_id: ID della missione
+        since (datetime): Cursore opzionale, inclusivo (default: None = tutte)
         
     Returns:
         Lista di tracce ordinate per timestamp ascendente
     """
-    tracce = Traccia.query.filter_by(ID_Missione=missione_id)\
-        .order_by(Traccia.TIMESTAMP.asc())\
-        .all()
+    query = Traccia.query.filter_by(ID_Missione=missione_id)
+    
+    # Polling incrementale: solo punti dal cursore in poi
+    if since is not None:
+        query = query.filter(Traccia.TIMESTAMP >= since)
+    
+    tracce = query.order_by(Traccia.TIMESTAMP.asc()).all()
     return tracce
 
 def get_latest_position(missione_id):
@@ -55,3 +132,440 @@ def get_latest_position(missione_id):
         .order_by(Traccia.TIMESTAMP.desc())\
         .first()
     return traccia
+
+def get_latest_point(missione_id, stato=None):
+    """
+    Ritorna l'ultima posizione di una missione come dizionario.
+    
+    Consulta prima la cache in memoria; in caso di miss legge dal
+    database e, se la missione è ancora attiva, popola la cache.
+    
+    Args:
+        missione_id: ID della missione
+        stato: Stato corrente della missione (se noto), usato per
+               non mettere in cache missioni completate/annullate
+        
+    Returns:
+        dict: Ultimo punto (formato Traccia.to_dict()) o None
+    """
+    punto = position_cache.get(missione_id)
+    if punto is not None:
+        return punto
+    
+    traccia = get_latest_position(missione_id)
+    if traccia is None:
+        # Righe Traccia eliminate dopo l'archiviazione: ultimo punto archiviato
+        if stato == 'completata':
+            archiviati = load_archived_points(missione_id)
+            if archiviati:
+                return archiviati[-1]
+        return None
+    
+    punto = traccia.to_dict()
+    if stato not in STATI_FINALI:
+        position_cache.update(punto)
+    return punto
+
+def get_track_points(missione_id, since=None, stato=None):
+    """
+    Ritorna i punti del percorso di una missione come dizionari.
+    
+    Per le missioni completate legge prima l'archivio compresso
+    (una query per chiave primaria); se la missione non è archiviata,
+    o non è completata, legge le righe Traccia.
+    
+    Args:
+        missione_id: ID della missione
+        since (datetime): Cursore opzionale, inclusivo (default: None = tutti)
+        stato: Stato corrente della missione (se noto)
+        
+    Returns:
+        list: Punti (formato Traccia.to_dict()) ordinati per timestamp
+    """
+    if stato == 'completata':
+        punti = load_archived_points(missione_id)
+        if punti is not None:
+            if since is not None:
+                soglia = since.isoformat()
+                # Timestamp ISO senza fuso: l'ordine lessicografico è cronologico
+                punti = [p for p in punti if p['timestamp'] >= soglia]
+            return punti
+    
+    return [t.to_dict() for t in get_mission_tracking(missione_id, since=since)]
+
+def mission_version(missione_id):
+    """
+    Versione del dettaglio di una missione per i GET condizionali (ETag).
+    
+    Una sola query per chiave primaria: colonne della missione, del drone
+    e del pilota (oggetti annidati nel dettaglio) e versione del percorso
+    (vedi _query_versione()). Una missione completata e archiviata ha
+    quindi una versione stabile e i client ricevono 304.
+    
+    Args:
+        missione_id: ID della missione
+        
+    Returns:
+        tuple: (chiave, None) per conditional(), None se la missione non esiste
+    """
+    riga = _query_versione(
+        missione_id,
+        *Missione.__table__.columns,
+        *Drone.__table__.columns,
+        *Pilota.__table__.columns
+    ).outerjoin(
+        Drone, Drone.ID == Missione.IdDrone
+    ).outerjoin(
+        Pilota, Pilota.ID == Missione.IdPilota
+    ).first()
+    
+    if riga is None:
+        return None
+    return ('missione', tuple(riga)), None
+
+def track_version(missione_id):
+    """
+    Versione del percorso di una missione per i GET condizionali (ETag).
+    
+    Come mission_version() ma senza le colonne di drone e pilota: la
+    telemetria della flotta (es: Batteria) non invalida gli ETag degli
+    endpoint delle tracce. Lo stato conta perché una missione completata
+    viene letta dall'archivio compresso.
+    
+    Args:
+        missione_id: ID della missione
+        
+    Returns:
+        tuple: (chiave, None) per conditional(), None se la missione non esiste
+    """
+    riga = _query_versione(missione_id, Missione.Stato, Missione.IdDrone).first()
+    
+    if riga is None:
+        return None
+    return ('percorso', missione_id, tuple(riga)), None
+
+def _query_versione(missione_id, *colonne):
+    """
+    Query della versione di una missione con le colonne indicate.
+    
+    Aggiunge numero di tracce e timestamp massimo (dall'indice
+    ID_Missione, TIMESTAMP) e, se la tabella esiste, numero di punti e
+    data dell'archivio compresso.
+    """
+    della_missione = Traccia.ID_Missione == missione_id
+    archivio = archivio_disponibile()
+    
+    query = db.session.query(
+        *colonne,
+        select(func.count()).where(della_missione).scalar_subquery(),
+        select(func.max(Traccia.TIMESTAMP)).where(della_missione).scalar_subquery(),
+        *((TracciaArchivio.NumeroPunti, TracciaArchivio.CreatoIl) if archivio else ())
+    ).select_from(Missione).filter(Missione.ID == missione_id)
+    if archivio:
+        query = query.outerjoin(TracciaArchivio, TracciaArchivio.ID_Missione == Missione.ID)
+    return query
+
+def percorso_punti(punti):
+    """
+    Riduce una lista di punti ai soli campi di una polilinea.
+    
+    Args:
+        punti: Lista di dizionari (formato Traccia.to_dict())
+        
+    Returns:
+        list: Dizionari {lat, lng, timestamp}
+    """
+    return [{
+        'lat': p['lat'],
+        'lng': p['lng'],
+        'timestamp': p['timestamp']
+    } for p in punti]
+
+def parse_simplify_args(args):
+    """
+    Legge i parametri di semplificazione del percorso dalla query string.
+    
+    Args:
+        args: request.args
+        
+    Returns:
+        tuple: (tolerance, max_points), None se non richiesti
+        
+    Raises:
+        ValueError: Se i parametri non sono numeri positivi
+    """
+    tolerance = args.get('tolerance')
+    max_points = args.get('max_points')
+    
+    try:
+        tolerance = float(tolerance) if tolerance not in (None, '') else None
+        max_points = int(max_points) if max_points not in (None, '') else None
+    except ValueError:
+        raise ValueError('tolerance e max_points devono essere numerici')
+    
+    if tolerance is not None and tolerance < 0:
+        raise ValueError('tolerance deve essere >= 0 (metri)')
+    if max_points is not None and max_points < 2:
+        raise ValueError('max_points deve essere almeno 2')
+    
+    return tolerance, max_points
+
+def simplify_punti(punti, tolerance=None, max_points=None):
+    """
+    Semplifica un percorso mantenendo un errore massimo limitato.
+    
+    Applica Douglas-Peucker (vettoriale, NumPy) sulle coordinate;
+    primo e ultimo punto sono sempre mantenuti.
+    
+    Args:
+        punti: Lista di dizionari con chiavi lat e lng
+        tolerance (float): Errore massimo in metri (opzionale)
+        max_points (int): Numero massimo di punti (opzionale)
+        
+    Returns:
+        list: Sottoinsieme ordinato dei punti originali
+    """
+    if (tolerance is None and max_points is None) or len(punti) < 3:
+        return punti
+    
+    mantieni = simplify_mask(
+        [p['lat'] for p in punti],
+        [p['lng'] for p in punti],
+        tolerance=tolerance,
+        max_points=max_points
+    )
+    return [p for p, tenuto in zip(punti, mantieni) if tenuto]
+
+def parse_format_arg(args):
+    """
+    Legge il formato di output del percorso dalla query string.
+    
+    Args:
+        args: request.args
+        
+    Returns:
+        str: 'json' (default) o 'polyline'
+        
+    Raises:
+        ValueError: Se il formato non è supportato
+    """
+    formato = args.get('format') or 'json'
+    if formato not in FORMATI_PERCORSO:
+        raise ValueError(f'Formato non valido. Valori ammessi: {list(FORMATI_PERCORSO)}')
+    return formato
+
+def format_percorso(punti, formato='json'):
+    """
+    Serializza un percorso nel formato richiesto dal client.
+    
+    - 'json': lista di dizionari {lat, lng, timestamp} (invariata)
+    - 'polyline': dizionario con la polilinea codificata (Google Encoded
+      Polyline, precisione 5) e i timestamp come secondi di differenza
+      dal punto precedente, a partire da 'timestamp_inizio'
+    
+    Args:
+        punti: Lista di dizionari con chiavi lat, lng, timestamp (ISO8601)
+        formato (str): 'json' o 'polyline'
+        
+    Returns:
+        list | dict: Percorso serializzato
+    """
+    if formato != 'polyline':
+        return punti
+    
+    istanti = [parse_datetime(p['timestamp']) for p in punti]
+    delta = []
+    precedente = istanti[0] if istanti else None
+    for istante in istanti:
+        delta.append(int((istante - precedente).total_seconds()))
+        precedente = istante
+    
+    return {
+        'formato': 'polyline',
+        'precisione': 5,
+        'punti': len(punti),
+        'polyline': encode_polyline([p['lat'] for p in punti], [p['lng'] for p in punti]),
+        'timestamp_inizio': punti[0]['timestamp'] if punti else None,
+        'timestamp_delta': delta
+    }
+
+def parse_bucket_args(args):
+    """
+    Legge intervallo e ampiezza degli intervalli dalla query string.
+    
+    - from / to: timestamp ISO8601 (default: ultime 24 ore fino ad ora)
+    - bucket: ampiezza con unità s, m o h (es: 30s, 5m, 1h) o secondi
+    
+    Args:
+        args: request.args
+        
+    Returns:
+        tuple: (inizio, fine, ampiezza) con ampiezza in secondi,
+               None se ?bucket= non è indicato
+        
+    Raises:
+        ValueError: Se i parametri non sono validi
+    """
+    fine = parse_datetime(args.get('to')) if args.get('to') else datetime.now()
+    if fine is None:
+        raise ValueError('Parametro to non valido (atteso timestamp ISO8601)')
+    
+    inizio = parse_datetime(args.get('from')) if args.get('from') else fine - FINESTRA_STORICO
+    if inizio is None:
+        raise ValueError('Parametro from non valido (atteso timestamp ISO8601)')
+    if inizio >= fine:
+        raise ValueError('from deve precedere to')
+    
+    ampiezza = None
+    bucket = args.get('bucket')
+    if bucket:
+        match = re.fullmatch(r'(\d+)([smh]?)', bucket.strip())
+        if not match or int(match.group(1)) == 0:
+            raise ValueError('Parametro bucket non valido (es: 30s, 5m, 1h)')
+        ampiezza = int(match.group(1)) * UNITA_BUCKET[match.group(2) or 's']
+        
+        if (fine - inizio).total_seconds() / ampiezza > MAX_BUCKET:
+            raise ValueError(f'Troppi intervalli richiesti (massimo {MAX_BUCKET}): aumentare bucket')
+    
+    return inizio, fine, ampiezza
+
+def get_drone_points(drone_id, inizio, fine, limite=None):
+    """
+    Ritorna i punti di un drone in un intervallo di tempo.
+    
+    Legge le righe Traccia (indice ID_Drone, TIMESTAMP) e, per le
+    missioni le cui righe sono state eliminate dopo l'archiviazione,
+    i punti dall'archivio compresso.
+    
+    Args:
+        drone_id: ID del drone
+        inizio (datetime): Inizio dell'intervallo (incluso)
+        fine (datetime): Fine dell'intervallo (incluso)
+        limite (int): Numero massimo di punti (i primi in ordine di
+                      tempo); None per tutti
+        
+    Returns:
+        list: Punti (formato Traccia.to_dict()) ordinati per timestamp
+    """
+    query = db.session.query(
+        Traccia.ID_Missione, Traccia.TIMESTAMP, Traccia.Latitudine, Traccia.Longitudine
+    ).filter(
+        Traccia.ID_Drone == drone_id,
+        Traccia.TIMESTAMP >= inizio,
+        Traccia.TIMESTAMP <= fine
+    ).order_by(Traccia.TIMESTAMP.asc())
+    if limite is not None:
+        query = query.limit(limite)
+    righe = query.all()
+    
+    # Righe troncate: i punti archiviati successivi all'ultima riga letta
+    # non possono rientrare tra i primi 'limite'
+    if limite is not None and len(righe) == limite:
+        fine = righe[-1].TIMESTAMP
+    
+    punti = [{
+        'drone_id': drone_id,
+        'missione_id': missione_id,
+        'lat': float(lat),
+        'lng': float(lng),
+        'timestamp': timestamp.isoformat()
+    } for missione_id, timestamp, lat, lng in righe]
+    
+    archiviati = load_archived_drone_points(
+        drone_id, inizio, fine, escludi={p['missione_id'] for p in punti}
+    )
+    if archiviati:
+        punti.extend(archiviati)
+        punti.sort(key=lambda p: p['timestamp'])
+        if limite is not None:
+            del punti[limite:]
+    
+    return punti
+
+def get_drone_buckets(drone_id, inizio, fine, ampiezza):
+    """
+    Aggrega lo storico di un drone per intervalli di tempo.
+    
+    Per ogni intervallo non vuoto ritorna il primo e l'ultimo punto
+    e il centroide delle posizioni: un giorno di volo diventa qualche
+    centinaio di elementi invece di decine di migliaia di punti.
+    
+    Args:
+        drone_id: ID del drone
+        inizio (datetime): Inizio dell'intervallo (allineamento dei bucket)
+        fine (datetime): Fine dell'intervallo
+        ampiezza (int): Ampiezza degli intervalli in secondi
+        
+    Returns:
+        list: Dizionari {inizio, punti, primo, ultimo, centroide}
+    """
+    punti = get_drone_points(drone_id, inizio, fine)
+    if not punti:
+        return []
+    
+    origine = int((inizio - EPOCH).total_seconds())
+    gruppi = time_buckets(
+        [int((parse_datetime(p['timestamp']) - EPOCH).total_seconds()) for p in punti],
+        [p['lat'] for p in punti],
+        [p['lng'] for p in punti],
+        ampiezza,
+        origine
+    )
+    
+    def estremo(indice):
+        punto = punti[indice]
+        return {'lat': punto['lat'], 'lng': punto['lng'], 'timestamp': punto['timestamp']}
+    
+    return [{
+        'inizio': (EPOCH + timedelta(seconds=origine + bucket * ampiezza)).isoformat(),
+        'punti': conteggio,
+        'primo': estremo(primo),
+        'ultimo': estremo(ultimo),
+        'centroide': {'lat': lat, 'lng': lng}
+    } for bucket, primo, ultimo, conteggio, lat, lng in zip(
+        gruppi['bucket'].tolist(), gruppi['primo'].tolist(), gruppi['ultimo'].tolist(),
+        gruppi['conteggio'].tolist(), gruppi['lat'].tolist(), gruppi['lng'].tolist()
+    )]
+
+def publish_tracce(punti, stati=None):
+    """
+    Pubblica sull'hub live i punti GPS appena registrati.
+    
+    Da chiamare dopo il commit, così gli stream ricevono solo
+    punti effettivamente salvati nel database. La cache delle
+    posizioni non viene aggiornata per le missioni concluse
+    (rimosse da publish_stato_missione).
+    
+    Args:
+        punti: Lista di dizionari punto (formato Traccia.to_dict())
+        stati (dict): missione_id -> Stato, se già noti al chiamante;
+                      altrimenti letti con una query IN
+    """
+    if not punti:
+        return
+    
+    if stati is None:
+        ids = {p['missione_id'] for p in punti}
+        stati = dict(db.session.query(Missione.ID, Missione.Stato).filter(Missione.ID.in_(ids)).all())
+    
+    for punto in punti:
+        if stati.get(punto['missione_id']) not in STATI_FINALI:
+            position_cache.update(punto)
+        tracking_hub.publish(punto['missione_id'], 'posizione', punto)
+
+def publish_stato_missione(missione):
+    """
+    Pubblica sull'hub live il nuovo stato di una missione.
+    
+    Le missioni concluse vengono rimosse dalla cache delle posizioni.
+    
+    Args:
+        missione: Istanza Missione già aggiornata e salvata
+    """
+    if missione.Stato in STATI_FINALI:
+        position_cache.evict(missione.ID)
+    
+    tracking_hub.publish(missione.ID, 'stato', {
+        'missione_id': missione.ID,
+        'stato': missione.Stato
+    })
@@ -0,0 +1,116 @@
+"""
+Cache in memoria con scadenza (TTL) e caricamento single-flight.
+
+Pensata per valori costosi da calcolare ma tollerabili se vecchi di
+qualche secondo (es: conteggi totali delle liste, aggregati per le
+dashboard). Ogni valore scade dopo ttl secondi dal caricamento.
+
+Single-flight: se più richieste chiedono la stessa chiave scaduta nello
+stesso momento, solo la prima esegue il loader; le altre attendono il
+suo risultato invece di lanciare N query identiche sul database.
+
+La cache è process-local: con più worker ogni processo ha la sua copia.
+
+Uso tipico:
+    conteggi = TTLCache(ttl=30)
+    totale = conteggi.get_or_load(('ordini', user_id), lambda: query.count())
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Cache chiave -> valore con scadenza e limite di dimensione (LRU).
+    """
+
+    def __init__(self, ttl=30, max_size=1024):
+        """
+        Args:
+            ttl (float): Durata di default dei valori in secondi
+            max_size (int): Numero massimo di chiavi mantenute
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._valori = OrderedDict()   # chiave -> (scadenza, valore)
+        self._in_corso = {}            # chiave -> threading.Event del caricamento
+        self._lock = threading.Lock()
+
+    def get(self, chiave):
+        """
+        Ritorna il valore se presente e non scaduto.
+
+        Returns:
+            Valore in cache o None
+        """
+        with self._lock:
+            return self._leggi(chiave)
+
+    def get_or_load(self, chiave, loader, ttl=None):
+        """
+        Ritorna il valore in cache o lo calcola con loader().
+
+        Un solo thread per chiave esegue loader(); gli altri attendono.
+        Se il loader fallisce l'eccezione viene propagata al chiamante
+        e i thread in attesa ritentano il caricamento.
+
+        Args:
+            chiave: Chiave hashable
+            loader (callable): Funzione senza argomenti che calcola il valore
+            ttl (float): Durata del valore (default: ttl della cache)
+
+        Returns:
+            Valore in cache o appena caricato
+        """
+        while True:
+            with self._lock:
+                valore = self._leggi(chiave)
+                if valore is not None:
+                    return valore
+
+                evento = self._in_corso.get(chiave)
+                if evento is None:
+                    # Questo thread esegue il caricamento
+                    evento = threading.Event()
+                    self._in_corso[chiave] = evento
+                    break
+
+            # Un altro thread sta caricando: attende e rilegge
+            evento.wait()
+
+        try:
+            valore = loader()
+            with self._lock:
+                scadenza = time.monotonic() + (self.ttl if ttl is None else ttl)
+                self._valori[chiave] = (scadenza, valore)
+                self._valori.move_to_end(chiave)
+                while len(self._valori) > self.max_size:
+                    self._valori.popitem(last=False)
+            return valore
+        finally:
+            with self._lock:
+                del self._in_corso[chiave]
+            evento.set()
+
+    def invalidate(self, chiave=None):
+        """
+        Rimuove una chiave, o tutte se chiave è None.
+        """
+        with self._lock:
+            if chiave is None:
+                self._valori.clear()
+            else:
+                self._valori.pop(chiave, None)
+
+    def _leggi(self, chiave):
+        """Lettura con controllo della scadenza (chiamare con lock)."""
+        elemento = self._valori.get(chiave)
+        if elemento is None:
+            return None
+        scadenza, valore = elemento
+        if scadenza <= time.monotonic():
+            del self._valori[chiave]
+            return None
+        self._valori.move_to_end(chiave)
+        return valore
@@ -0,0 +1,250 @@
+"""
+Compressione delle risposte HTTP (gzip / brotli).
+
+Le risposte delle API di tracking e delle liste admin sono JSON grandi
+e molto comprimibili. Il Compressor comprime in after_request le
+risposte sopra una soglia di dimensione, scegliendo la codifica in
+base ad Accept-Encoding:
+- br (brotli) se il modulo brotli è installato e il client lo accetta
+- gzip altrimenti
+
+Non vengono compresse le risposte in streaming (SSE, ?stream=) né i
+file inviati con send_file (direct_passthrough): per i file statici si
+usano invece copie precompresse .br/.gz accanto all'originale, generate
+all'avvio (o in fase di build con backend/compress_static.py), così lo
+stesso file non viene ricompresso a ogni richiesta.
+
+brotli è una dipendenza opzionale: pip install Brotli.
+"""
+import gzip
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dipende dall'ambiente
+    brotli = None
+
+# Tipi MIME compressi (i formati binari come immagini e font lo sono già)
+COMPRIMIBILI = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'image/svg+xml'
+}
+
+# Estensioni dei file statici da precomprimere
+ESTENSIONI_STATICHE = ('.js', '.css', '.html', '.svg', '.json', '.map', '.txt')
+
+# Copie precompresse: codifica -> estensione, in ordine di preferenza
+PRECOMPRESSI = (('br', '.br'), ('gzip', '.gz'))
+
+# Valori di default se non configurati
+SOGLIA_DEFAULT = 1024
+LIVELLO_GZIP = 6
+LIVELLO_BROTLI = 5
+
+
+class Compressor:
+    """
+    Compressione delle risposte dinamiche e dei file statici.
+    """
+
+    def __init__(self):
+        self.abilitato = True
+        self.soglia = SOGLIA_DEFAULT
+        self.livello_gzip = LIVELLO_GZIP
+        self.livello_brotli = LIVELLO_BROTLI
+
+    def init_app(self, app):
+        """
+        Configura la compressione e registra l'hook after_request.
+
+        Se COMPRESSIONE_STATICI è attivo genera le copie precompresse
+        mancanti o non aggiornate dei file statici.
+
+        Args:
+            app (Flask): Istanza dell'applicazione
+        """
+        self.abilitato = app.config.get('COMPRESSIONE_ABILITATA', True)
+        self.soglia = app.config.get('COMPRESSIONE_SOGLIA', self.soglia)
+        self.livello_gzip = app.config.get('COMPRESSIONE_LIVELLO_GZIP', self.livello_gzip)
+        self.livello_brotli = app.config.get('COMPRESSIONE_LIVELLO_BROTLI', self.livello_brotli)
+
+        app.after_request(self.after_request)
+
+        if self.abilitato and app.config.get('COMPRESSIONE_STATICI', True) and app.static_folder:
+            try:
+                self.precompress_static(app.static_folder)
+            except OSError:
+                # Cartella in sola lettura: si servono gli originali
+                app.logger.warning('Precompressione dei file statici non riuscita', exc_info=True)
+
+    def after_request(self, response):
+        """
+        Comprime la risposta se comprimibile e sopra la soglia.
+
+        Args:
+            response: Risposta Flask
+
+        Returns:
+            Response: La stessa risposta, eventualmente compressa
+        """
+        if not self.abilitato or response.mimetype not in COMPRIMIBILI:
+            return response
+
+        # La rappresentazione dipende da Accept-Encoding (cache intermedie)
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code >= 300
+                or response.status_code in (204, 206)
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        codifica = negotiate_encoding(('br', 'gzip') if brotli else ('gzip',))
+        if codifica is None:
+            return response
+
+        dati = response.get_data()
+        if len(dati) < self.soglia:
+            return response
+
+        compressi = self.compress(dati, codifica)
+        if len(compressi) >= len(dati):
+            return response
+
+        response.set_data(compressi)
+        response.headers['Content-Encoding'] = codifica
+
+        # Un ETag forte identifica i byte: dopo la compressione diventa debole
+        etag, debole = response.get_etag()
+        if etag and not debole:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    def compress(self, dati, codifica):
+        """
+        Comprime dati con la codifica indicata.
+
+        Args:
+            dati (bytes): Contenuto da comprimere
+            codifica (str): 'br' o 'gzip'
+
+        Returns:
+            bytes: Contenuto compresso
+        """
+        if codifica == 'br':
+            return brotli.compress(dati, quality=self.livello_brotli)
+        # mtime=0: output deterministico (stessi byte per lo stesso contenuto)
+        return gzip.compress(dati, compresslevel=self.livello_gzip, mtime=0)
+
+    def precompress_static(self, cartella):
+        """
+        Genera le copie .gz (e .br se brotli è disponibile) dei file statici.
+
+        Una copia viene rigenerata solo se manca o è più vecchia
+        dell'originale; la scrittura è atomica (file temporaneo e
+        rename), quindi più processi possono avviarsi insieme.
+
+        Args:
+            cartella (str): Cartella dei file statici
+
+        Returns:
+            int: Numero di copie generate
+        """
+        # Livelli massimi: la compressione avviene una sola volta per file
+        livelli = {'gzip': 9, 'br': 11}
+        codifiche = [(c, e) for c, e in PRECOMPRESSI if c != 'br' or brotli]
+        generate = 0
+
+        for radice, _, file in os.walk(cartella):
+            for nome in file:
+                if not nome.endswith(ESTENSIONI_STATICHE):
+                    continue
+                percorso = os.path.join(radice, nome)
+                if os.path.getsize(percorso) < self.soglia:
+                    continue
+
+                dati = None
+                for codifica, estensione in codifiche:
+                    destinazione = percorso + estensione
+                    if (os.path.exists(destinazione)
+                            and os.path.getmtime(destinazione) >= os.path.getmtime(percorso)):
+                        continue
+                    if dati is None:
+                        with open(percorso, 'rb') as f:
+                            dati = f.read()
+
+                    if codifica == 'br':
+                        compressi = brotli.compress(dati, quality=livelli['br'])
+                    else:
+                        compressi = gzip.compress(dati, compresslevel=livelli['gzip'], mtime=0)
+
+                    temporaneo = f'{destinazione}.{os.getpid()}.tmp'
+                    with open(temporaneo, 'wb') as f:
+                        f.write(compressi)
+                    os.replace(temporaneo, destinazione)
+                    generate += 1
+
+        return generate
+
+
+def negotiate_encoding(disponibili):
+    """
+    Sceglie la codifica preferita dal client tra quelle disponibili.
+
+    Args:
+        disponibili (tuple): Codifiche disponibili in ordine di preferenza
+
+    Returns:
+        str: Codifica scelta o None se il client non ne accetta nessuna
+    """
+    migliore, qualita_migliore = None, 0
+    for codifica in disponibili:
+        qualita = request.accept_encodings.quality(codifica)
+        if qualita > qualita_migliore:
+            migliore, qualita_migliore = codifica, qualita
+    return migliore
+
+
+def send_static(cartella, filename):
+    """
+    Invia un file statico usando la copia precompressa se disponibile.
+
+    Sostituisce send_from_directory() per i file statici: se il client
+    accetta br o gzip ed esiste la copia corrispondente, invia quella
+    con Content-Encoding e il Content-Type dell'originale.
+
+    Args:
+        cartella (str): Cartella dei file statici
+        filename (str): Percorso relativo del file richiesto
+
+    Returns:
+        Response: Risposta con il file (404 se non esiste)
+    """
+    originale = safe_join(cartella, filename)
+    if originale is not None and os.path.isfile(originale):
+        disponibili = tuple(
+            codifica for codifica, estensione in PRECOMPRESSI
+            if os.path.isfile(originale + estensione)
+            and os.path.getmtime(originale + estensione) >= os.path.getmtime(originale)
+        )
+        codifica = negotiate_encoding(disponibili) if disponibili else None
+
+        if codifica is not None:
+            estensione = dict(PRECOMPRESSI)[codifica]
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(cartella, filename + estensione, mimetype=mimetype)
+            response.headers['Content-Encoding'] = codifica
+            response.vary.add('Accept-Encoding')
+            return response
+
+    return send_from_directory(cartella, filename)
+
+
+# Istanza globale configurata da create_app()
+compressor = Compressor()
@@ -0,0 +1,208 @@
+"""
+GET condizionali (ETag / Last-Modified) con risposte 304.
+
+I client richiedono di continuo risorse che cambiano di rado o mai
+(catalogo prodotti, dettaglio e percorso delle missioni completate).
+Il decoratore conditional() calcola una versione economica della
+risorsa (un contatore o pochi valori letti con una query su indice)
+e risponde 304 Not Modified se coincide con If-None-Match, prima di
+eseguire la query costosa e la serializzazione della view.
+
+L'ETag è debole (W/"..."): identifica il contenuto, non i byte, e resta
+valido anche se la risposta viene compressa.
+
+Versioni delle risorse:
+- funzione versione(**view_args) -> (chiave, ultima_modifica) oppure
+  None se la risorsa non esiste (la view risponde 404 come sempre)
+- VersionRegistry: contatori per nome di risorsa, incrementati dagli
+  eventi SQLAlchemy al commit di modifiche ai modelli registrati
+
+Il registro è process-local: con più worker ogni processo conosce solo
+le scritture gestite da se stesso (come le cache in app.services).
+
+Uso tipico:
+    @prodotti_bp.route('', methods=['GET'])
+    @conditional(lambda **_: versioni.get('prodotti'), privata=False)
+    def get_prodotti():
+        ...
+"""
+import hashlib
+import secrets
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class VersionRegistry:
+    """
+    Versioni in memoria delle risorse, per nome (es: 'prodotti').
+
+    Ogni versione è (token, contatore): il token casuale del processo
+    evita che dopo un riavvio il contatore ripartito da zero riproduca
+    ETag già distribuiti con contenuti diversi.
+    """
+
+    def __init__(self):
+        self._token = secrets.token_hex(4)
+        self._versioni = {}   # nome -> (contatore, ultima_modifica)
+        self._modelli = {}    # classe modello -> nome risorsa
+        self._avvio = datetime.now(timezone.utc).replace(microsecond=0)
+        self._lock = threading.Lock()
+        self._eventi_registrati = False
+
+    def get(self, nome):
+        """
+        Versione corrente di una risorsa.
+
+        Args:
+            nome (str): Nome della risorsa
+
+        Returns:
+            tuple: ((token, contatore), ultima_modifica) nel formato
+                   atteso da conditional()
+        """
+        with self._lock:
+            contatore, ultima_modifica = self._versioni.get(nome, (0, self._avvio))
+        return (self._token, contatore), ultima_modifica
+
+    def bump(self, *nomi):
+        """
+        Incrementa la versione delle risorse indicate.
+
+        Args:
+            *nomi (str): Nomi delle risorse modificate
+        """
+        # Last-Modified ha risoluzione al secondo
+        adesso = datetime.now(timezone.utc).replace(microsecond=0)
+        with self._lock:
+            for nome in nomi:
+                contatore, _ = self._versioni.get(nome, (0, self._avvio))
+                self._versioni[nome] = (contatore + 1, adesso)
+
+    def track(self, model, nome):
+        """
+        Incrementa la versione di nome a ogni commit che inserisce,
+        modifica o elimina istanze di model tramite la sessione ORM.
+
+        Le scritture con Core (insert()/update() su __table__) non
+        passano dalla sessione e vanno segnalate con bump().
+
+        Args:
+            model: Classe del modello
+            nome (str): Nome della risorsa
+        """
+        with self._lock:
+            self._modelli[model] = nome
+            if self._eventi_registrati:
+                return
+            self._eventi_registrati = True
+
+        event.listen(Session, 'after_flush', self._dopo_flush)
+        event.listen(Session, 'after_commit', self._dopo_commit)
+        event.listen(Session, 'after_rollback', self._dopo_rollback)
+
+    def _dopo_flush(self, session, flush_context):
+        """Annota le risorse modificate dal flush (in attesa del commit)."""
+        modificate = session.info.setdefault('versioni_modificate', set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            nome = self._modelli.get(type(obj))
+            if nome:
+                modificate.add(nome)
+
+    def _dopo_commit(self, session):
+        """Rende visibili le nuove versioni solo a commit avvenuto."""
+        modificate = session.info.pop('versioni_modificate', None)
+        if modificate:
+            self.bump(*modificate)
+
+    def _dopo_rollback(self, session):
+        """Le modifiche annullate non cambiano la versione."""
+        session.info.pop('versioni_modificate', None)
+
+
+# Istanza globale condivisa dalle route
+versioni = VersionRegistry()
+
+
+def make_etag(chiave):
+    """
+    Calcola il valore dell'ETag (senza virgolette) da una chiave di versione.
+
+    Args:
+        chiave: Valore di versione con repr() deterministico (tuple, int, str)
+
+    Returns:
+        str: Digest esadecimale breve
+    """
+    return hashlib.blake2b(repr(chiave).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def conditional(versione, privata=True):
+    """
+    Decoratore per GET condizionali basati su una versione della risorsa.
+
+    Se If-None-Match contiene l'ETag corrente (o, in sua assenza,
+    If-Modified-Since non è precedente all'ultima modifica) risponde
+    304 senza eseguire la view; altrimenti aggiunge ETag e
+    Last-Modified alle risposte 200.
+
+    Va applicato sotto i decoratori di autenticazione, così i controlli
+    di accesso precedono sempre la risposta 304.
+
+    Args:
+        versione (callable): Riceve i parametri della route e ritorna
+                             (chiave, ultima_modifica) o None
+        privata (bool): Cache-Control private (risposte per utenti
+                        autenticati) invece di public
+
+    Returns:
+        function: Decoratore
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            corrente = versione(**kwargs)
+            if corrente is None:
+                return view(*args, **kwargs)
+
+            chiave, ultima_modifica = corrente
+            etag = make_etag(chiave)
+
+            if _non_modificata(etag, ultima_modifica):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if ultima_modifica is not None:
+                response.last_modified = ultima_modifica
+            # Il client può riusare la risposta solo dopo averla rivalidata
+            response.cache_control.no_cache = True
+            if privata:
+                response.cache_control.private = True
+            else:
+                response.cache_control.public = True
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _non_modificata(etag, ultima_modifica):
+    """True se la copia del client (If-None-Match / If-Modified-Since) è valida."""
+    if request.if_none_match:
+        # Confronto debole (RFC 9110): W/"x" equivale a "x"
+        return request.if_none_match.contains_weak(etag)
+    if ultima_modifica is not None and request.if_modified_since is not None:
+        return ultima_modifica <= request.if_modified_since
+    return False
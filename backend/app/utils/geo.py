@@ -0,0 +1,234 @@
+"""
+Funzioni geometriche per i percorsi GPS dei droni.
+
+Fornisce la semplificazione dei percorsi lato server: una missione
+lunga registra migliaia di punti, ma per disegnare la polilinea su
+Leaflet ne bastano poche centinaia con un errore massimo controllato.
+
+Algoritmo: Douglas-Peucker, calcolato una sola volta per assegnare a
+ogni punto un'"importanza" (la distanza in metri alla quale il punto
+viene selezionato). Dall'importanza si ottengono entrambe le modalità:
+- per tolleranza: si tengono i punti con importanza > tolleranza,
+  risultato identico al Douglas-Peucker classico
+- per numero massimo di punti: si tengono i k punti più importanti
+
+Le distanze punto-segmento sono calcolate in modo vettoriale con NumPy
+su una proiezione equirettangolare locale (metri), adeguata alle
+distanze di una consegna con drone.
+
+Fornisce inoltre la codifica "Encoded Polyline" di Google, formato
+compatto (circa 5-6 byte per punto invece di ~80 byte di JSON) per
+trasferire i percorsi ai client, e l'aggregazione per intervalli di
+tempo (time bucket) per lo storico giornaliero di un drone.
+"""
+# Import NumPy per il calcolo vettoriale delle distanze
+import numpy as np
+
+# Metri per grado di latitudine (valore medio)
+METRI_PER_GRADO = 111_320.0
+
+
+def project_to_meters(lat, lng):
+    """
+    Proietta coordinate geografiche su un piano locale in metri.
+
+    Usa una proiezione equirettangolare centrata sulla latitudine
+    media del percorso: precisa per estensioni di qualche decina di km.
+
+    Args:
+        lat (np.ndarray): Latitudini in gradi
+        lng (np.ndarray): Longitudini in gradi
+
+    Returns:
+        np.ndarray: Array (N, 2) di coordinate x, y in metri
+    """
+    lat = np.asarray(lat, dtype=float)
+    lng = np.asarray(lng, dtype=float)
+    cos_lat = np.cos(np.radians(lat.mean())) if lat.size else 1.0
+    return np.column_stack((lng * METRI_PER_GRADO * cos_lat, lat * METRI_PER_GRADO))
+
+
+def douglas_peucker_importance(xy):
+    """
+    Calcola l'importanza Douglas-Peucker di ogni punto di un percorso.
+
+    L'importanza di un punto è la sua distanza dal segmento che lo
+    sottende nel momento in cui viene selezionato, limitata superiormente
+    dall'importanza del punto "padre": in questo modo tenere i punti con
+    importanza > t equivale a eseguire Douglas-Peucker con tolleranza t.
+    Estremi del percorso: importanza infinita (sempre mantenuti).
+
+    Implementazione iterativa (nessuna ricorsione) con distanze
+    calcolate in blocco per ogni intervallo.
+
+    Args:
+        xy (np.ndarray): Array (N, 2) di coordinate in metri
+
+    Returns:
+        np.ndarray: Array (N,) di importanze in metri
+    """
+    n = len(xy)
+    importanza = np.zeros(n)
+    if n == 0:
+        return importanza
+    importanza[0] = importanza[-1] = np.inf
+    if n < 3:
+        return importanza
+
+    # Stack di intervalli (inizio, fine, importanza massima ereditata)
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        inizio, fine, limite = stack.pop()
+        if fine - inizio < 2:
+            continue
+
+        a = xy[inizio]
+        b = xy[fine]
+        punti = xy[inizio + 1:fine]
+        ab = b - a
+        lunghezza2 = float(ab @ ab)
+
+        if lunghezza2 == 0.0:
+            # Segmento degenere: distanza dal punto a
+            distanze = np.hypot(punti[:, 0] - a[0], punti[:, 1] - a[1])
+        else:
+            # Distanza dal segmento (proiezione limitata a [0, 1])
+            t = np.clip(((punti - a) @ ab) / lunghezza2, 0.0, 1.0)
+            proiezioni = a + t[:, None] * ab
+            distanze = np.hypot(punti[:, 0] - proiezioni[:, 0], punti[:, 1] - proiezioni[:, 1])
+
+        k = int(np.argmax(distanze))
+        indice = inizio + 1 + k
+        valore = min(float(distanze[k]), limite)
+        importanza[indice] = valore
+
+        stack.append((inizio, indice, valore))
+        stack.append((indice, fine, valore))
+
+    return importanza
+
+
+def simplify_mask(lat, lng, tolerance=None, max_points=None):
+    """
+    Calcola quali punti mantenere nella semplificazione di un percorso.
+
+    Se sono indicati entrambi i limiti, vengono applicati entrambi
+    (tolleranza e poi taglio ai max_points più importanti).
+
+    Args:
+        lat (sequence): Latitudini in gradi
+        lng (sequence): Longitudini in gradi
+        tolerance (float): Errore massimo ammesso in metri (opzionale)
+        max_points (int): Numero massimo di punti restituiti (opzionale)
+
+    Returns:
+        np.ndarray: Array booleano (N,) dei punti da mantenere
+    """
+    xy = project_to_meters(lat, lng)
+    n = len(xy)
+    mantieni = np.ones(n, dtype=bool)
+    if n < 3:
+        return mantieni
+
+    importanza = douglas_peucker_importance(xy)
+
+    if tolerance is not None:
+        mantieni &= importanza > tolerance
+
+    if max_points is not None and mantieni.sum() > max_points:
+        # Tiene i max_points punti più importanti tra quelli rimasti
+        candidati = np.where(mantieni, importanza, -1.0)
+        migliori = np.argsort(candidati)[::-1][:max(max_points, 2)]
+        mantieni = np.zeros(n, dtype=bool)
+        mantieni[migliori] = True
+
+    return mantieni
+
+
+def encode_polyline(lat, lng, precision=5):
+    """
+    Codifica un percorso nel formato Google Encoded Polyline.
+
+    Le coordinate vengono arrotondate a 10^-precision gradi
+    (precision=5: ~1 m), codificate come differenze dal punto
+    precedente e serializzate in gruppi di 5 bit come caratteri ASCII.
+    Decodificabile lato client con qualunque libreria compatibile
+    (es: @mapbox/polyline, Leaflet.encoded).
+
+    Args:
+        lat (sequence): Latitudini in gradi
+        lng (sequence): Longitudini in gradi
+        precision (int): Cifre decimali mantenute (default: 5)
+
+    Returns:
+        str: Polilinea codificata
+    """
+    fattore = 10 ** precision
+    lat = np.asarray(lat, dtype=float)
+    lng = np.asarray(lng, dtype=float)
+    if lat.size == 0:
+        return ''
+
+    # Arrotondamento "half up" come nell'implementazione di riferimento
+    coordinate = np.floor(np.column_stack((lat, lng)) * fattore + 0.5).astype(np.int64)
+
+    # Differenze rispetto al punto precedente (il primo rispetto a 0,0)
+    delta = np.diff(coordinate, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+
+    # Zig-zag: sposta il segno nel bit meno significativo
+    valori = (delta << 1) ^ (delta >> 63)
+
+    caratteri = []
+    for valore in valori.ravel().tolist():
+        # Gruppi di 5 bit, con bit 0x20 di continuazione, offset ASCII 63
+        while valore >= 0x20:
+            caratteri.append(chr((0x20 | (valore & 0x1f)) + 63))
+            valore >>= 5
+        caratteri.append(chr(valore + 63))
+    return ''.join(caratteri)
+
+
+def time_buckets(secondi, lat, lng, ampiezza, origine=0):
+    """
+    Aggrega un percorso in intervalli di tempo di ampiezza fissa.
+
+    Gli intervalli sono allineati a origine: il punto con istante t
+    appartiene all'intervallo (t - origine) // ampiezza. Vengono
+    restituiti solo gli intervalli che contengono almeno un punto.
+
+    Args:
+        secondi (sequence): Istanti dei punti in secondi, ordinati
+        lat (sequence): Latitudini in gradi
+        lng (sequence): Longitudini in gradi
+        ampiezza (int): Ampiezza dell'intervallo in secondi
+        origine (int): Istante di inizio del primo intervallo
+
+    Returns:
+        dict: Array NumPy (uno per intervallo non vuoto):
+            - bucket: indice dell'intervallo rispetto a origine
+            - primo / ultimo: indice del primo e ultimo punto
+            - conteggio: numero di punti
+            - lat / lng: centroide dei punti
+    """
+    secondi = np.asarray(secondi, dtype=np.int64)
+    lat = np.asarray(lat, dtype=float)
+    lng = np.asarray(lng, dtype=float)
+    if secondi.size == 0:
+        vuoto = np.zeros(0, dtype=np.int64)
+        return {'bucket': vuoto, 'primo': vuoto, 'ultimo': vuoto,
+                'conteggio': vuoto, 'lat': np.zeros(0), 'lng': np.zeros(0)}
+
+    indici = (secondi - origine) // ampiezza
+
+    # Inizio di ogni gruppo di punti consecutivi nello stesso intervallo
+    inizi = np.flatnonzero(np.diff(indici, prepend=indici[0] - 1))
+    conteggio = np.diff(np.append(inizi, secondi.size))
+
+    return {
+        'bucket': indici[inizi],
+        'primo': inizi,
+        'ultimo': inizi + conteggio - 1,
+        'conteggio': conteggio,
+        'lat': np.add.reduceat(lat, inizi) / conteggio,
+        'lng': np.add.reduceat(lng, inizi) / conteggio
+    }
@@ -5,12 +5,15 @@ Fornisce funzioni di supporto riutilizzabili in tutta l'applicazione
 per operazioni comuni come:
 - Recupero utente corrente dalla sessione
 - Conversione tipi database per JSON
+- Parsing date/ora ISO8601 da query string e payload
 - Paginazione query database
 
 Queste utility riducono la duplicazione di codice e centralizzano
 logica comune utilizzata in multiple route.
 """
 
+# Import moduli standard per gestione date
+from datetime import datetime
 # Import componenti Flask per gestione sessioni
 from flask import session
 # Import modelli database
@@ -67,6 +70,41 @@ def format_decimal(value):
     # Converti Decimal in float
     return float(value)
 
+def parse_datetime(value):
+    """
+    Converte una stringa ISO8601 in datetime naive (ora locale).
+    
+    Usata per leggere cursori e timestamp inviati dai client
+    (es: ?since=2025-11-19T10:02:30). Le date con timezone vengono
+    convertite in ora locale e rese naive, coerentemente con le
+    colonne DATETIME del database che non memorizzano il fuso orario.
+    
+    Args:
+        value (str): Stringa data/ora in formato ISO8601 (o None)
+        
+    Returns:
+        datetime: Valore convertito, o None se assente o non valido
+        
+    Example:
+        parse_datetime('2025-11-19T10:02:30')   # datetime(2025, 11, 19, 10, 2, 30)
+        parse_datetime('non-una-data')          # None
+    """
+    # Valore assente: nessun filtro da applicare
+    if not value:
+        return None
+    
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        # Formato non riconosciuto
+        return None
+    
+    # Normalizza a datetime naive in ora locale
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    
+    return parsed
+
 def paginate_query(query, page=1, per_page=20):
     """
     Pagina una query SQLAlchemy e ritorna risultati formattati.
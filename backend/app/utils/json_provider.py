@@ -0,0 +1,94 @@
+"""
+Provider JSON dell'applicazione (app.json).
+
+La serializzazione delle risposte è il costo CPU principale degli
+endpoint di tracking. Questo provider:
+- usa orjson (encoder in C, molto più veloce della libreria standard)
+  se installato, altrimenti ripiega sul modulo json standard
+- serializza nativamente Decimal (come numero), date, time e datetime
+  (ISO8601): i to_dict() dei modelli possono restituire i valori delle
+  colonne senza conversioni campo per campo
+- rispetta JSON_SORT_KEYS e JSON_AS_ASCII della configurazione
+
+orjson è una dipendenza opzionale: pip install orjson.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dipende dall'ambiente
+    orjson = None
+
+
+def _default(obj):
+    """
+    Conversione dei tipi non supportati dall'encoder.
+
+    Decimal diventa un numero (float) e le date ISO8601, invece della
+    stringa e del formato HTTP usati di default da Flask.
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    # Altri tipi gestiti da Flask (dataclass, UUID, __html__)
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provider JSON con orjson opzionale e supporto a Decimal e date.
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        # Flask 3 non legge più queste chiavi dalla configurazione
+        self.sort_keys = app.config.get('JSON_SORT_KEYS', self.sort_keys)
+        self.ensure_ascii = app.config.get('JSON_AS_ASCII', self.ensure_ascii)
+
+    @property
+    def usa_orjson(self):
+        """True se le risposte sono serializzate con orjson."""
+        # orjson produce sempre UTF-8: con ensure_ascii si usa la libreria standard
+        return orjson is not None and not self.ensure_ascii
+
+    def dumps(self, obj, **kwargs):
+        """
+        Serializza obj in una stringa JSON.
+
+        Args:
+            obj: Oggetto da serializzare
+            **kwargs: Opzioni di json.dumps (indent, separators, sort_keys)
+
+        Returns:
+            str: Documento JSON
+        """
+        if not self.usa_orjson:
+            kwargs.setdefault('default', self.default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+
+        opzioni = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if kwargs.get('sort_keys', self.sort_keys):
+            opzioni |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            opzioni |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=opzioni).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """
+        Deserializza una stringa o bytes JSON.
+
+        Returns:
+            Oggetto Python
+        """
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
@@ -0,0 +1,243 @@
+"""
+Paginazione keyset (a cursore) per le liste API.
+
+La paginazione a offset (LIMIT/OFFSET, paginate_query) legge e scarta
+tutte le righe delle pagine precedenti: la pagina 500 costa 500 volte
+la pagina 1. La paginazione keyset riparte invece dall'ultima riga
+ricevuta (WHERE chiave < cursore ORDER BY chiave LIMIT n) e ha costo
+costante, sfruttando l'indice sulle colonne di ordinamento.
+
+Parametri della query string:
+- limit: Numero di elementi per pagina (attiva la paginazione)
+- after: Cursore opaco ricevuto nel campo 'next' della pagina precedente
+- total: Se true include il totale (conteggio in cache per qualche secondo)
+
+Senza limit né after la lista viene restituita completa come in
+passato ({items, total}), per compatibilità con i client esistenti.
+
+Ordinamento: lista di (colonna, discendente). L'ultima colonna deve
+essere univoca (es: ID) per rendere l'ordine totale. I NULL seguono la
+semantica di MySQL: primi in ordine ascendente, ultimi in discendente.
+"""
+import base64
+import json
+from datetime import date, datetime, time
+
+from flask import current_app
+from sqlalchemy import and_, false, or_
+
+from app.utils.cache import TTLCache
+
+# Conteggi totali delle liste (chiave: nome lista + filtri)
+conteggi_cache = TTLCache(ttl=30)
+
+# Valori di default se non configurati
+LIMITE_DEFAULT = 50
+LIMITE_MASSIMO = 500
+
+
+def parse_page_args(args):
+    """
+    Legge i parametri di paginazione dalla query string.
+
+    Args:
+        args: request.args
+
+    Returns:
+        tuple: (limit, after, con_totale); limit è None se la
+               paginazione non è richiesta
+
+    Raises:
+        ValueError: Se limit non è un intero positivo
+    """
+    limit = args.get('limit')
+    after = args.get('after') or None
+    con_totale = args.get('total', 'false').lower() in ('true', '1', 'yes')
+
+    if limit in (None, ''):
+        if after is None:
+            return None, None, con_totale
+        limit = current_app.config.get('LISTE_LIMITE_DEFAULT', LIMITE_DEFAULT)
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('limit deve essere un intero')
+    if limit < 1:
+        raise ValueError('limit deve essere almeno 1')
+
+    return min(limit, current_app.config.get('LISTE_LIMITE_MASSIMO', LIMITE_MASSIMO)), after, con_totale
+
+
+def encode_cursor(nome, valori):
+    """
+    Codifica i valori delle chiavi di ordinamento in un cursore opaco.
+
+    Args:
+        nome (str): Nome della lista (il cursore è valido solo per essa)
+        valori (list): Valori delle colonne di ordinamento dell'ultima riga
+
+    Returns:
+        str: Cursore base64 URL-safe
+    """
+    payload = json.dumps({'l': nome, 'v': [_codifica_valore(v) for v in valori]},
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(nome, cursore, numero):
+    """
+    Decodifica un cursore prodotto da encode_cursor().
+
+    Args:
+        nome (str): Nome della lista attesa
+        cursore (str): Cursore ricevuto dal client
+        numero (int): Numero di colonne di ordinamento attese
+
+    Returns:
+        list: Valori delle colonne di ordinamento
+
+    Raises:
+        ValueError: Se il cursore non è valido per questa lista
+    """
+    try:
+        riempimento = '=' * (-len(cursore) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(cursore + riempimento))
+        if payload.get('l') != nome or len(payload['v']) != numero:
+            raise ValueError
+        return [_decodifica_valore(v) for v in payload['v']]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError('Cursore after non valido')
+
+
+def keyset_filter(ordinamento, valori):
+    """
+    Costruisce la condizione "righe successive al cursore".
+
+    Per ogni colonna c con valore v del cursore (in ordine):
+    - discendente: c < v, oppure c NULL (i NULL seguono), oppure
+      c = v e condizione sulle colonne successive
+    - ascendente: c > v, oppure c = v e condizione successiva
+      (se v è NULL: c non NULL, oppure c NULL e condizione successiva)
+
+    Args:
+        ordinamento (list): Coppie (colonna, discendente)
+        valori (list): Valori del cursore
+
+    Returns:
+        Espressione SQLAlchemy per filter()
+    """
+    condizione = false()
+    # Costruzione dall'ultima colonna alla prima
+    for (colonna, discendente), valore in reversed(list(zip(ordinamento, valori))):
+        if valore is None:
+            if discendente:
+                condizione = and_(colonna.is_(None), condizione)
+            else:
+                condizione = or_(colonna.isnot(None), and_(colonna.is_(None), condizione))
+        elif discendente:
+            condizione = or_(colonna < valore, colonna.is_(None), and_(colonna == valore, condizione))
+        else:
+            condizione = or_(colonna > valore, and_(colonna == valore, condizione))
+    return condizione
+
+
+def ordina(query, ordinamento):
+    """
+    Applica alla query l'ordinamento di una lista.
+
+    Args:
+        query: Query SQLAlchemy
+        ordinamento (list): Coppie (colonna, discendente)
+
+    Returns:
+        Query ordinata
+    """
+    return query.order_by(*[
+        colonna.desc() if discendente else colonna.asc()
+        for colonna, discendente in ordinamento
+    ])
+
+
+def keyset_page(query, nome, ordinamento, args, serializza, chiave_totale=None):
+    """
+    Esegue una query di lista con paginazione keyset opzionale.
+
+    Args:
+        query: Query SQLAlchemy già filtrata (senza order_by)
+        nome (str): Nome della lista, usato per cursore e cache del totale
+        ordinamento (list): Coppie (colonna ORM, discendente); l'ultima univoca
+        args: request.args
+        serializza (callable): Converte un elemento del risultato in dict
+        chiave_totale (tuple): Filtri applicati, parte della chiave del
+                               conteggio in cache
+
+    Returns:
+        dict: {items, total} senza paginazione, altrimenti
+              {items, limit, next[, total]}
+
+    Raises:
+        ValueError: Per parametri o cursore non validi
+    """
+    limit, after, con_totale = parse_page_args(args)
+
+    ordinata = ordina(query, ordinamento)
+
+    # Lista completa (comportamento storico)
+    if limit is None:
+        items = [serializza(r) for r in ordinata.all()]
+        return {'items': items, 'total': len(items)}
+
+    pagina = ordinata
+    if after:
+        valori = decode_cursor(nome, after, len(ordinamento))
+        pagina = pagina.filter(keyset_filter(ordinamento, valori))
+
+    # Una riga in più indica l'esistenza della pagina successiva
+    righe = pagina.limit(limit + 1).all()
+    successiva = None
+    if len(righe) > limit:
+        righe = righe[:limit]
+        ultima = righe[-1]
+        successiva = encode_cursor(nome, [getattr(ultima, c.key) for c, _ in ordinamento])
+
+    result = {
+        'items': [serializza(r) for r in righe],
+        'limit': limit,
+        'next': successiva
+    }
+
+    if con_totale:
+        result['total'] = conteggi_cache.get_or_load(
+            (nome,) + tuple(chiave_totale or ()),
+            lambda: query.order_by(None).count(),
+            ttl=current_app.config.get('LISTE_TOTALE_TTL')
+        )
+
+    return result
+
+
+def _codifica_valore(valore):
+    """Serializza un valore di ordinamento preservandone il tipo."""
+    if isinstance(valore, datetime):
+        return {'dt': valore.isoformat()}
+    if isinstance(valore, date):
+        return {'d': valore.isoformat()}
+    if isinstance(valore, time):
+        return {'t': valore.isoformat()}
+    return valore
+
+
+def _decodifica_valore(valore):
+    """Inverso di _codifica_valore()."""
+    if isinstance(valore, dict):
+        if 'dt' in valore:
+            return datetime.fromisoformat(valore['dt'])
+        if 'd' in valore:
+            return date.fromisoformat(valore['d'])
+        if 't' in valore:
+            return time.fromisoformat(valore['t'])
+        raise ValueError
+    if valore is not None and not isinstance(valore, (int, float, str)):
+        raise ValueError
+    return valore
@@ -0,0 +1,182 @@
+"""
+Funzioni di supporto per la serializzazione delle liste di modelli.
+
+Il to_dict() di alcuni modelli include oggetti collegati (es: Missione
+include drone e pilota). Serializzando una lista con relazioni lazy,
+ogni elemento esegue query aggiuntive: 1 + 2N query per N missioni.
+
+Le route di lista dichiarano quindi le relazioni da includere:
+- parse_expand(): legge ?expand=drone,pilota dalla query string
+- eager_options(): opzioni selectinload per precaricare in blocco
+  solo le relazioni richieste (una query IN per relazione)
+
+Il to_dict() riceve lo stesso expand e serializza solo le relazioni
+precaricate: i client che non usano gli oggetti annidati (?expand=
+vuoto) evitano sia le query sia il payload.
+
+Sparse fieldsets (?fields=id,stato): il client sceglie i campi della
+risposta. La proiezione è applicata sia alla query sia alla serializzazione:
+- parse_fields(): legge e valida ?fields= rispetto ai CAMPI del modello
+- load_only_options(): carica solo le colonne richieste (più chiave
+  primaria, colonne di ordinamento e chiavi esterne delle relazioni)
+- columns_dict(): usato dai to_dict(), legge solo gli attributi richiesti
+  (un attributo escluso da load_only verrebbe caricato con una query)
+
+Uso tipico:
+    expand = parse_expand(request.args, Missione.RELAZIONI)
+    fields = parse_fields(request.args, (*Missione.CAMPI, *Missione.RELAZIONI))
+    expand = fields_expand(expand, fields)
+    missioni = Missione.query.options(
+        *eager_options(Missione, expand),
+        *load_only_options(Missione, fields)
+    ).all()
+    items = [m.to_dict(expand=expand, fields=fields) for m in missioni]
+"""
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+
+
+def parse_expand(args, ammesse):
+    """
+    Legge le relazioni da includere dal parametro ?expand=.
+
+    - parametro assente: tutte le relazioni ammesse (comportamento storico)
+    - ?expand= vuoto o ?expand=none: nessuna relazione
+    - ?expand=drone,pilota: solo quelle indicate
+
+    Args:
+        args: request.args
+        ammesse (tuple): Relazioni espandibili del modello
+
+    Returns:
+        tuple: Relazioni richieste, nell'ordine di ammesse
+
+    Raises:
+        ValueError: Se viene richiesta una relazione non ammessa
+    """
+    valore = args.get('expand')
+    if valore is None:
+        return tuple(ammesse)
+
+    richieste = {r.strip() for r in valore.split(',') if r.strip()}
+    richieste.discard('none')
+
+    non_valide = richieste - set(ammesse)
+    if non_valide:
+        raise ValueError(
+            f'expand non valido: {sorted(non_valide)}. Valori ammessi: {list(ammesse)}'
+        )
+
+    return tuple(r for r in ammesse if r in richieste)
+
+
+def eager_options(model, expand):
+    """
+    Costruisce le opzioni di caricamento per le relazioni richieste.
+
+    Args:
+        model: Classe del modello (es: Missione)
+        expand (tuple): Nomi delle relazioni da precaricare
+
+    Returns:
+        list: Opzioni da passare a query.options()
+    """
+    return [selectinload(getattr(model, relazione)) for relazione in expand]
+
+
+def parse_fields(args, ammessi):
+    """
+    Legge i campi da includere dal parametro ?fields=.
+
+    - parametro assente o vuoto: tutti i campi (comportamento storico)
+    - ?fields=id,stato: solo quelli indicati
+
+    Args:
+        args: request.args
+        ammessi (iterable): Campi JSON del modello (es: Drone.CAMPI)
+
+    Returns:
+        tuple: Campi richiesti nell'ordine di ammessi, None se tutti
+
+    Raises:
+        ValueError: Se viene richiesto un campo non ammesso
+    """
+    valore = args.get('fields')
+    if valore is None or not valore.strip():
+        return None
+
+    ammessi = tuple(ammessi)
+    richiesti = {c.strip() for c in valore.split(',') if c.strip()}
+
+    non_validi = richiesti - set(ammessi)
+    if non_validi:
+        raise ValueError(
+            f'fields non valido: {sorted(non_validi)}. Valori ammessi: {list(ammessi)}'
+        )
+
+    return tuple(c for c in ammessi if c in richiesti)
+
+
+def fields_expand(expand, fields):
+    """
+    Limita le relazioni espanse a quelle presenti in ?fields=.
+
+    Args:
+        expand (tuple): Relazioni richieste con ?expand=
+        fields (tuple): Campi richiesti, None se tutti
+
+    Returns:
+        tuple: Relazioni da precaricare e serializzare
+    """
+    if fields is None:
+        return expand
+    return tuple(r for r in expand if r in fields)
+
+
+def columns_dict(obj, campi, fields=None):
+    """
+    Serializza gli attributi di un oggetto secondo una mappa di campi.
+
+    Args:
+        obj: Istanza del modello o riga di query
+        campi (dict): Campo JSON -> nome dell'attributo
+        fields (tuple): Campi da includere, None per tutti
+
+    Returns:
+        dict: Campi JSON con i valori degli attributi
+    """
+    return {
+        campo: getattr(obj, attributo)
+        for campo, attributo in campi.items()
+        if fields is None or campo in fields
+    }
+
+
+def load_only_options(model, fields, extra=()):
+    """
+    Costruisce l'opzione load_only per i campi richiesti.
+
+    Oltre alle colonne dei campi richiesti carica sempre la chiave
+    primaria, le colonne in extra (es: chiavi di ordinamento lette dal
+    cursore keyset) e le chiavi esterne delle relazioni richieste.
+
+    Args:
+        model: Classe del modello con attributo CAMPI
+        fields (tuple): Campi richiesti, None se tutti
+        extra (iterable): Altre colonne ORM da caricare
+
+    Returns:
+        list: Opzioni da passare a query.options() (vuota se fields è None)
+    """
+    if fields is None:
+        return []
+
+    mapper = inspect(model)
+    attributi = [c.key for c in mapper.primary_key]
+    attributi += [model.CAMPI[c] for c in fields if c in model.CAMPI]
+    attributi += [c.key for c in extra]
+    for relazione in fields:
+        if relazione in mapper.relationships:
+            attributi += [c.key for c in mapper.relationships[relazione].local_columns]
+
+    return [load_only(*[getattr(model, a) for a in dict.fromkeys(attributi)])]
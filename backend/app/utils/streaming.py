@@ -0,0 +1,118 @@
+"""
+Risposte JSON in streaming per le liste di grandi dimensioni.
+
+jsonify() costruisce in memoria l'intera lista di dizionari e la stringa
+JSON prima di inviare il primo byte: memoria e latenza crescono con la
+dimensione della tabella. In modalità streaming la query viene letta a
+pagine keyset (WHERE chiave < ultima ORDER BY chiave LIMIT n) e ogni
+pagina viene serializzata e inviata subito: memoria costante e primo
+byte immediato.
+
+Ogni pagina è una query completa: le relazioni precaricate con
+selectinload (?expand=) funzionano come nella risposta normale, cosa
+che un unico cursore lato server (yield_per) non garantisce.
+
+Formati (?stream=):
+- json: stesso contenuto della risposta normale, {"items": [...], "total": N},
+  con "total" scritto in coda quando il conteggio è noto
+- ndjson: un oggetto JSON per riga (application/x-ndjson), comodo per
+  importazioni e strumenti a riga di comando
+
+Nota: un errore durante lo streaming non può più cambiare lo status HTTP;
+la risposta viene troncata (JSON non valido) e l'errore registrato nel log.
+"""
+from flask import Response, current_app, stream_with_context
+
+from app.utils.pagination import keyset_filter, ordina
+
+# Formati di streaming ammessi per ?stream=
+FORMATI_STREAM = ('json', 'ndjson')
+
+# Righe lette dal database (e inviate al client) per pagina
+RIGHE_PER_BLOCCO = 500
+
+
+def parse_stream_arg(args):
+    """
+    Legge il formato di streaming dalla query string.
+
+    Args:
+        args: request.args
+
+    Returns:
+        str: 'json', 'ndjson' o None se lo streaming non è richiesto
+
+    Raises:
+        ValueError: Se il formato non è supportato
+    """
+    formato = args.get('stream')
+    if not formato:
+        return None
+    if formato not in FORMATI_STREAM:
+        raise ValueError(f'Formato stream non valido. Valori ammessi: {list(FORMATI_STREAM)}')
+    return formato
+
+
+def stream_list(query, ordinamento, serializza, formato='json'):
+    """
+    Crea una risposta che invia il risultato di una query a pagine.
+
+    Le pagine sono lette con paginazione keyset sulle colonne di
+    ordinamento: in memoria resta una sola pagina di RIGHE_PER_BLOCCO.
+
+    Args:
+        query: Query SQLAlchemy già filtrata (senza order_by)
+        ordinamento (list): Coppie (colonna ORM, discendente); l'ultima univoca
+        serializza (callable): Converte un elemento del risultato in dict
+        formato (str): 'json' o 'ndjson'
+
+    Returns:
+        Response: Risposta Flask in streaming
+    """
+    dumps = current_app.json.dumps
+    logger = current_app.logger
+    ordinata = ordina(query, ordinamento)
+
+    def pagine():
+        """Pagine successive della query fino all'ultima (incompleta)."""
+        pagina = ordinata
+        while True:
+            righe = pagina.limit(RIGHE_PER_BLOCCO).all()
+            if righe:
+                yield righe
+            if len(righe) < RIGHE_PER_BLOCCO:
+                return
+            ultima = righe[-1]
+            pagina = ordinata.filter(keyset_filter(
+                ordinamento, [getattr(ultima, c.key) for c, _ in ordinamento]
+            ))
+
+    def blocchi():
+        totale = 0
+
+        if formato == 'json':
+            yield '{"items":['
+
+        try:
+            for righe in pagine():
+                if formato == 'json':
+                    parti = [(',' if totale or i else '') + dumps(serializza(riga))
+                             for i, riga in enumerate(righe)]
+                else:
+                    parti = [dumps(serializza(riga)) + '\n' for riga in righe]
+                totale += len(righe)
+                yield ''.join(parti)
+        except Exception:
+            logger.exception('Streaming lista interrotto dopo %d elementi', totale)
+            raise
+
+        if formato == 'json':
+            yield f'],"total":{totale}}}'
+
+    mimetype = 'application/json' if formato == 'json' else 'application/x-ndjson'
+    # stream_with_context mantiene attivi request context e sessione DB
+    # per tutta la durata del generatore
+    return Response(stream_with_context(blocchi()), mimetype=mimetype, headers={
+        # Disabilita il buffering di nginx per inoltrare subito i blocchi
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Script per generare le copie precompresse dei file statici.
+
+Crea accanto a ogni file JS/CSS/HTML/SVG di frontend/static le copie
+.gz (e .br se il modulo brotli è installato) servite da send_static()
+ai client che accettano la compressione. Le copie aggiornate vengono
+saltate: lo script può essere rieseguito a ogni build.
+
+L'applicazione genera le stesse copie all'avvio (COMPRESSIONE_STATICI);
+questo script serve quando la cartella statica è in sola lettura in
+produzione (es: immagine container) e le copie vanno create in build.
+
+Utilizzo:
+    python backend/compress_static.py
+"""
+import os
+import sys
+
+# Permette l'import del package app eseguendo lo script da qualsiasi cartella
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.compression import Compressor, brotli  # noqa: E402
+
+# Cartella dei file statici del frontend
+static_folder = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'frontend', 'static')
+)
+
+
+def main():
+    """Genera le copie precompresse e stampa un riepilogo."""
+    generate = Compressor().precompress_static(static_folder)
+    codifiche = 'gzip e brotli' if brotli else 'gzip (brotli non installato)'
+    print(f'✓ {generate} copie precompresse generate in {static_folder} ({codifiche})')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@ Questo script automatizza la configurazione iniziale del database eseguendo:
 2. Connessione al database MySQL tramite PyMySQL
 3. Esecuzione dello schema SQL (database/schema.sql) per creare tabelle
 4. Esecuzione del seed SQL (database/seed.sql) per inserire dati iniziali
+5. Applicazione delle migrazioni pendenti (database/migrations, vedi migrate.py)
 
 Lo script è progettato per essere idempotente dove possibile:
 - Continua l'esecuzione anche se alcune istruzioni falliscono
@@ -20,6 +21,7 @@ Prerequisiti:
 - File .env con DATABASE_URL configurato
 - File database/schema.sql con DDL tabelle
 - File database/seed.sql con dati iniziali
+- Directory database/migrations con le migrazioni versionate
 - Database MySQL già creato e accessibile
 
 Variabili d'ambiente richieste:
@@ -35,6 +37,7 @@ import sys
 from dotenv import load_dotenv
 import pymysql
 from urllib.parse import urlparse
+from migrate import upgrade
 
 # Carica variabili d'ambiente
 basedir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -112,6 +115,10 @@ try:
     
     connection.commit()
     
+    # Applica le migrazioni (indici, nuove tabelle) non ancora registrate
+    print("\n🔧 Applicazione migrazioni...")
+    upgrade(connection)
+    
     print("\n✅ Database inizializzato con successo!")
     
     cursor.close()
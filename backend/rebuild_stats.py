@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script per ricostruire i rollup giornalieri delle statistiche.
+
+La tabella StatisticaGiornaliera è aggiornata dall'applicazione a ogni
+scrittura ORM di missioni e ordini (vedi app/services/stats_rollup.py)
+e popolata dalla migrazione 0003. Va ricostruita quando missioni o
+ordini sono modificati senza passare dall'applicazione:
+- SQL manuale o import di dati (es: seed.sql rieseguito)
+- query.update()/query.delete() in blocco, che non generano eventi
+
+La ricostruzione avviene in una sola transazione; eseguirla con
+l'applicazione ferma, o in un momento senza nuovi ordini e missioni.
+
+Utilizzo:
+    python backend/rebuild_stats.py
+"""
+import os
+import sys
+
+# Permette l'import del package app eseguendo lo script da qualsiasi cartella
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app  # noqa: E402
+from app.services.stats_rollup import stats_rollup  # noqa: E402
+
+
+def main():
+    """Ricostruisce i rollup e stampa un riepilogo."""
+    app = create_app()
+    with app.app_context():
+        righe = stats_rollup.rebuild()
+    print(f'✓ Rollup statistiche ricostruiti: {righe} righe in StatisticaGiornaliera')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Fixture comuni dei test.
+
+L'applicazione gira su un database SQLite temporaneo creato con
+db.create_all(): i test non richiedono MySQL. Le cache di processo
+(ultima posizione, catalogo, KPI) vengono svuotate a ogni test.
+
+Esecuzione:
+    cd backend
+    python -m pytest
+"""
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Drone, Pilota, Utente
+
+
+class TestConfig(Config):
+    """Configurazione di test: SQLite, nessuna precompressione dei file statici."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    COMPRESSIONE_STATICI = False
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Applicazione con schema vuoto, un admin, un cliente, un drone e un pilota."""
+    TestConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+    app = create_app(TestConfig)
+
+    from app.routes.statistiche import overview_cache
+    from app.services.position_cache import position_cache
+    from app.services.product_catalog import product_catalog
+    position_cache.clear()
+    product_catalog.invalidate()
+    overview_cache.invalidate()
+
+    with app.app_context():
+        db.create_all()
+        admin = Utente(Nome='Admin', Mail='admin@test', Ruolo='admin')
+        cliente = Utente(Nome='Cliente', Mail='cliente@test', Ruolo='cliente')
+        admin.set_password('x')
+        cliente.set_password('x')
+        db.session.add_all([
+            admin, cliente,
+            Drone(Modello='Test', Capacita=2, Batteria=90),
+            Pilota(Nome='Pilota', Cognome='Test', Turno='Mattina', Brevetto='A1')
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def login(app):
+    """Factory di client di test autenticati: login('admin') o login('cliente', uid)."""
+    def _login(ruolo='admin', user_id=1):
+        client = app.test_client()
+        with client.session_transaction() as sessione:
+            sessione['user_id'] = user_id
+            sessione['ruolo'] = ruolo
+        return client
+    return _login
+
+
+@pytest.fixture
+def query_counter(app):
+    """Conta gli statement SQL eseguiti: with query_counter() as statements: ..."""
+    class Contatore:
+        def __init__(self):
+            self.statements = []
+
+        def _registra(self, conn, cursor, statement, *args):
+            self.statements.append(statement)
+
+        def __enter__(self):
+            event.listen(db.engine, 'before_cursor_execute', self._registra)
+            return self.statements
+
+        def __exit__(self, *exc):
+            event.remove(db.engine, 'before_cursor_execute', self._registra)
+
+    return Contatore
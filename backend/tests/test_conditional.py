@@ -0,0 +1,36 @@
+"""
+Test dei GET condizionali (ETag) su missioni e percorsi.
+"""
+from datetime import datetime
+
+from app.extensions import db
+from app.models import Drone, Missione, Traccia
+
+
+def test_etag_percorso_indipendente_dalla_telemetria_del_drone(app, login):
+    missione = Missione(IdDrone=1, IdPilota=1, Stato='in_corso')
+    db.session.add(missione)
+    db.session.flush()
+    db.session.add(Traccia(ID_Drone=1, ID_Missione=missione.ID, Latitudine=45, Longitudine=9,
+                           TIMESTAMP=datetime(2025, 11, 19, 10, 0, 0)))
+    db.session.commit()
+    client = login('admin')
+
+    urls = [f'/api/missioni/{missione.ID}/tracce', f'/api/tracce/missione/{missione.ID}']
+    etag_percorsi = {url: client.get(url).headers['ETag'] for url in urls}
+    etag_dettaglio = client.get(f'/api/missioni/{missione.ID}').headers['ETag']
+
+    db.session.get(Drone, 1).Batteria = 42
+    db.session.commit()
+
+    for url, etag in etag_percorsi.items():
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    # Il dettaglio include il drone annidato: cambia versione
+    assert client.get(f'/api/missioni/{missione.ID}', headers={'If-None-Match': etag_dettaglio}).status_code == 200
+
+    db.session.add(Traccia(ID_Drone=1, ID_Missione=missione.ID, Latitudine=45.1, Longitudine=9,
+                           TIMESTAMP=datetime(2025, 11, 19, 10, 0, 1)))
+    db.session.commit()
+
+    for url, etag in etag_percorsi.items():
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,36 @@
+"""
+Test della lista ordini (GET /api/ordini).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models import Missione, Ordine
+
+
+def _crea_ordini(quanti):
+    """Un ordine del cliente (ID 2) per missione, ciascuna con lo stesso drone."""
+    for i in range(quanti):
+        missione = Missione(IdDrone=1, IdPilota=1, Stato='in_corso')
+        db.session.add(missione)
+        db.session.flush()
+        db.session.add(Ordine(Tipo='Standard', ID_Missione=missione.ID, ID_Utente=2,
+                              Orario=datetime(2025, 11, 19) + timedelta(minutes=i)))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('ruolo, user_id', [('admin', 1), ('cliente', 2)])
+def test_lista_ordini_una_query(app, login, query_counter, ruolo, user_id):
+    client = login(ruolo, user_id)
+    conteggi = []
+
+    for quanti in (2, 20):
+        _crea_ordini(quanti)
+        with query_counter() as statements:
+            risposta = client.get('/api/ordini')
+        assert risposta.status_code == 200
+        conteggi.append(len(statements))
+
+    assert len(risposta.get_json()['items']) == 22
+    assert conteggi == [1, 1]
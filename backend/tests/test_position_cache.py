@@ -0,0 +1,40 @@
+"""
+Test della cache dell'ultima posizione (app.services.position_cache).
+"""
+from app.extensions import db
+from app.models import Missione
+from app.services import position_cache as modulo
+from app.services.position_cache import LatestPositionCache, position_cache
+from app.services.tracking_service import publish_tracce
+
+
+def _punto(missione_id, timestamp):
+    return {'missione_id': missione_id, 'drone_id': 1, 'lat': 45.0, 'lng': 9.0, 'timestamp': timestamp}
+
+
+def test_scadenza_dal_primo_inserimento(monkeypatch):
+    adesso = [100.0]
+    monkeypatch.setattr(modulo.time, 'monotonic', lambda: adesso[0])
+    cache = LatestPositionCache(ttl=5)
+
+    cache.update(_punto(1, '2025-11-19T10:00:00'))
+    adesso[0] = 104.0
+    # Gli aggiornamenti non prolungano la scadenza
+    cache.update(_punto(1, '2025-11-19T10:00:04'))
+    assert cache.get(1)['timestamp'] == '2025-11-19T10:00:04'
+
+    adesso[0] = 105.0
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_punti_di_missioni_concluse_non_in_cache(app):
+    attiva = Missione(IdDrone=1, Stato='in_corso')
+    conclusa = Missione(IdDrone=1, Stato='completata')
+    db.session.add_all([attiva, conclusa])
+    db.session.commit()
+
+    publish_tracce([_punto(attiva.ID, '2025-11-19T10:00:00'), _punto(conclusa.ID, '2025-11-19T10:00:00')])
+
+    assert position_cache.get(attiva.ID) is not None
+    assert position_cache.get(conclusa.ID) is None
@@ -0,0 +1,34 @@
+"""
+Test del catalogo prodotti in memoria e dei GET condizionali.
+"""
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import Prodotto
+from app.services.product_catalog import product_catalog
+
+
+def test_etag_segue_il_contenuto_dello_snapshot(app, monkeypatch):
+    db.session.add(Prodotto(nome='Cavo USB', peso=0.2, categoria='Elettronica'))
+    db.session.commit()
+    client = app.test_client()
+
+    etag = client.get('/api/prodotti').headers['ETag']
+    assert client.get('/api/prodotti', headers={'If-None-Match': etag}).status_code == 304
+
+    # Scrittura di un altro worker: nessun evento ORM in questo processo
+    db.session.execute(insert(Prodotto.__table__).values(nome='Batteria', peso=1, categoria='Elettronica'))
+    db.session.commit()
+    assert client.get('/api/prodotti', headers={'If-None-Match': etag}).status_code == 304
+
+    # Scaduto CATALOGO_TTL lo snapshot viene ricostruito: nuovo ETag
+    monkeypatch.setattr(product_catalog, 'ttl', 0)
+    risposta = client.get('/api/prodotti', headers={'If-None-Match': etag})
+    assert risposta.status_code == 200
+    assert risposta.headers['ETag'] != etag
+    assert risposta.get_json()['total'] == 2
+
+    # Ricostruzione con gli stessi dati: stesso ETag
+    nuovo = risposta.headers['ETag']
+    product_catalog.invalidate()
+    assert client.get('/api/prodotti', headers={'If-None-Match': nuovo}).status_code == 304
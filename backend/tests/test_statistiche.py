@@ -0,0 +1,40 @@
+"""
+Test delle statistiche admin di droni e piloti (GET /api/stats/droni, /piloti).
+"""
+from datetime import date
+
+import pytest
+
+from app.extensions import db
+from app.models import Drone, Missione, Pilota
+
+
+def _amplia_flotta(quanti):
+    """Aggiunge droni e piloti, ciascuno con una missione completata e valutata."""
+    for i in range(quanti):
+        drone = Drone(Modello=f'Drone {i}', Capacita=2, Batteria=80)
+        pilota = Pilota(Nome='Pilota', Cognome=str(i), Turno='Mattina', Brevetto=f'B{i}')
+        db.session.add_all([drone, pilota])
+        db.session.flush()
+        db.session.add(Missione(IdDrone=drone.ID, IdPilota=pilota.ID, Stato='completata',
+                                Valutazione=4, DataMissione=date(2025, 11, 19)))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('endpoint, chiave', [('droni', 'droni'), ('piloti', 'piloti')])
+def test_statement_costanti_al_crescere_della_flotta(app, login, query_counter, endpoint, chiave):
+    client = login('admin')
+    conteggi = []
+
+    for quanti in (2, 25):
+        _amplia_flotta(quanti)
+        with query_counter() as statements:
+            risposta = client.get(f'/api/stats/{endpoint}')
+        assert risposta.status_code == 200
+        conteggi.append(len(statements))
+
+    righe = risposta.get_json()[chiave]
+    # Drone e pilota del seed (senza missioni) più quelli aggiunti
+    assert len(righe) == 28
+    assert sum(r['missioni_completate'] for r in righe) == 27
+    assert conteggi == [1, 1]
@@ -0,0 +1,104 @@
+"""
+Test dei rollup giornalieri delle statistiche (app.services.stats_rollup).
+"""
+from datetime import date, datetime
+
+from app.extensions import db
+from app.models import Drone, Missione, Ordine, StatisticaGiornaliera
+from app.services import stats_rollup as modulo
+from app.services.stats_rollup import stats_rollup
+
+
+def _rollup():
+    """Righe di StatisticaGiornaliera come tuple confrontabili."""
+    righe = db.session.query(StatisticaGiornaliera).all()
+    return sorted(
+        (r.Dimensione, str(r.Giorno), r.Chiave, r.Conteggio, r.Completate,
+         float(r.SommaValori), r.NumeroValori)
+        for r in righe
+    )
+
+
+def _popola():
+    """Missioni e ordini di partenza (tutti scritti tramite la sessione ORM)."""
+    secondo = Drone(Modello='Secondo', Capacita=2, Batteria=60)
+    db.session.add(secondo)
+    db.session.flush()
+    missioni = [
+        Missione(IdDrone=1, IdPilota=1, Stato='programmata', DataMissione=date(2025, 11, 18)),
+        Missione(IdDrone=1, IdPilota=1, Stato='completata', Valutazione=7,
+                 DataMissione=date(2025, 11, 18)),
+        Missione(IdDrone=secondo.ID, IdPilota=1, Stato='in_corso', DataMissione=date(2025, 11, 19)),
+        Missione(IdDrone=None, IdPilota=None, Stato='programmata', DataMissione=None)
+    ]
+    ordini = [
+        Ordine(Tipo='Standard', PesoTotale=2, ID_Utente=2, Orario=datetime(2025, 11, 18, 9)),
+        Ordine(Tipo='Express', PesoTotale=1.5, ID_Utente=2, Orario=datetime(2025, 11, 19, 10))
+    ]
+    db.session.add_all(missioni + ordini)
+    db.session.commit()
+    return secondo, missioni, ordini
+
+
+def test_aggiornamenti_incrementali_uguali_alla_ricostruzione(app):
+    secondo, missioni, ordini = _popola()
+    iniziali = _rollup()
+    stats_rollup.rebuild()
+    assert iniziali == _rollup()
+
+    # Cambio di stato con valutazione, di data e di drone (dopo il commit:
+    # gli attributi sono scaduti e i valori precedenti vanno ricaricati)
+    missioni[0].Stato = 'completata'
+    missioni[0].Valutazione = 9
+    missioni[1].DataMissione = date(2025, 11, 20)
+    missioni[2].IdDrone = 1
+    missioni[3].DataMissione = date(2025, 11, 21)
+    db.session.commit()
+
+    # Modifica di un ordine e cancellazione di una missione
+    ordini[0].Tipo = 'Express'
+    ordini[0].PesoTotale = 3
+    ordini[1].Orario = datetime(2025, 11, 22, 8)
+    db.session.delete(missioni[2])
+    db.session.commit()
+
+    incrementali = _rollup()
+    stats_rollup.rebuild()
+    assert incrementali == _rollup()
+
+    # Le righe scese a zero sono eliminate: nessuna missione per il secondo drone
+    assert not any(r[0] == 'missioni_drone' and r[2] == str(secondo.ID) for r in incrementali)
+
+
+def test_senza_tabella_rollup_scritture_e_letture_funzionano(app, login):
+    secondo, missioni, ordini = _popola()
+    client = login('admin')
+    attese = {
+        endpoint: client.get(f'/api/stats/{endpoint}').get_json()
+        for endpoint in ('missioni', 'droni', 'piloti', 'ordini')
+    }
+    attese['overview'] = client.get('/api/stats/overview').get_json()
+    serie = client.get('/api/stats/timeseries?metric=ordini&from=2025-11-17&to=2025-11-20').get_json()
+
+    StatisticaGiornaliera.__table__.drop(db.engine)
+    modulo._tabella_presente.clear()
+
+    # Le scritture ORM non dipendono dalla tabella dei rollup
+    nuova = Missione(IdDrone=1, IdPilota=1, Stato='annullata', DataMissione=date(2025, 11, 19))
+    db.session.add(nuova)
+    db.session.commit()
+    nuova.Stato = 'programmata'
+    db.session.commit()
+    db.session.delete(nuova)
+    ordini[1].IndirizzoDestinazione = 'Via Roma 1'
+    db.session.commit()
+
+    from app.routes.statistiche import overview_cache
+    overview_cache.invalidate()
+    for endpoint, attesa in attese.items():
+        risposta = client.get(f'/api/stats/{endpoint}')
+        assert risposta.status_code == 200
+        assert risposta.get_json() == attesa, endpoint
+    assert client.get(
+        '/api/stats/timeseries?metric=ordini&from=2025-11-17&to=2025-11-20'
+    ).get_json() == serie
@@ -0,0 +1,54 @@
+"""
+Test delle liste in streaming (?stream=json|ndjson).
+"""
+import json
+from datetime import date, datetime, time
+
+from app.extensions import db
+from app.models import Missione, Ordine
+from app.utils.streaming import RIGHE_PER_BLOCCO
+
+# Più di due pagine, con date e ore ripetute (ordinamento deciso dall'ID)
+NUMERO = 2 * RIGHE_PER_BLOCCO + 3
+
+
+def _crea_missioni():
+    db.session.add_all([
+        Missione(IdDrone=1, IdPilota=1, Stato='programmata',
+                 DataMissione=date(2025, 11, 1 + i % 3), Ora=time(10, i % 2))
+        for i in range(NUMERO)
+    ])
+    db.session.commit()
+
+
+def test_stream_missioni_con_relazioni_completo(app, login):
+    _crea_missioni()
+    client = login('admin')
+
+    righe = client.get('/api/missioni', query_string={'stream': 'ndjson'}).get_data(as_text=True).splitlines()
+    missioni = [json.loads(r) for r in righe]
+
+    assert len(missioni) == NUMERO
+    assert len({m['id'] for m in missioni}) == NUMERO
+    assert all(m['drone'] and m['pilota'] for m in missioni)
+
+    completo = client.get('/api/missioni', query_string={'stream': 'json'}).get_json()
+    assert completo['total'] == NUMERO
+    assert [m['id'] for m in completo['items']] == [m['id'] for m in missioni]
+
+
+def test_stream_ordini_completo(app, login):
+    missione = Missione(IdDrone=1, IdPilota=1, Stato='in_corso')
+    db.session.add(missione)
+    db.session.flush()
+    db.session.add_all([
+        Ordine(Tipo='Standard', ID_Missione=missione.ID, ID_Utente=2, Orario=datetime(2025, 11, 19))
+        for _ in range(NUMERO)
+    ])
+    db.session.commit()
+    client = login('admin')
+
+    risposta = client.get('/api/ordini', query_string={'stream': 'json', 'fields': 'id,stato'}).get_json()
+
+    assert risposta['total'] == NUMERO
+    assert len({o['id'] for o in risposta['items']}) == NUMERO
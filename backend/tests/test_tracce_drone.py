@@ -0,0 +1,47 @@
+"""
+Test dello storico di un drone (GET /api/tracce/drone/<id>).
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Missione, Traccia
+from app.routes import tracce
+from app.services.track_archive import archive_mission
+
+INIZIO = datetime(2025, 11, 19, 10, 0, 0)
+
+
+def _punti(missione, secondi):
+    db.session.add_all([
+        Traccia(ID_Drone=1, ID_Missione=missione.ID, Latitudine=45, Longitudine=9,
+                TIMESTAMP=INIZIO + timedelta(seconds=s))
+        for s in secondi
+    ])
+
+
+def test_intervallo_grezzo_troncato(app, login, monkeypatch):
+    monkeypatch.setattr(tracce, 'MAX_PUNTI_DRONE', 3)
+    # Missione archiviata (righe eliminate) con punti alternati a un'altra
+    archiviata = Missione(IdDrone=1, IdPilota=1, Stato='completata')
+    attiva = Missione(IdDrone=1, IdPilota=1, Stato='in_corso')
+    db.session.add_all([archiviata, attiva])
+    db.session.flush()
+    _punti(archiviata, (0, 2, 4))
+    _punti(attiva, (1, 3, 5))
+    db.session.commit()
+    archive_mission(archiviata.ID, prune=True)
+    db.session.commit()
+    client = login('admin')
+
+    dati = client.get('/api/tracce/drone/1', query_string={'from': '2000-01-01T00:00:00'}).get_json()
+
+    assert dati['troncato'] is True
+    assert [p['timestamp'] for p in dati['tracce']] == [
+        (INIZIO + timedelta(seconds=s)).isoformat() for s in (0, 1, 2)
+    ]
+
+    seguito = client.get('/api/tracce/drone/1', query_string={
+        'from': (INIZIO + timedelta(seconds=3)).isoformat(), 'to': (INIZIO + timedelta(seconds=5)).isoformat()
+    }).get_json()
+    assert seguito['troncato'] is False
+    assert len(seguito['tracce']) == 3
@@ -0,0 +1,52 @@
+"""
+Test dell'archivio compresso dei percorsi (app.services.track_archive).
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Missione, Traccia, TracciaArchivio
+from app.services import track_archive
+from app.services.track_archive import archive_mission
+from app.services.tracking_service import get_track_points
+
+INIZIO = datetime(2025, 11, 19, 10, 0, 0)
+
+
+def _missione_completata(punti=3):
+    missione = Missione(IdDrone=1, IdPilota=1, Stato='completata')
+    db.session.add(missione)
+    db.session.flush()
+    for secondi in range(punti):
+        db.session.add(Traccia(ID_Drone=1, ID_Missione=missione.ID, Latitudine=45, Longitudine=9,
+                               TIMESTAMP=INIZIO + timedelta(seconds=secondi)))
+    db.session.commit()
+    return missione
+
+
+def test_punti_successivi_all_archiviazione_inclusi(app):
+    missione = _missione_completata()
+    archive_mission(missione.ID, prune=True)
+    db.session.commit()
+
+    # Punto del buffer write-behind scritto dopo l'archiviazione
+    db.session.add(Traccia(ID_Drone=1, ID_Missione=missione.ID, Latitudine=46, Longitudine=9,
+                           TIMESTAMP=INIZIO + timedelta(seconds=3)))
+    db.session.commit()
+
+    punti = get_track_points(missione.ID, stato='completata')
+    assert len(punti) == 4
+    assert punti[-1]['lat'] == 46.0
+
+
+def test_senza_tabella_archivio_usa_le_righe(app, login):
+    missione = _missione_completata()
+    TracciaArchivio.__table__.drop(db.engine)
+    track_archive._tabella_presente.clear()
+    client = login('admin')
+
+    risposta = client.get(f'/api/missioni/{missione.ID}/tracce')
+    assert risposta.status_code == 200
+    assert len(risposta.get_json()['tracce']) == 3
+
+    assert client.post(f'/api/missioni/{missione.ID}/archivio').status_code == 400
+    assert client.delete(f'/api/missioni/{missione.ID}').status_code == 200
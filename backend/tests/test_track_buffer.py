@@ -0,0 +1,150 @@
+"""
+Test del salvataggio dei singoli punti GPS e del buffer write-behind.
+"""
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.extensions import db
+from app.models import Missione, Traccia
+from app.services import track_ingest
+from app.services.track_buffer import track_buffer
+from app.services.track_ingest import validate_traccia
+
+
+@pytest.fixture
+def missione(app):
+    missione = Missione(IdDrone=1, IdPilota=1, Stato='in_corso')
+    db.session.add(missione)
+    db.session.commit()
+    return missione
+
+
+@pytest.fixture
+def write_behind(app, monkeypatch):
+    """Buffer abilitato senza thread di flush: i test chiamano flush()."""
+    monkeypatch.setattr(track_buffer, 'abilitato', True)
+    monkeypatch.setattr(track_buffer, '_avvia_thread', lambda: None)
+    yield track_buffer
+    track_buffer.flush()
+
+
+def test_scrittura_diretta_usa_timestamp_del_client(missione, login):
+    client = login('pilota', 1)
+    punto = {'missione_id': missione.ID, 'lat': 45.0, 'lng': 9.0, 'timestamp': '2025-11-19T10:00:00'}
+
+    risposta = client.post('/api/tracce', json=punto)
+    assert risposta.status_code == 201
+    assert risposta.get_json()['traccia']['timestamp'] == '2025-11-19T10:00:00'
+
+    assert client.post('/api/tracce', json=punto).status_code == 409
+    assert client.post(f'/api/missioni/{missione.ID}/tracce', json=punto).status_code == 409
+
+
+def test_write_behind_verifica_missione_e_drone(missione, login, write_behind):
+    client = login('pilota', 1)
+
+    assert client.post('/api/tracce', json={'missione_id': 999, 'drone_id': 1, 'lat': 45, 'lng': 9}).status_code == 404
+    assert client.post('/api/tracce', json={'missione_id': missione.ID, 'drone_id': 99, 'lat': 45, 'lng': 9}).status_code == 400
+    assert client.post('/api/tracce', json={'missione_id': missione.ID, 'drone_id': 1, 'lat': 45, 'lng': 9}).status_code == 202
+    assert write_behind.metrics()['in_coda'] == 1
+
+
+def test_batch_con_riga_rifiutata_viene_diviso(missione, write_behind, monkeypatch):
+    inserisci = track_ingest.insert_tracce
+
+    def insert_con_vincolo(righe):
+        # Simula un vincolo violato dalla riga con latitudine 0
+        if any(riga['Latitudine'] == 0 for riga in righe):
+            raise IntegrityError('INSERT', {}, Exception('vincolo'))
+        return inserisci(righe)
+
+    monkeypatch.setattr(track_ingest, 'insert_tracce', insert_con_vincolo)
+    prima = write_behind.metrics()
+
+    for secondi, lat in enumerate([45, 46, 0, 47, 48]):
+        riga, _ = validate_traccia({'missione_id': missione.ID, 'drone_id': 1, 'lat': lat, 'lng': 9,
+                                    'timestamp': datetime(2025, 11, 19, 10, 0, secondi).isoformat()})
+        write_behind.enqueue(riga)
+
+    assert write_behind.flush() == 4
+    metriche = write_behind.metrics()
+    assert metriche['righe_scritte'] - prima['righe_scritte'] == 4
+    assert metriche['righe_scartate'] - prima['righe_scartate'] == 1
+    assert metriche['in_coda'] == 0
+    assert db.session.query(Traccia).count() == 4
+
+
+def _righe(missione, quante):
+    righe = []
+    for secondi in range(quante):
+        riga, _ = validate_traccia({'missione_id': missione.ID, 'drone_id': 1, 'lat': 45, 'lng': 9,
+                                    'timestamp': datetime(2025, 11, 19, 10, 0, secondi).isoformat()})
+        righe.append(riga)
+    return righe
+
+
+def test_database_non_raggiungibile_ritenta_con_attesa(missione, monkeypatch):
+    inserisci = track_ingest.insert_tracce
+    chiamate = []
+
+    def insert_fallita(righe):
+        chiamate.append(len(righe))
+        raise OperationalError('INSERT', {}, Exception('database non raggiungibile'))
+
+    monkeypatch.setattr(track_ingest, 'insert_tracce', insert_fallita)
+    monkeypatch.setattr(track_buffer, 'max_size', 5)
+    monkeypatch.setattr(track_buffer, 'max_age', 0.05)
+
+    # Batch alla soglia di dimensione: senza attesa verrebbe ritentato subito
+    for riga in _righe(missione, 5):
+        track_buffer.enqueue(riga)
+    time.sleep(0.5)
+
+    # Tentativi a 0, 0.05, 0.15, 0.35 s (attesa raddoppiata a ogni errore)
+    assert 3 <= len(chiamate) <= 5
+    assert set(chiamate) == {5}
+    assert track_buffer.metrics()['in_coda'] == 5
+
+    with track_buffer._cond:
+        track_buffer._stop = True
+        track_buffer._cond.notify()
+    track_buffer._thread.join(timeout=5)
+    track_buffer._thread = None
+
+    monkeypatch.setattr(track_ingest, 'insert_tracce', inserisci)
+    assert track_buffer.flush() == 5
+    assert track_buffer.metrics()['tentativi_consecutivi'] == 0
+
+
+def test_coda_piena_scarta_i_punti(missione, write_behind, monkeypatch):
+    monkeypatch.setattr(write_behind, 'max_coda', 3)
+    prima = write_behind.metrics()['righe_perse']
+
+    for riga in _righe(missione, 5):
+        write_behind.enqueue(riga)
+
+    metriche = write_behind.metrics()
+    assert metriche['in_coda'] == 3
+    assert metriche['righe_perse'] - prima == 2
+
+
+def test_errore_della_notifica_non_ferma_il_flusher(missione, monkeypatch):
+    from app.services import tracking_service
+
+    def publish_fallita(punti, stati=None):
+        raise RuntimeError('notifica fallita')
+
+    monkeypatch.setattr(tracking_service, 'publish_tracce', publish_fallita)
+    monkeypatch.setattr(track_buffer, 'max_age', 0.05)
+    righe = _righe(missione, 2)
+
+    for riga in righe:
+        track_buffer.enqueue(riga)
+        time.sleep(0.3)
+
+    assert track_buffer._thread.is_alive()
+    assert db.session.query(Traccia).count() == 2
+    track_buffer.shutdown()
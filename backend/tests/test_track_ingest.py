@@ -0,0 +1,48 @@
+"""
+Test dell'inserimento in blocco delle tracce (POST /api/tracce/bulk).
+"""
+from app.extensions import db
+from app.models import Missione, Traccia
+from app.services.position_cache import position_cache
+
+
+def _missione():
+    missione = Missione(IdDrone=1, IdPilota=1, Stato='in_corso')
+    db.session.add(missione)
+    db.session.commit()
+    return missione
+
+
+def test_punti_esistenti_e_droni_sconosciuti_scartati(app, login):
+    missione = _missione()
+    client = login('pilota', 1)
+    punto = {'missione_id': missione.ID, 'lat': 45.0, 'lng': 9.0, 'timestamp': '2025-11-19T10:00:00'}
+
+    assert client.post('/api/tracce/bulk', json={'tracce': [punto]}).status_code == 201
+
+    risposta = client.post('/api/tracce/bulk', json={'tracce': [
+        punto,
+        {**punto, 'timestamp': '2025-11-19T10:00:01', 'drone_id': 99},
+        {**punto, 'timestamp': '2025-11-19T10:00:02', 'lat': 45.5}
+    ]})
+    dati = risposta.get_json()
+
+    assert risposta.status_code == 201
+    assert dati['inserite'] == 1
+    assert [s['indice'] for s in dati['scartate']] == [0, 1]
+    assert db.session.query(Traccia).count() == 2
+    # Pubblicato solo il punto scritto
+    assert position_cache.get(missione.ID)['lat'] == 45.5
+
+
+def test_batch_di_soli_duplicati_rifiutato(app, login):
+    missione = _missione()
+    client = login('pilota', 1)
+    punto = {'missione_id': missione.ID, 'lat': 45.0, 'lng': 9.0, 'timestamp': '2025-11-19T10:00:00'}
+    client.post('/api/tracce/bulk', json={'tracce': [punto]})
+
+    risposta = client.post('/api/tracce/bulk', json={'tracce': [punto]})
+
+    assert risposta.status_code == 400
+    assert risposta.get_json()['inserite'] == 0
+    assert db.session.query(Traccia).count() == 1
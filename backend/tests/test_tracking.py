@@ -0,0 +1,62 @@
+"""
+Test del tracking incrementale degli ordini (GET /api/ordini/<id>/tracking?since=).
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Drone, Missione, Ordine, Traccia
+
+INIZIO = datetime(2025, 11, 19, 10, 0, 0)
+
+
+def _missione_con_ordine():
+    """Missione in corso con un ordine del cliente (ID 2) e due punti GPS."""
+    missione = Missione(IdDrone=1, IdPilota=1, Stato='in_corso')
+    db.session.add(missione)
+    db.session.flush()
+    ordine = Ordine(Tipo='Standard', ID_Missione=missione.ID, ID_Utente=2, Orario=INIZIO)
+    db.session.add(ordine)
+    for secondi in (0, 1):
+        db.session.add(Traccia(ID_Drone=1, ID_Missione=missione.ID, Latitudine=45 + secondi / 100,
+                               Longitudine=9, TIMESTAMP=INIZIO + timedelta(seconds=secondi)))
+    db.session.commit()
+    return missione, ordine
+
+
+def test_cursore_include_punti_salvati_in_ritardo(app, login):
+    missione, ordine = _missione_con_ordine()
+    client = login('cliente', 2)
+
+    completo = client.get(f'/api/ordini/{ordine.ID}/tracking').get_json()
+    cursore = completo['cursor']
+    assert cursore == (INIZIO + timedelta(seconds=1)).isoformat()
+
+    # Punti salvati dopo il poll con timestamp già raggiunto dal cursore:
+    # stesso secondo (altro drone) e un secondo prima (flush ritardato)
+    db.session.add(Drone(Modello='Secondo', Capacita=2, Batteria=90))
+    db.session.flush()
+    db.session.add_all([
+        Traccia(ID_Drone=2, ID_Missione=missione.ID, Latitudine=46, Longitudine=9,
+                TIMESTAMP=INIZIO + timedelta(seconds=1)),
+        Traccia(ID_Drone=2, ID_Missione=missione.ID, Latitudine=47, Longitudine=9,
+                TIMESTAMP=INIZIO)
+    ])
+    db.session.commit()
+
+    incrementale = client.get(f'/api/ordini/{ordine.ID}/tracking', query_string={'since': cursore}).get_json()
+    latitudini = {p['lat'] for p in incrementale['percorso']}
+    assert {46.0, 47.0} <= latitudini
+    # Il cursore non torna indietro per i punti più vecchi riletti dalla finestra
+    assert incrementale['cursor'] == cursore
+
+
+def test_cursore_fuori_finestra_esclude_punti_vecchi(app, login):
+    missione, ordine = _missione_con_ordine()
+    app.config['TRACKING_CURSORE_FINESTRA'] = 0
+    client = login('cliente', 2)
+
+    cursore = (INIZIO + timedelta(seconds=1)).isoformat()
+    risposta = client.get(f'/api/ordini/{ordine.ID}/tracking', query_string={'since': cursore}).get_json()
+
+    # Cursore inclusivo: solo il punto con lo stesso timestamp
+    assert [p['timestamp'] for p in risposta['percorso']] == [cursore]
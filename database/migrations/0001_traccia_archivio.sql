@@ -0,0 +1,19 @@
+-- ============================================
+-- MIGRAZIONE 0001: ARCHIVIO COMPRESSO TRACCE
+-- ============================================
+-- Tabella con il percorso compresso delle missioni completate
+-- (vedi backend/app/services/track_archive.py)
+
+-- migrate:up
+CREATE TABLE IF NOT EXISTS TracciaArchivio (
+    ID_Missione INT PRIMARY KEY,
+    NumeroPunti INT,
+    TimestampInizio DATETIME,
+    TimestampFine DATETIME,
+    Dati MEDIUMBLOB,
+    CreatoIl DATETIME,
+    FOREIGN KEY (ID_Missione) REFERENCES Missione(ID)
+);
+
+-- migrate:down
+DROP TABLE IF EXISTS TracciaArchivio;
@@ -0,0 +1,66 @@
+-- ============================================
+-- MIGRAZIONE 0002: INDICI PER LE QUERY DELLE ROUTE
+-- ============================================
+-- Indici secondari per i percorsi di accesso usati dalle API.
+-- ALGORITHM=INPLACE, LOCK=NONE: creazione online su InnoDB, le tabelle
+-- restano leggibili e scrivibili durante la costruzione dell'indice.
+
+-- migrate:up
+
+-- Percorso di una missione: filter_by(ID_Missione) ORDER BY TIMESTAMP
+-- (la PK inizia con ID_Drone e non è utilizzabile)
+ALTER TABLE Traccia
+    ADD INDEX idx_traccia_missione_timestamp (ID_Missione, TIMESTAMP),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Ultime tracce di un drone: filter_by(ID_Drone) ORDER BY TIMESTAMP DESC
+ALTER TABLE Traccia
+    ADD INDEX idx_traccia_drone_timestamp (ID_Drone, TIMESTAMP),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Ordini di un cliente: filter_by(ID_Utente) ORDER BY Orario DESC
+ALTER TABLE Ordine
+    ADD INDEX idx_ordine_utente_orario (ID_Utente, Orario),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Lista ordini admin: ORDER BY Orario DESC
+ALTER TABLE Ordine
+    ADD INDEX idx_ordine_orario (Orario),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Filtro missioni per stato e conteggi delle statistiche
+ALTER TABLE Missione
+    ADD INDEX idx_missione_stato (Stato),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Filtro missioni per data, ordinamento per data e ora
+ALTER TABLE Missione
+    ADD INDEX idx_missione_data_ora (DataMissione, Ora),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Login e controllo email in registrazione: filter_by(Mail)
+ALTER TABLE Utente
+    ADD INDEX idx_utente_mail (Mail),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Catalogo prodotti per categoria
+ALTER TABLE Prodotto
+    ADD INDEX idx_prodotto_categoria (categoria),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- migrate:down
+-- Gli indici compositi su ID_Utente e ID_Missione hanno sostituito gli
+-- indici creati da InnoDB per le foreign key: va ricreato un indice
+-- sulla colonna nello stesso ALTER, altrimenti il DROP fallisce (1553)
+ALTER TABLE Prodotto DROP INDEX idx_prodotto_categoria;
+ALTER TABLE Utente DROP INDEX idx_utente_mail;
+ALTER TABLE Missione DROP INDEX idx_missione_data_ora;
+ALTER TABLE Missione DROP INDEX idx_missione_stato;
+ALTER TABLE Ordine DROP INDEX idx_ordine_orario;
+ALTER TABLE Ordine
+    ADD INDEX (ID_Utente),
+    DROP INDEX idx_ordine_utente_orario;
+ALTER TABLE Traccia DROP INDEX idx_traccia_drone_timestamp;
+ALTER TABLE Traccia
+    ADD INDEX (ID_Missione),
+    DROP INDEX idx_traccia_missione_timestamp;
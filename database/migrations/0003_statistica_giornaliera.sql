@@ -0,0 +1,52 @@
+-- ============================================
+-- MIGRAZIONE 0003: ROLLUP GIORNALIERI STATISTICHE
+-- ============================================
+-- Totali giornalieri di missioni (per stato, drone, pilota) e ordini
+-- (per tipo), mantenuti dall'applicazione a ogni scrittura
+-- (vedi backend/app/services/stats_rollup.py). Le righe senza data
+-- usano il giorno 1000-01-01, le chiavi NULL la stringa vuota.
+-- La migrazione popola la tabella dai dati esistenti; per ricostruirla
+-- in seguito: python backend/rebuild_stats.py
+
+-- migrate:up
+CREATE TABLE IF NOT EXISTS StatisticaGiornaliera (
+    Dimensione VARCHAR(20) NOT NULL,
+    Giorno DATE NOT NULL,
+    Chiave VARCHAR(50) NOT NULL DEFAULT '',
+    Conteggio INT NOT NULL DEFAULT 0,
+    Completate INT NOT NULL DEFAULT 0,
+    SommaValori DECIMAL(14,2) NOT NULL DEFAULT 0,
+    NumeroValori INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Dimensione, Giorno, Chiave)
+);
+
+INSERT INTO StatisticaGiornaliera
+    (Dimensione, Giorno, Chiave, Conteggio, Completate, SommaValori, NumeroValori)
+SELECT 'missioni_stato', COALESCE(DataMissione, '1000-01-01'), COALESCE(Stato, ''),
+       COUNT(*), COALESCE(SUM(Stato = 'completata'), 0), COALESCE(SUM(Valutazione), 0), COUNT(Valutazione)
+FROM Missione
+GROUP BY COALESCE(DataMissione, '1000-01-01'), COALESCE(Stato, '');
+
+INSERT INTO StatisticaGiornaliera
+    (Dimensione, Giorno, Chiave, Conteggio, Completate, SommaValori, NumeroValori)
+SELECT 'missioni_drone', COALESCE(DataMissione, '1000-01-01'), COALESCE(CAST(IdDrone AS CHAR), ''),
+       COUNT(*), COALESCE(SUM(Stato = 'completata'), 0), COALESCE(SUM(Valutazione), 0), COUNT(Valutazione)
+FROM Missione
+GROUP BY COALESCE(DataMissione, '1000-01-01'), COALESCE(CAST(IdDrone AS CHAR), '');
+
+INSERT INTO StatisticaGiornaliera
+    (Dimensione, Giorno, Chiave, Conteggio, Completate, SommaValori, NumeroValori)
+SELECT 'missioni_pilota', COALESCE(DataMissione, '1000-01-01'), COALESCE(CAST(IdPilota AS CHAR), ''),
+       COUNT(*), COALESCE(SUM(Stato = 'completata'), 0), COALESCE(SUM(Valutazione), 0), COUNT(Valutazione)
+FROM Missione
+GROUP BY COALESCE(DataMissione, '1000-01-01'), COALESCE(CAST(IdPilota AS CHAR), '');
+
+INSERT INTO StatisticaGiornaliera
+    (Dimensione, Giorno, Chiave, Conteggio, Completate, SommaValori, NumeroValori)
+SELECT 'ordini_tipo', COALESCE(DATE(Orario), '1000-01-01'), COALESCE(Tipo, ''),
+       COUNT(*), 0, COALESCE(SUM(PesoTotale), 0), COUNT(PesoTotale)
+FROM Ordine
+GROUP BY COALESCE(DATE(Orario), '1000-01-01'), COALESCE(Tipo, '');
+
+-- migrate:down
+DROP TABLE IF EXISTS StatisticaGiornaliera;
@@ -43,6 +43,12 @@ const AdminAPI = {
         return this.request('/stats/overview');
     },
     
+    // Serie temporale: { metric, from, to, bucket }
+    async getTimeseries(params = {}) {
+        const query = new URLSearchParams(params).toString();
+        return this.request(`/stats/timeseries${query ? `?${query}` : ''}`);
+    },
+    
     // Ordini
     async getOrdini(params = {}) {
         const query = new URLSearchParams(params).toString();
@@ -183,6 +189,7 @@ const AdminAPI = {
     },
     
     async getCategorie() {
-        return this.request('/prodotti/categorie');
+        const data = await this.request('/prodotti/categorie');
+        return data.categorie || [];
     }
 };
@@ -9,6 +9,15 @@
  */
 
 const DashboardView = {
+    // Intervalli del grafico andamento: giorni mostrati e ampiezza delle barre
+    trendRanges: {
+        '7d': { days: 7, bucket: 'day' },
+        '30d': { days: 30, bucket: 'day' },
+        '6m': { days: 182, bucket: 'week' },
+        '12m': { days: 365, bucket: 'month' },
+        '24m': { days: 730, bucket: 'month' }
+    },
+    
     // Render dashboard
     async render(container) {
         container.innerHTML = `
@@ -38,6 +47,31 @@ const DashboardView = {
                 </div>
             </div>
             
+            <div class="dashboard-card trend-card">
+                <div class="card-header">
+                    <h3>Andamento</h3>
+                    <div class="filter-group">
+                        <select id="trend-metric" class="form-select">
+                            <option value="missioni">Missioni</option>
+                            <option value="ordini">Ordini</option>
+                            <option value="valutazioni">Valutazioni</option>
+                        </select>
+                        <select id="trend-range" class="form-select">
+                            <option value="7d">Ultimi 7 giorni</option>
+                            <option value="30d" selected>Ultimi 30 giorni</option>
+                            <option value="6m">Ultimi 6 mesi</option>
+                            <option value="12m">Ultimi 12 mesi</option>
+                            <option value="24m">Ultimi 2 anni</option>
+                        </select>
+                    </div>
+                </div>
+                <div class="card-body chart-container" id="trend-chart">
+                    <div class="loading-spinner">
+                        <div class="spinner"></div>
+                    </div>
+                </div>
+            </div>
+            
             <div class="dashboard-grid">
                 <div class="dashboard-card">
                     <div class="card-header">
@@ -75,6 +109,9 @@ const DashboardView = {
             </div>
         `;
         
+        document.getElementById('trend-metric').addEventListener('change', () => this.loadTrend());
+        document.getElementById('trend-range').addEventListener('change', () => this.loadTrend());
+        
         await this.loadData();
     },
     
@@ -82,6 +119,7 @@ const DashboardView = {
     async loadData() {
         await Promise.all([
             this.loadStatistiche(),
+            this.loadTrend(),
             this.loadRecentOrdini(),
             this.loadActiveMissioni()
         ]);
@@ -170,6 +208,65 @@ const DashboardView = {
         `;
     },
     
+    // Load andamento (serie temporale dai rollup giornalieri)
+    async loadTrend() {
+        const container = document.getElementById('trend-chart');
+        const metric = document.getElementById('trend-metric').value;
+        const range = this.trendRanges[document.getElementById('trend-range').value];
+        
+        const to = new Date();
+        const from = new Date(to);
+        from.setDate(from.getDate() - range.days + 1);
+        const isoDate = (d) => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+        
+        try {
+            const data = await AdminAPI.getTimeseries({
+                metric,
+                from: isoDate(from),
+                to: isoDate(to),
+                bucket: range.bucket
+            });
+            this.renderTrendChart(container, data);
+        } catch (error) {
+            console.error('Error loading trend:', error);
+            container.innerHTML = `
+                <div class="error-message">Errore nel caricamento</div>
+            `;
+        }
+    },
+    
+    // Render andamento: una barra per periodo (valutazioni: media, altre metriche: totale)
+    renderTrendChart(container, data) {
+        const value = (p) => data.metric === 'valutazioni' ? (p.media || 0) : p.totale;
+        const values = data.serie.map(value);
+        const max = Math.max(...values, 1);
+        const barWidth = 100 / Math.max(values.length, 1);
+        
+        const bars = data.serie.map((p, i) => {
+            const height = (value(p) / max) * 100;
+            const label = data.metric === 'valutazioni'
+                ? `${p.periodo}: media ${p.media ?? 'N/D'} (${p.totale} valutazioni)`
+                : `${p.periodo}: ${p.totale}`;
+            return `
+                <rect x="${i * barWidth + barWidth * 0.1}" y="${100 - height}"
+                      width="${barWidth * 0.8}" height="${height}" class="trend-bar">
+                    <title>${label}</title>
+                </rect>
+            `;
+        }).join('');
+        
+        container.innerHTML = `
+            <svg class="trend-svg" viewBox="0 0 100 100" preserveAspectRatio="none">
+                ${bars}
+            </svg>
+            <div class="trend-axis">
+                <span>${data.serie.length ? data.serie[0].periodo : ''}</span>
+                <span>max ${Math.round(max * 100) / 100}</span>
+                <span>${data.serie.length ? data.serie[data.serie.length - 1].periodo : ''}</span>
+            </div>
+        `;
+    },
+    
     // Load recent ordini
     async loadRecentOrdini() {
         const container = document.getElementById('recent-ordini');
@@ -41,8 +41,12 @@ const ClienteAPI = {
         return this.request(`/ordini/${id}`);
     },
     
-    async getTracking(ordineId) {
-        return this.request(`/ordini/${ordineId}/tracking`);
+    async getTracking(ordineId, params = {}) {
+        // Compact encoded route on the wire, decoded back to points
+        const qs = buildQueryString({ format: 'polyline', ...params });
+        const data = await this.request(`/ordini/${ordineId}/tracking?${qs}`);
+        if (data.percorso) data.percorso = decodeTrack(data.percorso);
+        return data;
     },
     
     async createOrdine(data) {
@@ -73,11 +77,15 @@ const ClienteAPI = {
         return this.request(`/prodotti${qs ? '?' + qs : ''}`);
     },
     
-    async searchProdotti(query) {
-        return this.request(`/prodotti/search?q=${encodeURIComponent(query)}`);
+    async searchProdotti(query, categoria = '') {
+        // Substring + typo-tolerant matches from the server-side catalog index
+        const qs = buildQueryString({ q: query, fuzzy: true, categoria });
+        const data = await this.request(`/prodotti/search?${qs}`);
+        return data.prodotti || [];
     },
     
     async getCategorie() {
-        return this.request('/prodotti/categorie');
+        const data = await this.request('/prodotti/categorie');
+        return data.categorie || [];
     }
 };
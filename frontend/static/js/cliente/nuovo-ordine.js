@@ -202,7 +202,7 @@ const NuovoOrdineView = {
         try {
             let prodotti;
             if (search) {
-                prodotti = await ClienteAPI.searchProdotti(search);
+                prodotti = await ClienteAPI.searchProdotti(search, categoria);
             } else {
                 const params = {};
                 if (categoria) params.categoria = categoria;
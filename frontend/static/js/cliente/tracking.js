@@ -5,7 +5,8 @@
    ======================================================================== */
 
 /**
- * Tracking Module - Live tracking with polling
+ * Tracking Module - Live tracking via Server-Sent Events
+ * (falls back to incremental polling when SSE is unavailable)
  */
 
 const TrackingView = {
@@ -14,6 +15,9 @@ const TrackingView = {
     pollingInterval: null,
     pollingDelay: 3000, // 3 seconds
     lastUpdate: null,
+    cursor: null, // Timestamp of the last received point (incremental polling)
+    seenPoints: new Set(), // Points already drawn (the server re-sends a window before the cursor)
+    eventSource: null,
     
     // Render tracking page
     async render(container, ordineId) {
@@ -85,6 +89,10 @@ const TrackingView = {
         try {
             const data = await ClienteAPI.getTracking(this.ordineId);
             
+            // Remember cursor and drawn points for incremental polling
+            this.cursor = data.cursor || null;
+            this.seenPoints = new Set((data.percorso || []).map(p => this.pointKey(p)));
+            
             // Update map
             this.map.setTracking(data);
             
@@ -94,11 +102,11 @@ const TrackingView = {
             // Update status bar
             this.updateStatusBar(data);
             
-            // Start polling if in progress
+            // Start live updates if in progress
             if (data.stato === 'in_consegna' || data.stato === 'in_corso') {
-                this.startPolling();
+                this.startLive(data.missione ? data.missione.id : null);
             } else {
-                this.stopPolling();
+                this.stopLive();
             }
             
         } catch (error) {
@@ -254,26 +262,83 @@ const TrackingView = {
         lastUpdateEl.textContent = `Ultimo aggiornamento: ${formatTime(this.lastUpdate)}`;
     },
     
+    // Start live updates: SSE stream when supported, polling otherwise
+    startLive(missioneId) {
+        if (this.eventSource || this.pollingInterval) return;
+        
+        if (!missioneId || !window.EventSource) {
+            this.startPolling();
+            return;
+        }
+        
+        this.eventSource = new EventSource(`/api/tracce/missione/${missioneId}/stream`);
+        
+        this.eventSource.addEventListener('posizione', (event) => {
+            const p = JSON.parse(event.data);
+            
+            // Skip points already drawn (initial snapshot, reconnections)
+            if (!this.markSeen(p)) return;
+            if (p.timestamp && (!this.cursor || p.timestamp > this.cursor)) {
+                this.cursor = p.timestamp;
+            }
+            
+            this.map.updateDronePosition(p.lat, p.lng);
+            this.map.addRoutePoint(p.lat, p.lng);
+            this.updateStatusBar({ stato: 'in_corso' });
+        });
+        
+        this.eventSource.addEventListener('stato', (event) => {
+            const data = JSON.parse(event.data);
+            if (data.stato !== 'in_consegna' && data.stato !== 'in_corso') {
+                this.stopLive();
+                this.loadTracking();
+                if (data.stato === 'completata') {
+                    showToast('Consegna completata!', 'success');
+                }
+            }
+        });
+        
+        this.eventSource.onerror = () => {
+            // Browser retries automatically; if the stream is closed for good, poll
+            if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+                this.eventSource = null;
+                this.startPolling();
+            }
+        };
+    },
+    
+    // Stop any live update channel
+    stopLive() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+        this.stopPolling();
+    },
+    
     // Start polling for updates
     startPolling() {
         if (this.pollingInterval) return;
         
         this.pollingInterval = setInterval(async () => {
             try {
-                const data = await ClienteAPI.getTracking(this.ordineId);
+                // Only fetch points newer than the cursor
+                const params = this.cursor ? { since: this.cursor } : {};
+                const data = await ClienteAPI.getTracking(this.ordineId, params);
+                this.cursor = data.cursor || this.cursor;
+                
+                // Add new points to route (the response repeats recent points)
+                const nuovi = (data.percorso || []).filter(p => this.markSeen(p));
+                nuovi.forEach(p => {
+                    this.map.addRoutePoint(p.lat, p.lng);
+                });
                 
                 // Update drone position
-                if (data.posizione_attuale) {
+                if (nuovi.length && data.posizione_attuale) {
                     this.map.updateDronePosition(
                         data.posizione_attuale.lat,
                         data.posizione_attuale.lng
                     );
-                    
-                    // Add to route
-                    this.map.addRoutePoint(
-                        data.posizione_attuale.lat,
-                        data.posizione_attuale.lng
-                    );
                 }
                 
                 // Update info panel
@@ -294,6 +359,19 @@ const TrackingView = {
         }, this.pollingDelay);
     },
     
+    // Identity of a route point: timestamp and position (5 decimals, polyline precision)
+    pointKey(p) {
+        return `${p.timestamp}|${Number(p.lat).toFixed(5)}|${Number(p.lng).toFixed(5)}`;
+    },
+    
+    // Record a point as drawn; false if it was already drawn
+    markSeen(p) {
+        const key = this.pointKey(p);
+        if (this.seenPoints.has(key)) return false;
+        this.seenPoints.add(key);
+        return true;
+    },
+    
     // Stop polling
     stopPolling() {
         if (this.pollingInterval) {
@@ -317,11 +395,13 @@ const TrackingView = {
     
     // Cleanup on leave
     destroy() {
-        this.stopPolling();
+        this.stopLive();
         if (this.map && this.map.map) {
             this.map.map.remove();
         }
         this.map = null;
         this.ordineId = null;
+        this.cursor = null;
+        this.seenPoints = new Set();
     }
 };
@@ -170,3 +170,45 @@ function buildQueryString(params) {
         .map(([k, v]) => `${encodeURIComponent(k)}=${encodeURIComponent(v)}`)
         .join('&');
 }
+
+// Decode a compact track ({ formato: 'polyline', ... }) into [{ lat, lng, timestamp }]
+function decodeTrack(track) {
+    if (!track || track.formato !== 'polyline') return track || [];
+    
+    const factor = Math.pow(10, track.precisione || 5);
+    const encoded = track.polyline || '';
+    const deltas = track.timestamp_delta || [];
+    const points = [];
+    let index = 0, lat = 0, lng = 0;
+    let time = track.timestamp_inizio ? new Date(track.timestamp_inizio).getTime() : null;
+    
+    const nextValue = () => {
+        let result = 0, shift = 0, byte;
+        do {
+            byte = encoded.charCodeAt(index++) - 63;
+            result |= (byte & 0x1f) << shift;
+            shift += 5;
+        } while (byte >= 0x20);
+        return (result & 1) ? ~(result >> 1) : (result >> 1);
+    };
+    
+    const pad = (n) => String(n).padStart(2, '0');
+    const toLocalIso = (ms) => {
+        const d = new Date(ms);
+        return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}T` +
+            `${pad(d.getHours())}:${pad(d.getMinutes())}:${pad(d.getSeconds())}`;
+    };
+    
+    while (index < encoded.length) {
+        lat += nextValue();
+        lng += nextValue();
+        if (time !== null) time += (deltas[points.length] || 0) * 1000;
+        points.push({
+            lat: lat / factor,
+            lng: lng / factor,
+            timestamp: time !== null ? toLocalIso(time) : null
+        });
+    }
+    
+    return points;
+}